@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Import time, load time, RSS and encode latency of each embedding backend.
+
+Every backend runs in a fresh interpreter (so import time and peak RSS
+aren't shared) and reports the time to import what it needs, to load the
+model, peak resident memory, and encode latency for one query (p50/p99)
+and per text in batches of 32. Backends: torch (sentence-transformers),
+onnx and onnx-int8 (ONNX Runtime, see onnx_encoder.py).
+
+Usage (from backend/):
+    python benchmarks/bench_backends.py [--backends torch onnx onnx-int8] [--repeats 200]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+QUERY = "skills needed for data scientist career development learning roadmap excluding python, sql"
+
+
+def measure(backend, model_name, repeats):
+    """Runs in the child process"""
+    import numpy as np
+
+    started = time.perf_counter()
+    if backend == "torch":
+        import sentence_transformers  # noqa: F401
+    else:
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+    import_s = time.perf_counter() - started
+
+    from embeddings import load_model
+    started = time.perf_counter()
+    model = load_model(model_name, backend)
+    load_s = time.perf_counter() - started
+
+    model.encode([QUERY])
+    single = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        model.encode([QUERY])
+        single.append(time.perf_counter() - started)
+    batch = [f"{QUERY} {i}" for i in range(32)]
+    started = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        model.encode(batch)
+    per_text = (time.perf_counter() - started) / (max(1, repeats // 10) * len(batch))
+
+    single_ms = np.array(single) * 1000
+    return {
+        "import_s": import_s,
+        "load_s": load_s,
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50_ms": float(np.percentile(single_ms, 50)),
+        "p99_ms": float(np.percentile(single_ms, 99)),
+        "batch_ms_per_text": per_text * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.model, args.repeats)))
+        return
+
+    print(f"Model: {args.model}, {args.repeats} single-query encodes")
+    print(f"{'backend':>10} {'import s':>9} {'load s':>7} {'RSS MB':>7} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'batch ms/text':>14}")
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--model", args.model,
+             "--repeats", str(args.repeats)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            print(f"{backend:>10} failed: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{backend:>10} {r['import_s']:>9.2f} {r['load_s']:>7.2f} {r['rss_mb']:>7.0f} "
+              f"{r['p50_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['batch_ms_per_text']:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Embeddings/sec and latency of concurrent single-text encodes, per-call vs micro-batched.
+
+N threads each encode a stream of distinct one-text queries - the shape of
+MemoryManager.add/retrieve and CourseRecommender.recommend under load -
+through an Encoder without micro-batching (max_batch=1, every call is its
+own forward pass) and with it (max_batch/max_wait), and reports throughput
+and p50/p99 per-call latency. The embedding cache is off so every text
+reaches the model.
+
+--synthetic swaps the model for a stand-in whose calls cost a fixed
+overhead plus a per-text amount (sleeping, so it releases the GIL like
+torch does) - handy where the model weights aren't available.
+
+Usage (from backend/):
+    python benchmarks/bench_encoder.py [--threads 1 8 32] [--per-thread 50]
+        [--max-batch 32] [--max-wait-ms 5] [--model all-MiniLM-L6-v2] [--synthetic]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+from embeddings import Encoder  # noqa: E402
+
+
+class SyntheticModel:
+    """Batch cost = call_ms + text_ms per text"""
+
+    def __init__(self, dim=384, call_ms=4.0, text_ms=0.2):
+        self.dim = dim
+        self.call_ms = call_ms
+        self.text_ms = text_ms
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        time.sleep((self.call_ms + self.text_ms * len(texts)) / 1000)
+        return np.zeros((len(texts), self.dim), dtype="float32")
+
+
+def run(encoder, threads, per_thread):
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(t):
+        barrier.wait()
+        for i in range(per_thread):
+            text = f"skills python sql docker goal role {t} query {i}"
+            started = time.perf_counter()
+            encoder.encode([text])
+            latencies[t].append(time.perf_counter() - started)
+
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    flat = np.array([x for per in latencies for x in per]) * 1000
+    return threads * per_thread / elapsed, np.percentile(flat, 50), np.percentile(flat, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--per-thread", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        model = SyntheticModel()
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+    modes = {
+        "per-call": Encoder(args.model, model),
+        f"batched {args.max_batch}/{args.max_wait_ms:g}ms": Encoder(
+            args.model, model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000),
+    }
+    modes["per-call"].encode(["warmup"])
+
+    print(f"Model: {'synthetic' if args.synthetic else args.model}, "
+          f"{args.per_thread} single-text encodes per thread")
+    print(f"{'threads':>7} {'mode':>20} {'emb/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    for threads in args.threads:
+        for name, encoder in modes.items():
+            before = encoder.stats()
+            rate, p50, p99 = run(encoder, threads, args.per_thread)
+            after = encoder.stats()
+            calls = after["encode_calls"] - before["encode_calls"]
+            texts = after["texts_encoded"] - before["texts_encoded"]
+            print(f"{threads:>7} {name:>20} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f} "
+                  f"{texts / calls if calls else 0:>10.1f}")
+    for encoder in modes.values():
+        encoder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Recall@k vs latency of the approximate indexes against the flat baseline.
+
+Builds each index kind from vector_index over synthetic clustered,
+normalized embeddings (the shape of all-MiniLM-L6-v2 output) and reports
+build time, mean query latency and recall@k against exact IndexFlatL2
+results, for a sweep of efSearch (HNSW) and nprobe (IVF-PQ) values. Use it
+to pick MEMORY_/COURSE_ INDEX, INDEX_THRESHOLD, EF_SEARCH and NPROBE.
+
+Usage (from backend/):
+    python benchmarks/bench_index.py [--sizes 10000 100000] [--dim 384] [--k 5] [--queries 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+from vector_index import AdaptiveIndex, IndexSpec, new_flat_index  # noqa: E402
+
+
+def make_vectors(n, dim, seed=0, intrinsic=32):
+    """Clustered points on a low-dimensional subspace plus a little noise,
+    L2-normalized: sentence embeddings are far from uniformly spread"""
+    basis = np.random.default_rng(42).standard_normal((intrinsic, dim)).astype("float32")
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(43).standard_normal((64, intrinsic)).astype("float32")
+    latent = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.standard_normal((n, intrinsic)).astype("float32")
+    vectors = latent @ basis + 0.5 * rng.standard_normal((n, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def run_queries(index, queries, k):
+    results = []
+    started = time.perf_counter()
+    for q in queries:
+        results.append([i for _, i in index.search(q.reshape(1, -1), k)])
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def recall(results, truth, k):
+    return np.mean([len(set(r[:k]) & set(t[:k])) / k for r, t in zip(results, truth)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'n':>8} {'index':>7} {'param':>13} {'build s':>8} {'ms/query':>9} {'recall@' + str(args.k):>9}")
+    for n in args.sizes:
+        vectors = make_vectors(n, args.dim)
+        queries = make_vectors(args.queries, args.dim, seed=1)
+        flat = new_flat_index(args.dim)
+        flat.add_with_ids(vectors, np.arange(n, dtype="int64"))
+
+        baseline = AdaptiveIndex(IndexSpec(kind="flat"), flat)
+        truth, ms = run_queries(baseline, queries, args.k)
+        print(f"{n:>8} {'flat':>7} {'-':>13} {0.0:>8.1f} {ms:>9.3f} {1.0:>9.3f}")
+
+        sweeps = [("hnsw", "ef_search", (16, 32, 64, 128)), ("ivfpq", "nprobe", (4, 16, 64))]
+        for kind, param, values in sweeps:
+            spec = IndexSpec(kind=kind, threshold=0)
+            index = AdaptiveIndex(spec, flat)
+            index.upgrade()
+            for value in values:
+                setattr(spec, param, value)
+                results, ms = run_queries(index, queries, args.k)
+                label = f"{param}={value}"
+                print(f"{n:>8} {kind:>7} {label:>13} {index.build_seconds:>8.1f} {ms:>9.3f} "
+                      f"{recall(results, truth, args.k):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bytes per memory entry: in-RAM dict of roadmap strings vs MetaStore.
+
+Stores the recorded GPT outputs in benchmarks/corpus (cycled, with a
+suffix so no two entries are identical) both ways and reports Python heap
+bytes per entry (tracemalloc), compressed bytes on disk per entry, and the
+time to read back 3 entries - what one memory search decompresses.
+
+Usage (from backend/):
+    python benchmarks/bench_meta.py [--entries 5000]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+from memory_meta import MetaStore  # noqa: E402
+
+
+def load_corpus():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(THIS_DIR, "corpus", "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def heap_bytes(fill):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = fill()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return store, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = [f"{corpus[i % len(corpus)]}\n(entry {i})" for i in range(args.entries)]
+
+    def fill_dict():
+        # Fresh copies of the strings, the way infos arrive from the API or the log
+        return {i: "".join(text) for i, text in enumerate(texts)}
+
+    def fill_store():
+        store = MetaStore()
+        for i, text in enumerate(texts):
+            store[i] = text
+        return store
+
+    _, dict_bytes = heap_bytes(fill_dict)
+    store, store_bytes = heap_bytes(fill_store)
+    disk = store.stats()["meta_disk_bytes_per_entry"]
+
+    starts = range(0, args.entries, max(1, args.entries // 300))
+    started = time.perf_counter()
+    for i in starts:
+        for j in range(3):
+            store[(i + j) % args.entries]
+    per_search = (time.perf_counter() - started) / len(starts)
+
+    n = args.entries
+    print(f"Entries: {n}, avg roadmap {sum(map(len, texts)) / n:.0f} chars")
+    print(f"{'layout':>16} {'RAM B/entry':>12} {'disk B/entry':>13}")
+    print(f"{'dict of str':>16} {dict_bytes / n:>12.0f} {0:>13}")
+    print(f"{'MetaStore':>16} {store_bytes / n:>12.0f} {disk:>13}")
+    print(f"Reading 3 entries: {per_search * 1000:.3f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for roadmap_parser.parse_roadmap_sections.
+
+Parses every recorded GPT output in benchmarks/corpus, and the same corpus
+with the learning-path section repeated to simulate longer roadmaps, and
+reports roadmaps/sec for each size.
+
+Usage (from backend/):
+    python benchmarks/bench_parser.py [--seconds 1.0]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+from roadmap_parser import parse_roadmap_sections  # noqa: E402
+
+
+def load_corpus():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(THIS_DIR, "corpus", "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def lengthen(text, factor):
+    """Repeat the body of the learning roadmap section factor times"""
+    marker = text.lower().find("learning roadmap")
+    end = text.lower().find("cv enhancement tips")
+    if marker < 0 or end < 0:
+        return text * factor
+    body_start = text.find("\n", marker) + 1
+    body = text[body_start:end]
+    return text[:body_start] + body * factor + text[end:]
+
+
+def bench(texts, seconds):
+    count = 0
+    chars = sum(len(t) for t in texts)
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for text in texts:
+            parse_roadmap_sections(text)
+        count += len(texts)
+    elapsed = time.perf_counter() - started
+    return count / elapsed, chars / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=1.0, help="time budget per size")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"Corpus: {len(corpus)} roadmaps")
+    print(f"{'size':>6} {'avg chars':>10} {'roadmaps/sec':>14}")
+    for factor in (1, 4, 16):
+        texts = [lengthen(t, factor) for t in corpus]
+        rate, avg_chars = bench(texts, args.seconds)
+        print(f"{'x' + str(factor):>6} {avg_chars:>10.0f} {rate:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# backend/context_builder.py
+"""Turn MemoryManager hits into a small, relevant prompt context.
+
+Retrieved entries are previous roadmap answers (~700 tokens each). Instead of
+prepending all of them, the builder drops hits that are too far away from
+the query, compresses each remaining entry down to its most query-relevant
+sentences, and stops at a hard token budget.
+"""
+import logging
+import math
+import os
+import re
+import threading
+
+try:
+    import tiktoken
+except ImportError:  # optional - fall back to an approximate count
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = {"and", "the", "for", "with", "excluding", "skills", "needed"}
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.encoding_for_model("gpt-4")
+                except Exception as e:  # e.g. BPE file not downloadable offline
+                    logger.warning("tiktoken unavailable, using approximate token counts: %s", e)
+                    _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Number of gpt-4 tokens in text (approximate when tiktoken is missing)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # ~4 characters per token, at least one token per word or punctuation mark
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _WORD.findall(text))
+
+
+def _terms(text: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9+#]+", text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+def compress_entry(text: str, query: str, max_tokens: int) -> str:
+    """Keep the sentences of text that best match query, within max_tokens.
+
+    Sentences are scored by how many query terms they contain (normalized by
+    length so long sentences don't win by default) and re-emitted in their
+    original order. With no overlap at all the leading sentences are kept.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text.strip()
+
+    units = []
+    for line in text.splitlines():
+        for sentence in _SENTENCE_BREAK.split(line.strip()):
+            sentence = sentence.strip().lstrip("-•*# ").strip()
+            if sentence:
+                units.append(sentence)
+
+    query_terms = _terms(query)
+    scored = []
+    for position, sentence in enumerate(units):
+        tokens = count_tokens(sentence)
+        overlap = len(query_terms & _terms(sentence))
+        scored.append((overlap / math.sqrt(tokens), position, sentence, tokens))
+
+    if not any(score for score, *_ in scored):
+        ranked = scored
+    else:
+        ranked = sorted(scored, key=lambda item: (-item[0], item[1]))
+
+    kept, used = [], 0
+    for score, position, sentence, tokens in ranked:
+        if used + tokens > max_tokens:
+            continue
+        kept.append((position, sentence))
+        used += tokens
+    return " ".join(sentence for _, sentence in sorted(kept))
+
+
+class ContextBuilder:
+    """Relevance-filtered, token-budgeted context from memory hits.
+
+    hits are (distance, text) pairs as returned by
+    MemoryManager.retrieve_with_scores, closest first. Distances are squared
+    L2 between normalized embeddings (0 = identical, 2 = unrelated), so
+    max_distance=1.0 keeps hits with cosine similarity >= 0.5.
+    """
+
+    def __init__(self, max_distance=1.0, token_budget=300, entry_tokens=150):
+        self.max_distance = max_distance
+        self.token_budget = token_budget
+        self.entry_tokens = entry_tokens
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.raw_tokens = 0
+        self.context_tokens = 0
+        self.dropped_distance = 0
+        self.dropped_budget = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_distance=float(os.getenv("MEMORY_MAX_DISTANCE", "1.0")),
+            token_budget=int(os.getenv("MEMORY_CONTEXT_TOKENS", "300")),
+            entry_tokens=int(os.getenv("MEMORY_ENTRY_TOKENS", "150")),
+        )
+
+    def build(self, hits: list, query: str):
+        """Return (context text, per-request token stats)"""
+        entries, used = [], 0
+        raw_tokens = dropped_distance = dropped_budget = 0
+        for distance, text in hits:
+            raw_tokens += count_tokens(text)
+            if distance > self.max_distance:
+                dropped_distance += 1
+                continue
+            remaining = self.token_budget - used
+            if remaining <= 0:
+                dropped_budget += 1
+                continue
+            compressed = compress_entry(text, query, min(self.entry_tokens, remaining))
+            tokens = count_tokens(compressed)
+            if not compressed or tokens > remaining:
+                dropped_budget += 1
+                continue
+            entries.append(compressed)
+            used += tokens
+
+        stats = {
+            "context_entries": len(entries),
+            "context_tokens": used,
+            "context_raw_tokens": raw_tokens,
+        }
+        with self._lock:
+            self.requests += 1
+            self.raw_tokens += raw_tokens
+            self.context_tokens += used
+            self.dropped_distance += dropped_distance
+            self.dropped_budget += dropped_budget
+        return "\n".join(entries), stats
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "context_tokens": self.context_tokens,
+                "context_raw_tokens": self.raw_tokens,
+                "tokens_saved": self.raw_tokens - self.context_tokens,
+                "dropped_by_distance": self.dropped_distance,
+                "dropped_by_budget": self.dropped_budget,
+                "max_distance": self.max_distance,
+                "token_budget": self.token_budget,
+            }
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# backend/course_embeddings.py
+"""Precomputed course embeddings, shared by every worker through the page cache.
+
+The catalog's embeddings are written once as a FAISS flat index file named
+after a hash of the course descriptions and the model that embedded them.
+At startup the file is memory-mapped (read-only) when the hash matches, so
+workers on a host share one copy instead of each re-encoding the catalog;
+a changed catalog or model simply misses and builds a new file.
+
+Build it ahead of a deploy (from backend/):
+    python course_embeddings.py [--catalog courses.json] [--out artifacts] [--model NAME]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
+
+from memory_store import MMAP_FLAG, _write_index_atomic
+from vector_index import new_flat_index
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, concurrent builds just race
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def course_key(course) -> str:
+    """Stable identity of a course across catalog edits: its id, else URL, else title"""
+    return str(course.get("id") or course.get("url") or course["title"])
+
+
+def _unique(courses):
+    seen = set()
+    unique = []
+    for course in courses:
+        key = course_key(course)
+        if key in seen:
+            logger.warning("Duplicate course %r in catalog, keeping the first", key)
+            continue
+        seen.add(key)
+        unique.append(course)
+    return unique
+
+
+def load_catalog(path):
+    """The courses in a catalog file, duplicates dropped, as every consumer sees them"""
+    with open(path, "r", encoding="utf-8") as f:
+        return _unique(json.load(f))
+
+
+def catalog_hash(courses, model_id) -> str:
+    """Hash of what the embeddings depend on: the model and each course's text"""
+    payload = json.dumps({"model": model_id, "descs": [c["desc"] for c in courses]},
+                         separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _slug(model_id):
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", model_id)
+
+
+@contextmanager
+def _build_lock(directory):
+    with open(os.path.join(directory, ".build.lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def artifact_path(directory, courses, model_id) -> str:
+    return os.path.join(directory, f"courses.{_slug(model_id)}.{catalog_hash(courses, model_id)[:16]}.faiss")
+
+
+def build_index(courses, encoder):
+    """Flat index of the course descriptions, course i stored under ID i"""
+    # One-off bulk encode: keep the catalog out of the query cache
+    embs = encoder.encode([c["desc"] for c in courses], cache=False).astype("float32")
+    index = new_flat_index(encoder.get_sentence_embedding_dimension())
+    if len(courses):
+        index.add_with_ids(embs, np.arange(len(courses), dtype="int64"))
+    return index
+
+
+def write_artifact(directory, courses, encoder, index=None) -> str:
+    """Write the catalog's artifact file - embedding it unless its `index`
+    (course i under ID i) is passed in - and drop this model's stale ones"""
+    os.makedirs(directory, exist_ok=True)
+    path = artifact_path(directory, courses, encoder.model_id)
+    _write_index_atomic(path, index if index is not None else build_index(courses, encoder))
+    # Workers still mapping an old file keep reading it until they restart
+    for old in glob.glob(os.path.join(directory, f"courses.{_slug(encoder.model_id)}.*.faiss")):
+        if old != path:
+            os.remove(old)
+    logger.info("Wrote %d course embeddings to %s", len(courses), path)
+    return path
+
+
+def save_if_missing(directory, courses, encoder, index):
+    """Store an already embedded catalog as its artifact, unless a worker did first"""
+    os.makedirs(directory, exist_ok=True)
+    with _build_lock(directory):
+        if not os.path.exists(artifact_path(directory, courses, encoder.model_id)):
+            write_artifact(directory, courses, encoder, index)
+
+
+def load_or_build(directory, courses, encoder):
+    """The catalog's flat index, memory-mapped from its artifact; the artifact
+    is built first if it's missing or was made from another catalog/model"""
+    path = artifact_path(directory, courses, encoder.model_id)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        with _build_lock(directory):
+            # Workers starting together: the first builds, the rest find its file
+            if not os.path.exists(path):
+                logger.info("Course embeddings %s missing or stale, building", path)
+                write_artifact(directory, courses, encoder)
+    index = faiss.read_index(path, MMAP_FLAG)
+    if index.ntotal != len(courses) or index.d != encoder.get_sentence_embedding_dimension():
+        raise ValueError(f"Course embedding artifact {path} doesn't match the catalog")
+    return index
+
+
+def main():
+    from course_recommender import COURSES_PATH
+    from embeddings import get_encoder
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--catalog", default=COURSES_PATH)
+    parser.add_argument("--out", default=os.getenv("COURSE_EMBEDDINGS_DIR") or "artifacts")
+    parser.add_argument("--model", default=None, help="default: EMBEDDING_MODEL")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    courses = load_catalog(args.catalog)
+    encoder = get_encoder(args.model)
+    path = artifact_path(args.out, courses, encoder.model_id)
+    if os.path.exists(path):
+        print(f"Up to date: {path}")
+    else:
+        print(f"Wrote {write_artifact(args.out, courses, encoder)}")
+    encoder.close()
+
+
+if __name__ == "__main__":
+    main()
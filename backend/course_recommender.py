@@ -1,33 +1,211 @@
 # backend/course_recommender.py
-from sentence_transformers import SentenceTransformer
-import faiss, numpy as np
+import hashlib
 import json, os
+import logging
+import threading
+import time
+
+import numpy as np
+
+from course_embeddings import (_unique, build_index, course_key, load_catalog, load_or_build,
+                               save_if_missing)
+from embeddings import get_encoder
+from vector_index import AdaptiveIndex, IndexSpec, index_contents, new_flat_index
+
+logger = logging.getLogger(__name__)
 
 THIS_DIR = os.path.dirname(__file__)
 COURSES_PATH = os.path.join(THIS_DIR, "courses.json")
 
+
+def catalog_version(courses) -> str:
+    return hashlib.sha256(json.dumps(courses, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+class _Catalog:
+    """One version of the catalog and its index; replaced whole, never mutated"""
+    __slots__ = ("version", "courses", "ids", "index", "stale")
+
+    def __init__(self, version, courses, ids, index, stale=0):
+        self.version = version
+        self.courses = courses  # FAISS ID -> course, in catalog order
+        self.ids = ids          # course_key -> FAISS ID
+        self.index = index
+        self.stale = stale      # removed courses the approximate index still returns
+
+
 class CourseRecommender:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
-        self.courses = json.load(open(COURSES_PATH, "r", encoding="utf-8"))
-        descs = [c["desc"] for c in self.courses]
-        embs = self.model.encode(descs).astype("float32")
-        self.index = faiss.IndexFlatL2(embs.shape[1])
-        self.index.add(embs)
+    """Nearest courses to a skill-gap query.
+
+    The catalog is reloaded in place when courses.json changes (checked every
+    reload_interval seconds, COURSE_RELOAD_INTERVAL): courses are matched by
+    course_key(), only added or re-described ones are embedded, and a new
+    index with the delta applied is swapped in with the new courses as one
+    reference, so recommend() calls already running finish on the old one.
+    """
+
+    def __init__(self, model_name=None, index_spec=None, model=None, artifact_dir=None,
+                 catalog_path=COURSES_PATH, reload_interval=None):
+        self.model = model if model is not None else get_encoder(model_name)
+        self.catalog_path = catalog_path
+        self.artifact_dir = artifact_dir or os.getenv("COURSE_EMBEDDINGS_DIR") or None
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+        self.last_reload = {}
+
+        self._signature = self._file_signature()
+        courses = load_catalog(self.catalog_path)
+        # With an artifact dir the embeddings are precomputed and memory-mapped
+        # (see course_embeddings.py); otherwise the catalog is encoded here
+        if self.artifact_dir:
+            flat = load_or_build(self.artifact_dir, courses, self.model)
+        else:
+            flat = build_index(courses, self.model)
+        self._next_id = len(courses)
+        # Large catalogs switch to an approximate index built in the background
+        index = AdaptiveIndex(index_spec or IndexSpec.from_env("COURSE"), flat)
+        self._catalog = _Catalog(catalog_version(courses), dict(enumerate(courses)),
+                                 {course_key(c): i for i, c in enumerate(courses)}, index)
+        if index.needs_upgrade():
+            index.upgrade_async()
+
+        if reload_interval is None:
+            reload_interval = float(os.getenv("COURSE_RELOAD_INTERVAL", "30"))
+        self._stop = threading.Event()
+        if reload_interval > 0:
+            threading.Thread(target=self._watch, args=(reload_interval,),
+                             name="course-reload", daemon=True).start()
+
+    @property
+    def courses(self):
+        return list(self._catalog.courses.values())
+
+    @property
+    def version(self):
+        return self._catalog.version
 
     def recommend(self, gap_text, k=5):
+        catalog = self._catalog  # a concurrent reload swaps in a new one, this call keeps its own
         # Guard k so it never exceeds number of courses
-        n = len(self.courses)
+        n = len(catalog.courses)
         if n == 0:
             return []
         k = min(k, n)
 
         emb = self.model.encode([gap_text]).astype("float32")
-        D, I = self.index.search(emb, k)
-
-        # Only keep valid courses
-        recs = []
-        for idx in I[0]:
-            if 0 <= idx < n:
-                recs.append(self.courses[idx])
-        return recs
+        hits = catalog.index.search(emb, k, extra=catalog.stale)
+
+        # Only keep courses of this catalog version
+        return [catalog.courses[i] for _, i in hits if i in catalog.courses][:k]
+
+    # --- hot reload -----------------------------------------------------
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.catalog_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            signature = self._file_signature()
+            if signature is None or signature == self._signature:
+                continue
+            try:
+                self.reload()
+            except Exception:
+                # e.g. caught mid-write; the next change of the file retries
+                logger.exception("Course catalog reload failed, keeping version %s", self.version)
+            self._signature = signature
+
+    def reload(self, courses=None) -> dict:
+        """Apply the catalog file (or `courses`) as a delta on the current one.
+
+        Returns counts of what changed; courses whose text is unchanged keep
+        their embeddings, so only added and re-described ones are encoded.
+        """
+        with self._reload_lock:
+            courses = _unique(courses) if courses is not None else load_catalog(self.catalog_path)
+            started = time.perf_counter()
+            old = self._catalog
+
+            ids, to_embed, updated = {}, [], 0
+            for course in courses:
+                key = course_key(course)
+                course_id = old.ids.get(key)
+                if course_id is None or old.courses[course_id]["desc"] != course["desc"]:
+                    to_embed.append(course)
+                else:
+                    ids[key] = course_id
+                    updated += old.courses[course_id] != course
+            keys = {course_key(c) for c in courses}
+            removed = [i for key, i in old.ids.items() if key not in keys]
+            replaced = [old.ids[course_key(c)] for c in to_embed if course_key(c) in old.ids]
+
+            index = old.index
+            if to_embed or removed or replaced:
+                # A fresh copy without the dropped rows: the current index keeps
+                # serving meanwhile, and may be a read-only memory map anyway
+                flat = new_flat_index(self.model.get_sentence_embedding_dimension())
+                kept_ids, vectors = index_contents(old.index.flat)
+                if vectors is not None:
+                    keep = ~np.isin(kept_ids, removed + replaced)
+                    if keep.any():
+                        flat.add_with_ids(vectors[keep], kept_ids[keep])
+                if to_embed:
+                    # New IDs for re-described courses too: an approximate index
+                    # built earlier still knows the old ones, which are filtered out
+                    new_ids = np.arange(self._next_id, self._next_id + len(to_embed), dtype="int64")
+                    self._next_id += len(to_embed)
+                    embs = self.model.encode([c["desc"] for c in to_embed], cache=False).astype("float32")
+                    flat.add_with_ids(embs, new_ids)
+                    ids.update((course_key(c), int(i)) for c, i in zip(to_embed, new_ids))
+                index = old.index.with_flat(flat)
+
+            by_id = {ids[course_key(c)]: c for c in courses}
+            covered_live = sum(1 for i in by_id if i <= index.covered_max_id)
+            catalog = _Catalog(catalog_version(courses), by_id, ids, index,
+                               stale=max(index.covered - covered_live, 0))
+            self._catalog = catalog
+            if index is not old.index and index.needs_upgrade(catalog.stale):
+                index.upgrade_async()
+
+            self.reloads += 1
+            self.last_reload = {
+                "added": len(to_embed) - len(replaced),
+                "changed": len(replaced) + updated,
+                "removed": len(removed),
+                "embedded": len(to_embed),
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+            logger.info("Reloaded course catalog %s -> %s", old.version, catalog.version,
+                        extra=self.last_reload)
+            if self.artifact_dir and to_embed:
+                self._save_artifact(courses, catalog)
+            return self.last_reload
+
+    def _save_artifact(self, courses, catalog):
+        # Lets the next restart map this version instead of embedding all of it
+        ids, vectors = index_contents(catalog.index.flat)
+        if vectors is None:
+            return
+        row = {int(i): r for r, i in enumerate(ids)}
+        positional = new_flat_index(vectors.shape[1])
+        if courses:
+            order = [row[catalog.ids[course_key(c)]] for c in courses]
+            positional.add_with_ids(vectors[order], np.arange(len(courses), dtype="int64"))
+        save_if_missing(self.artifact_dir, courses, self.model, positional)
+
+    def stats(self) -> dict:
+        catalog = self._catalog
+        return {
+            "catalog_version": catalog.version,
+            "courses": len(catalog.courses),
+            "index": catalog.index.kind,
+            "reloads": self.reloads,
+            "last_reload": self.last_reload,
+        }
+
+    def close(self):
+        self._stop.set()
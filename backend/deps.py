@@ -3,10 +3,13 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlmodel import Session, select
 from models import User
+import logging
 import os
 import secrets
 import sys
 
+logger = logging.getLogger(__name__)
+
 # Generate a secure JWT secret
 def get_jwt_secret():
     # Load environment variables first
@@ -15,14 +18,15 @@ def get_jwt_secret():
     
     secret = os.getenv("JWT_SECRET")
     if not secret or secret.strip() == "" or secret == "CHANGE_ME" or secret == "your_secure_jwt_secret_here":
-        print("⚠️  WARNING: JWT_SECRET not set or using default value!")
-        print(f"📋 Current JWT_SECRET value: '{secret}'")
-        print("🔐 Generating a secure random secret for this session...")
-        print("📝 For production, set JWT_SECRET environment variable to a secure value.")
+        # Never log the value itself
+        logger.warning(
+            "JWT_SECRET not set or using a default value; generated a random secret for this "
+            "session. Set JWT_SECRET to a secure value in production."
+        )
         # Generate a cryptographically secure random secret
         return secrets.token_urlsafe(32)
     
-    print(f"✅ JWT_SECRET loaded successfully (length: {len(secret)})")
+    logger.debug("JWT_SECRET loaded (length: %d)", len(secret))
     return secret
 
 SECRET_KEY = get_jwt_secret()
@@ -0,0 +1,141 @@
+# backend/embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_ARRAY_HEADER = sys.getsizeof(np.empty(0, dtype="float32"))
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Content hash of the text, scoped to the model that embeds it"""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """In-process LRU of float32 embeddings bounded by a byte budget.
+
+    Memory and course queries repeat a lot across users (the same goal with
+    common skill sets), so a hit hands back the stored vector and skips the
+    transformer forward pass. If db_path is given, vectors are also written
+    to a SQLite table so they survive restarts; a miss in memory falls
+    through to that tier and promotes the vector back into the LRU.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, db_path=None):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> read-only float32 vector
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_bytes=int(os.getenv("EMBEDDING_CACHE_BYTES", str(8 * 1024 * 1024))),
+            db_path=os.getenv("EMBEDDING_CACHE_DB") or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self._db is not None
+
+    def get_many(self, keys) -> dict:
+        """key -> vector for the keys that are cached; counts one lookup per key"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                else:
+                    vector = self._get_persistent(key)
+                    if vector is None:
+                        self.misses += 1
+                        continue
+                    self._put_memory(key, vector)
+                    self.persistent_hits += 1
+                self.hits += 1
+                found[key] = vector
+        return found
+
+    def set_many(self, items):
+        """Store (key, vector) pairs"""
+        rows = []
+        with self._lock:
+            for key, vector in items:
+                vector = np.array(vector, dtype="float32")
+                vector.flags.writeable = False
+                self._put_memory(key, vector)
+                rows.append((key, vector.tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)", rows
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM embedding_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.persistent_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _cost(key, vector):
+        # Key string + array header + data (vectors read back from SQLite are views)
+        return sys.getsizeof(key) + _ARRAY_HEADER + vector.nbytes
+
+    def _put_memory(self, key, vector):
+        if key in self._entries:
+            self._bytes -= self._cost(key, self._entries.pop(key))
+        cost = self._cost(key, vector)
+        if cost > self.max_bytes:
+            return
+        self._entries[key] = vector
+        self._bytes += cost
+        while self._bytes > self.max_bytes:
+            old_key, old = self._entries.popitem(last=False)
+            self._bytes -= self._cost(old_key, old)
+            self.evictions += 1
+
+    def _get_persistent(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT vector FROM embedding_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype="float32")
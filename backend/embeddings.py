@@ -0,0 +1,252 @@
+# backend/embeddings.py
+"""Process-wide registry of sentence embedding models.
+
+MemoryManager, ShardedMemory and CourseRecommender all embed text with the
+same model; get_encoder() loads it once per process (EMBEDDING_MODEL,
+default all-MiniLM-L6-v2) and hands every caller the same Encoder. Shared
+encoders look texts up in the process-wide embedding cache first.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, embedding_cache_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+def load_model(model_name=DEFAULT_MODEL, backend="torch"):
+    """sentence-transformers on torch, or the same model on ONNX Runtime
+    (fp32 or int8-quantized) without importing torch at all"""
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        from onnx_encoder import OnnxModel
+        return OnnxModel(model_name, model_dir=os.getenv("EMBEDDING_ONNX_DIR") or None,
+                         quantized=backend == "onnx-int8",
+                         artifact_dir=os.getenv("EMBEDDING_ONNX_ARTIFACTS_DIR") or None)
+    raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {BACKENDS}")
+
+
+def _model_bytes(model):
+    """Parameter + buffer bytes of a torch module, the graph size of an ONNX model"""
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+    except AttributeError:
+        return getattr(model, "model_bytes", None)
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class MicroBatcher:
+    """Coalesces single-text encodes from many threads into model batches.
+
+    submit() queues a text and returns a Future; a background worker flushes
+    the queue as one encode call once max_batch texts are waiting or
+    max_wait seconds after the first of them arrived, whichever comes first.
+    """
+
+    def __init__(self, encode, max_batch=32, max_wait=0.005):
+        self._encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending = []  # (text, future)
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closed = False
+        self.batches = 0
+        self.batched_texts = 0
+        self.largest_batch = 0
+
+    def submit(self, text) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._pending.append((text, future))
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher",
+                                                daemon=True)
+                self._worker.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return  # closed and drained
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self._encode(texts)
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            with self._cond:
+                self.batches += 1
+                self.batched_texts += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "avg_batch": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "queued": len(self._pending),
+            }
+
+    def close(self):
+        """Flush what is queued and stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join()
+
+
+class Encoder:
+    """Thread-safe wrapper around one SentenceTransformer.
+
+    Calls are serialized: torch already spreads a single encode over all
+    cores, so concurrent encodes on one model only fight over its threads.
+    With a cache, only texts it hasn't seen reach the model. With max_batch
+    > 1, small encodes from concurrent callers go through a MicroBatcher and
+    share one forward pass instead of queueing for the model one by one.
+    """
+
+    def __init__(self, model_name=DEFAULT_MODEL, model=None, cache=None, max_batch=1,
+                 max_wait=0.005, backend="torch"):
+        self.model_name = model_name
+        self.backend = backend
+        self.cache = cache if cache is not None and cache.enabled else None
+        self.batcher = MicroBatcher(self._encode_now, max_batch, max_wait) if max_batch > 1 else None
+        start = time.perf_counter()
+        if model is None:
+            model = load_model(model_name, backend)
+        self.model = model
+        self.load_seconds = time.perf_counter() - start
+        self.dim = model.get_sentence_embedding_dimension()
+        self.model_bytes = _model_bytes(model)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.texts = 0
+        self.encode_seconds = 0.0
+
+    @property
+    def model_id(self) -> str:
+        """Names what produced the vectors: backends agree only approximately,
+        so anything derived from them (cache entries, artifacts) is kept apart"""
+        return self.model_name if self.backend == "torch" else f"{self.model_name}:{self.backend}"
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, cache=True, **kwargs) -> np.ndarray:
+        """float32 embeddings of a list of texts, one row per text.
+
+        Pass cache=False for one-off bulk encodes (e.g. a catalog) that would
+        only push the repeated queries out of the cache. Calls with extra
+        model kwargs bypass it too, since those change the vectors.
+        """
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        if not (cache and self.cache is not None and texts) or kwargs:
+            return self._encode(texts, **kwargs)
+
+        keys = [embedding_cache_key(self.model_id, text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self._encode(list(missing.values()))
+            fresh = dict(zip(missing, vectors))
+            self.cache.set_many(fresh.items())
+            found.update(fresh)
+        return np.stack([found[key] for key in keys])
+
+    def _encode(self, texts, **kwargs) -> np.ndarray:
+        if self.batcher is None or kwargs or not texts or len(texts) >= self.batcher.max_batch:
+            return self._encode_now(texts, **kwargs)
+        futures = [self.batcher.submit(text) for text in texts]
+        return np.stack([future.result() for future in futures])
+
+    def _encode_now(self, texts, **kwargs) -> np.ndarray:
+        with self._lock:
+            start = time.perf_counter()
+            out = self.model.encode(texts, **kwargs)
+            self.calls += 1
+            self.texts += len(texts)
+            self.encode_seconds += time.perf_counter() - start
+        return np.asarray(out, dtype="float32")
+
+    def stats(self) -> dict:
+        stats = {
+            "backend": self.backend,
+            "dim": self.dim,
+            "model_bytes": self.model_bytes,
+            "load_seconds": round(self.load_seconds, 3),
+            "encode_calls": self.calls,
+            "texts_encoded": self.texts,
+            "avg_encode_ms": round(self.encode_seconds / self.calls * 1000, 3) if self.calls else 0.0,
+        }
+        if self.batcher is not None:
+            stats.update(self.batcher.stats())
+        return stats
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+cache = EmbeddingCache.from_env()
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def get_encoder(model_name=None) -> Encoder:
+    """The shared Encoder for model_name (default EMBEDDING_MODEL), loaded on first use"""
+    name = model_name or os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL)
+    with _encoders_lock:
+        encoder = _encoders.get(name)
+        if encoder is None:
+            encoder = _encoders[name] = Encoder(
+                name, cache=cache, backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+                max_batch=int(os.getenv("EMBEDDING_BATCH_SIZE", "32")),
+                max_wait=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5")) / 1000,
+            )
+            logger.info("Loaded embedding model %s (%s) in %.1fs (%s bytes)",
+                        name, encoder.backend, encoder.load_seconds, encoder.model_bytes)
+        return encoder
+
+
+def encoder_stats() -> dict:
+    """Per-model footprint and usage of every loaded encoder"""
+    with _encoders_lock:
+        encoders = dict(_encoders)
+    return {name: encoder.stats() for name, encoder in encoders.items()}
@@ -0,0 +1,45 @@
+# backend/lazy.py
+import threading
+import time
+
+
+class Lazy:
+    """Builds an expensive object on first use, exactly once.
+
+    Attribute access is forwarded to the built object, so a module-level
+    `memory = Lazy("memory", ShardedMemory.from_env)` is used exactly like
+    the object itself; the first caller (or warmup) pays for construction
+    and concurrent callers wait for the same instance. A failed build is
+    retried by the next caller.
+    """
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+        self.build_seconds = None
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def get(self):
+        value = self._value
+        if value is None:
+            with self._lock:
+                if self._value is None:
+                    started = time.perf_counter()
+                    self._value = self._factory()
+                    self.build_seconds = time.perf_counter() - started
+                value = self._value
+        return value
+
+    def __getattr__(self, attr):
+        # Only called for attributes Lazy itself doesn't have
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+    def __repr__(self):
+        return f"<Lazy {self._name} {'ready' if self.ready else 'not built'}>"
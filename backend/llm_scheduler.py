@@ -0,0 +1,339 @@
+# backend/llm_scheduler.py
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0   # roadmap generation a user is waiting on
+PRIORITY_RESUME = 1        # resume skill extraction
+PRIORITY_BATCH = 2         # scripts and background jobs
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_RESUME: "resume",
+    PRIORITY_BATCH: "batch",
+}
+
+
+def estimate_tokens(messages, max_tokens=0) -> int:
+    """Rough token estimate for a chat request: ~4 chars per token plus the completion budget"""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + 4 * len(messages) + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to capacity, refills continuously"""
+
+    def __init__(self, capacity, refill_per_second, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._clock = clock
+        self.tokens = float(capacity)
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def try_take(self, amount) -> bool:
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def time_until(self, amount) -> float:
+        """Seconds until amount tokens will be available"""
+        self._refill()
+        missing = amount - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "enqueued_at", "granted", "cancelled",
+                 "event", "loop", "future")
+
+    def __init__(self, priority, seq, tokens, enqueued_at):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued_at = enqueued_at
+        self.granted = False
+        self.cancelled = False
+        self.event = None
+        self.loop = None
+        self.future = None
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        elif self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class OpenAIBackend:
+    """Chat completions against the OpenAI API (clients are created on first use)"""
+
+    def __init__(self, api_key=None):
+        self._api_key = api_key
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self._api_key or os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self._api_key or os.getenv("OPENAI_API_KEY"))
+        return self._async_client
+
+    def create(self, **kwargs):
+        return self.client.chat.completions.create(**kwargs)
+
+    async def acreate(self, **kwargs):
+        return await self.async_client.chat.completions.create(**kwargs)
+
+
+class FakeLLM:
+    """Local stand-in for OpenAIBackend, for tests and offline runs.
+
+    responses is either a fixed string or a callable taking the request
+    kwargs and returning the completion text. Responses mimic the shape of
+    OpenAI objects (choices[0].message.content / choices[0].delta.content);
+    when the request passes tools, the text is returned as the arguments of
+    a function call instead.
+    """
+
+    def __init__(self, responses="", latency=0.0, error=None, chunk_size=16):
+        self.responses = responses
+        self.latency = latency
+        self.error = error
+        self.chunk_size = chunk_size
+        self.calls = []
+
+    def _text(self, kwargs):
+        self.calls.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return self.responses(kwargs) if callable(self.responses) else self.responses
+
+    def create(self, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        text = self._text(kwargs)
+        if kwargs.get("stream"):
+            return iter(self._chunks(text, kwargs))
+        return _completion(text, kwargs)
+
+    async def acreate(self, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        text = self._text(kwargs)
+        if kwargs.get("stream"):
+            return self._astream(text, kwargs)
+        return _completion(text, kwargs)
+
+    async def _astream(self, text, kwargs):
+        for chunk in self._chunks(text, kwargs):
+            await asyncio.sleep(0)
+            yield chunk
+
+    def _chunks(self, text, kwargs):
+        chunks = []
+        for i in range(0, len(text), self.chunk_size):
+            piece = text[i:i + self.chunk_size]
+            if kwargs.get("tools"):
+                call = SimpleNamespace(index=0, function=SimpleNamespace(arguments=piece))
+                delta = SimpleNamespace(content=None, tool_calls=[call])
+            else:
+                delta = SimpleNamespace(content=piece, tool_calls=None)
+            chunks.append(SimpleNamespace(choices=[SimpleNamespace(delta=delta)]))
+        return chunks
+
+
+def _completion(text, kwargs):
+    if kwargs.get("tools"):
+        name = kwargs["tools"][0]["function"]["name"]
+        call = SimpleNamespace(function=SimpleNamespace(name=name, arguments=text))
+        message = SimpleNamespace(content=None, tool_calls=[call])
+    else:
+        message = SimpleNamespace(content=text, tool_calls=None)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+
+class LLMScheduler:
+    """Admission control in front of every chat-completion call.
+
+    Requests are admitted against two token buckets - requests per minute and
+    estimated tokens per minute - so bursts queue up instead of tripping the
+    provider's rate limits. Queued requests are admitted strictly by priority
+    (PRIORITY_INTERACTIVE first), FIFO within a priority. The actual call is
+    delegated to a pluggable backend (OpenAIBackend, or FakeLLM in tests).
+    """
+
+    def __init__(self, requests_per_minute=500, tokens_per_minute=300000,
+                 backend=None, clock=time.monotonic):
+        self.backend = backend or OpenAIBackend()
+        self._clock = clock
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0, clock)
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0, clock)
+        self._queue = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self.max_queue_depth = 0
+        self._admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self._wait_total = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self._wait_max = {name: 0.0 for name in PRIORITY_NAMES.values()}
+
+    @classmethod
+    def from_env(cls, backend=None):
+        return cls(
+            requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "500")),
+            tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "300000")),
+            backend=backend,
+        )
+
+    # --- public API ------------------------------------------------
+
+    def complete(self, priority=PRIORITY_BATCH, **kwargs):
+        """Blocking chat completion, admitted through the scheduler"""
+        self._acquire_sync(priority, self._estimate(kwargs))
+        return self.backend.create(**kwargs)
+
+    async def acomplete(self, priority=PRIORITY_INTERACTIVE, **kwargs):
+        """Async chat completion (pass stream=True for a chunk iterator)"""
+        await self._acquire_async(priority, self._estimate(kwargs))
+        return await self.backend.acreate(**kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_priority = {}
+            for name in PRIORITY_NAMES.values():
+                admitted = self._admitted[name]
+                by_priority[name] = {
+                    "admitted": admitted,
+                    "avg_wait_ms": round(self._wait_total[name] / admitted * 1000, 2) if admitted else 0.0,
+                    "max_wait_ms": round(self._wait_max[name] * 1000, 2),
+                }
+            return {
+                "queue_depth": self._queued,
+                "max_queue_depth": self.max_queue_depth,
+                "requests_available": round(self._requests.tokens, 2),
+                "tokens_available": round(self._tokens.tokens, 2),
+                "by_priority": by_priority,
+            }
+
+    # --- admission -------------------------------------------------
+
+    def _estimate(self, kwargs):
+        tokens = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        # A single oversized request must still be admissible eventually
+        return min(tokens, self._tokens.capacity)
+
+    def _enqueue(self, priority, tokens):
+        waiter = _Waiter(priority, next(self._seq), tokens, self._clock())
+        heapq.heappush(self._queue, waiter)
+        self._queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queued)
+        return waiter
+
+    def _dispatch(self):
+        """Admit queued requests in priority order while the budget allows.
+
+        Must be called with the lock held. Returns how long until the head of
+        the queue could be admitted, or None if the queue is empty.
+        """
+        while self._queue:
+            head = self._queue[0]
+            if head.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            delay = max(self._requests.time_until(1), self._tokens.time_until(head.tokens))
+            if delay > 0:
+                return delay
+            self._requests.try_take(1)
+            self._tokens.try_take(head.tokens)
+            heapq.heappop(self._queue)
+            self._grant(head)
+        return None
+
+    def _grant(self, waiter):
+        waiter.granted = True
+        self._queued -= 1
+        name = PRIORITY_NAMES.get(waiter.priority, "batch")
+        waited = self._clock() - waiter.enqueued_at
+        self._admitted[name] += 1
+        self._wait_total[name] += waited
+        self._wait_max[name] = max(self._wait_max[name], waited)
+        waiter.wake()
+
+    def _cancel(self, waiter):
+        with self._lock:
+            if not waiter.granted and not waiter.cancelled:
+                waiter.cancelled = True
+                self._queued -= 1
+            # Let the next waiter take our place right away
+            self._dispatch()
+
+    def _acquire_sync(self, priority, tokens):
+        with self._lock:
+            waiter = self._enqueue(priority, tokens)
+            waiter.event = threading.Event()
+            delay = self._dispatch()
+        try:
+            while not waiter.granted:
+                waiter.event.wait(timeout=delay)
+                with self._lock:
+                    delay = self._dispatch()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    async def _acquire_async(self, priority, tokens):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = self._enqueue(priority, tokens)
+            waiter.loop = loop
+            waiter.future = loop.create_future()
+            delay = self._dispatch()
+        try:
+            while not waiter.granted:
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    delay = self._dispatch()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+
+# Shared by roadmap_generator and resume_parser
+scheduler = LLMScheduler.from_env()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Load generator for the SkillMap API.
+
+Each virtual user runs the same journey as the frontend: signup -> token ->
+generate_roadmap -> progress save -> a few step toggles, repeated for
+--iterations goals. Latency is recorded per endpoint and reported as
+p50/p95/p99 plus throughput.
+
+Run the backend against the OpenAI stub (see stub_openai.py), then
+(from backend/):
+    python loadtest/loadgen.py --url http://127.0.0.1:8000 --users 20 --iterations 3
+
+or drive the app in-process, without a server (OPENAI_BASE_URL must still
+point at the stub):
+    python loadtest/loadgen.py --in-process --users 20
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+
+import httpx
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+from roadmap_parser import parse_roadmap_sections  # noqa: E402
+
+GOALS = [
+    "Data Scientist", "Frontend Developer", "DevOps Engineer", "Product Manager",
+    "Machine Learning Engineer", "Backend Developer", "Cloud Architect", "QA Engineer",
+]
+SKILLS = ["Python", "SQL", "Git", "JavaScript", "Docker", "Excel", "Linux", "React", "Java", "Statistics"]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0-100) of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Latencies (seconds) and error counts per endpoint"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, seconds, ok):
+        self.latencies.setdefault(endpoint, []).append(seconds)
+        self.errors.setdefault(endpoint, 0)
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, wall_seconds):
+        rows = {}
+        for endpoint, values in self.latencies.items():
+            rows[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(max(values) * 1000, 1),
+                "throughput_rps": round(len(values) / wall_seconds, 2) if wall_seconds else 0.0,
+            }
+        return rows
+
+
+async def _call(client, recorder, endpoint, method, path, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, **kwargs)
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response, ok = None, False
+    recorder.record(endpoint, time.perf_counter() - start, ok)
+    return response if ok else None
+
+
+async def _stream_roadmap(client, recorder, headers, payload):
+    """POST /generate_roadmap/stream; records time to first section and to done"""
+    start = time.perf_counter()
+    first_section = None
+    result = None
+    event = None
+    try:
+        async with client.stream("POST", "/generate_roadmap/stream", json=payload, headers=headers) as response:
+            if response.status_code >= 400:
+                raise httpx.HTTPStatusError("stream failed", request=response.request, response=response)
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    if event == "cv_assessment" and first_section is None:
+                        first_section = time.perf_counter() - start
+                    elif event == "done":
+                        result = json.loads(line[6:])
+                    elif event == "error":
+                        break
+    except httpx.HTTPError:
+        pass
+    if first_section is not None:
+        recorder.record("POST /generate_roadmap/stream (first section)", first_section, True)
+    recorder.record("POST /generate_roadmap/stream", time.perf_counter() - start, result is not None)
+    return result
+
+
+async def user_journey(client, recorder, rng, iterations, toggles, stream, resume_path):
+    username = f"load_{uuid.uuid4().hex[:12]}"
+    password = "loadtest-pass"
+    if await _call(client, recorder, "POST /signup", "POST", "/signup",
+                   data={"username": username, "password": password}) is None:
+        return
+    response = await _call(client, recorder, "POST /token", "POST", "/token",
+                           data={"username": username, "password": password})
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    if resume_path:
+        with open(resume_path, "rb") as f:
+            content = f.read()
+        await _call(client, recorder, "POST /upload_resume", "POST", "/upload_resume", headers=headers,
+                    files={"file": ("resume.pdf", content, "application/pdf")},
+                    data={"goal": rng.choice(GOALS)})
+
+    for _ in range(iterations):
+        goal = rng.choice(GOALS)
+        skills = rng.sample(SKILLS, rng.randint(2, 5))
+        payload = {"skills": skills, "goal": goal}
+        if stream:
+            result = await _stream_roadmap(client, recorder, headers, payload)
+        else:
+            response = await _call(client, recorder, "POST /generate_roadmap", "POST", "/generate_roadmap",
+                                   json=payload, headers=headers)
+            result = response.json() if response is not None else None
+        if result is None:
+            continue
+
+        roadmap = result["roadmap"]
+        sections = parse_roadmap_sections(roadmap)
+        progress = {"goal": goal, "skills": skills, "roadmap": roadmap.split("\n"), **sections}
+        response = await _call(client, recorder, "POST /progress/", "POST", "/progress/",
+                               json=progress, headers=headers)
+        if response is None:
+            continue
+        progress_id = response.json()["id"]
+        steps = max(1, len(sections["learning_path"]))
+        for i in range(toggles):
+            await _call(client, recorder, "PATCH /progress/{id}/step/", "PATCH", f"/progress/{progress_id}/step/",
+                        json={"step_idx": i % steps, "done": i < steps}, headers=headers)
+
+
+async def run(base_url=None, app=None, users=10, iterations=2, toggles=3, stream=False,
+              resume_path=None, seed=None, ramp_up=0.0, timeout=120.0):
+    """Run the journeys of `users` concurrent virtual users; returns (report, wall seconds)"""
+    rng = random.Random(seed)
+    recorder = Recorder()
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout)
+    else:
+        client = httpx.AsyncClient(base_url=base_url, timeout=timeout,
+                                   limits=httpx.Limits(max_connections=users * 2))
+
+    async def delayed(i):
+        if ramp_up:
+            await asyncio.sleep(ramp_up * i / users)
+        await user_journey(client, recorder, random.Random(rng.random()), iterations, toggles,
+                           stream, resume_path)
+
+    start = time.perf_counter()
+    async with client:
+        await asyncio.gather(*(delayed(i) for i in range(users)))
+    wall = time.perf_counter() - start
+    return recorder.report(wall), wall
+
+
+def format_report(report, wall):
+    header = f"{'endpoint':<50} {'reqs':>6} {'errs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>7}"
+    lines = [header, "-" * len(header)]
+    for endpoint, row in report.items():
+        lines.append(
+            f"{endpoint:<50} {row['requests']:>6} {row['errors']:>5} {row['p50_ms']:>9} "
+            f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['throughput_rps']:>7}"
+        )
+    lines.append(f"wall time: {wall:.2f}s")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SkillMap API load generator")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="backend base URL")
+    parser.add_argument("--in-process", action="store_true",
+                        help="drive main.app through an ASGI transport instead of --url")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=2, help="roadmaps generated per user")
+    parser.add_argument("--toggles", type=int, default=3, help="step toggles per saved roadmap")
+    parser.add_argument("--stream", action="store_true", help="use /generate_roadmap/stream")
+    parser.add_argument("--resume", help="PDF to POST to /upload_resume once per user")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="seconds over which users start")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    app = None
+    if args.in_process:
+        from main import app
+    report, wall = asyncio.run(run(
+        base_url=args.url, app=app, users=args.users, iterations=args.iterations, toggles=args.toggles,
+        stream=args.stream, resume_path=args.resume, seed=args.seed, ramp_up=args.ramp_up,
+    ))
+    print(format_report(report, wall))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"wall_seconds": round(wall, 3), "users": args.users, "endpoints": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat-completions API, for load testing.
+
+Serves POST /v1/chat/completions with canned answers: recorded roadmap texts
+from benchmarks/corpus, a skill list for resume-extraction prompts, and
+submit_roadmap function calls when the request passes tools. Latency,
+streaming speed and error rates are configurable so the backend can be
+capacity-tested without the real API.
+
+Usage (from backend/):
+    python loadtest/stub_openai.py --port 8900 --latency lognormal:2.0,0.4 --error-rate 0.01
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=sk-stub uvicorn main:app
+
+Latency specs: fixed:S, uniform:LO,HI, normal:MEAN,STD, lognormal:MEDIAN,SIGMA
+(all in seconds).
+"""
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(THIS_DIR))
+
+from roadmap_parser import parse_roadmap_sections  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(THIS_DIR), "benchmarks", "corpus")
+SKILLS_ANSWER = "Python, SQL, Git, Docker, REST APIs, Pandas, Linux, Communication"
+
+
+class Latency:
+    """Samples delays (seconds) from a distribution given as "name:arg1,arg2" """
+
+    def __init__(self, spec, rng):
+        name, _, args = spec.partition(":")
+        self.name = name
+        self.args = [float(a) for a in args.split(",")] if args else []
+        self.rng = rng
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if name not in expected or len(self.args) != expected[name]:
+            raise ValueError(f"Invalid latency spec {spec!r}")
+
+    def sample(self):
+        a = self.args
+        if self.name == "fixed":
+            value = a[0]
+        elif self.name == "uniform":
+            value = self.rng.uniform(a[0], a[1])
+        elif self.name == "normal":
+            value = self.rng.gauss(a[0], a[1])
+        else:
+            value = self.rng.lognormvariate(math.log(a[0]), a[1])
+        return max(0.0, value)
+
+
+def load_roadmaps():
+    texts = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.txt"))):
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def create_app(latency="fixed:0", ttft="fixed:0", tokens_per_second=0.0,
+               error_rate=0.0, seed=None, roadmaps=None):
+    """Build the stub app.
+
+    latency: total time for a non-streamed completion; ttft: time to first
+    chunk of a streamed one, after which chunks (~4 chars each) arrive at
+    tokens_per_second (0 = as fast as possible). error_rate is the fraction of
+    requests answered with a 429 or 500 instead.
+    """
+    rng = random.Random(seed)
+    latency = Latency(latency, rng)
+    ttft = Latency(ttft, rng)
+    roadmaps = roadmaps or load_roadmaps()
+    next_roadmap = itertools.cycle(roadmaps)
+    ids = itertools.count(1)
+    app = FastAPI(title="OpenAI stub")
+    app.state.stats = {"requests": 0, "streamed": 0, "errors": 0}
+
+    def answer(body):
+        prompt = " ".join(m.get("content") or "" for m in body.get("messages", []))
+        if "resume analyzer" in prompt.lower():
+            return SKILLS_ANSWER, False
+        text = next(next_roadmap)
+        if body.get("tools"):
+            sections = parse_roadmap_sections(text)
+            sections["cv_assessment"] = sections["cv_assessment"] or "Solid foundation for the role."
+            return json.dumps(sections), True
+        return text, False
+
+    def error_response():
+        app.state.stats["errors"] += 1
+        if rng.random() < 0.5:
+            return JSONResponse({"error": {"message": "Rate limit reached (stub)", "type": "requests",
+                                           "code": "rate_limit_exceeded"}}, status_code=429)
+        return JSONResponse({"error": {"message": "The server had an error (stub)", "type": "server_error",
+                                       "code": None}}, status_code=500)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["requests"] += 1
+        if error_rate and rng.random() < error_rate:
+            return error_response()
+
+        text, is_tool_call = answer(body)
+        completion_id = f"chatcmpl-stub{next(ids)}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4")
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency.sample())
+            if is_tool_call:
+                message = {"role": "assistant", "content": None, "tool_calls": [{
+                    "id": f"call_{completion_id}", "type": "function",
+                    "function": {"name": body["tools"][0]["function"]["name"], "arguments": text},
+                }]}
+            else:
+                message = {"role": "assistant", "content": text}
+            prompt_tokens = _estimate_tokens(json.dumps(body.get("messages", [])))
+            completion_tokens = _estimate_tokens(text)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": message,
+                             "finish_reason": "tool_calls" if is_tool_call else "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            }
+
+        app.state.stats["streamed"] += 1
+
+        async def events():
+            def chunk(delta, finish_reason=None):
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                           "model": model,
+                           "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+                return f"data: {json.dumps(payload)}\n\n"
+
+            await asyncio.sleep(ttft.sample())
+            yield chunk({"role": "assistant", "content": None if is_tool_call else ""})
+            for i in range(0, len(text), 4):
+                piece = text[i:i + 4]
+                if is_tool_call:
+                    delta = {"tool_calls": [{"index": 0, "function": {"arguments": piece}}]}
+                    if i == 0:
+                        delta["tool_calls"][0].update(id=f"call_{completion_id}", type="function")
+                        delta["tool_calls"][0]["function"]["name"] = body["tools"][0]["function"]["name"]
+                else:
+                    delta = {"content": piece}
+                yield chunk(delta)
+                if tokens_per_second:
+                    await asyncio.sleep(1.0 / tokens_per_second)
+            yield chunk({}, "tool_calls" if is_tool_call else "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    def stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="lognormal:2.0,0.4",
+                        help="non-streamed completion time (default: %(default)s)")
+    parser.add_argument("--ttft", default="lognormal:0.4,0.3",
+                        help="time to first streamed chunk (default: %(default)s)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0,
+                        help="streamed chunk rate, 0 = unthrottled (default: %(default)s)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of requests answered with 429/500 (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(latency=args.latency, ttft=args.ttft, tokens_per_second=args.tokens_per_second,
+                     error_rate=args.error_rate, seed=args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# backend/log_config.py
+"""Structured logging for the API.
+
+Modules log through ``logging.getLogger(__name__)`` with %-style arguments,
+so messages below the configured level are never formatted. configure_logging()
+installs one stdout handler that writes JSON lines (or plain text for local
+development) tagged with the current request ID.
+
+Hot-path messages can be sampled per call site:
+
+    logger.info("Roadmap cache hit", extra={"sample_rate": 0.01})
+
+keeps roughly one in a hundred of that message.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextvars import ContextVar
+
+# Set by the request-ID middleware in main.py; "-" outside of a request
+request_id_var = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "sample_rate", "taskName"
+}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the request ID of the current context"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fixed fraction of records that carry a sample_rate.
+
+    Sampling is deterministic per call site (logger + message template):
+    with sample_rate=0.1 every tenth occurrence is kept. Records without a
+    sample_rate, and anything at WARNING or above, always pass.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        rate = getattr(record, "sample_rate", None)
+        if rate is None or rate >= 1 or record.levelno >= logging.WARNING:
+            return True
+        if rate <= 0:
+            return False
+        key = (record.name, record.msg)
+        with self._lock:
+            seen = self._counts.get(key, 0)
+            self._counts[key] = seen + 1
+        # Keep the first occurrence, then every 1/rate-th one
+        return seen == 0 or int(seen * rate) != int((seen - 1) * rate)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, request_id, msg + extra fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                  + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_TEXT_FORMAT = "%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s"
+_configured = False
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """Install the stdout handler on the root logger (idempotent unless arguments are given).
+
+    level defaults to LOG_LEVEL (INFO) and fmt to LOG_FORMAT ("json" or "text").
+    """
+    global _configured
+    if _configured and level is None and fmt is None and stream is None:
+        return
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.getenv("LOG_FORMAT", "json")).lower()
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SamplingFilter())
+    handler.setFormatter(JSONFormatter() if fmt == "json" else logging.Formatter(_TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for old in [h for h in root.handlers if getattr(h, "_skillmap", False)]:
+        root.removeHandler(old)
+    handler._skillmap = True
+    root.addHandler(handler)
+    root.setLevel(level)
+    # The OpenAI client logs every HTTP request at INFO through httpx
+    for noisy in ("httpx", "httpcore"):
+        logging.getLogger(noisy).setLevel(max(root.level, logging.WARNING))
+    _configured = True
@@ -6,15 +6,25 @@ os.environ["TOKENIZERS_PARALLELISM"] = "false"
 from dotenv import load_dotenv
 load_dotenv()
 
+# 3) Logging before the other modules log at import time
+from log_config import configure_logging, request_id_var
+configure_logging()
+
+import asyncio
+import json
+import logging
 import tempfile
-import traceback
+import threading
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 from fastapi import (
     FastAPI, HTTPException, Depends,
-    File, UploadFile, Form
+    File, UploadFile, Form, Request, Response
 )
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import (
     OAuth2PasswordBearer, OAuth2PasswordRequestForm
 )
@@ -23,12 +33,21 @@ from passlib.context import CryptContext
 from pydantic import BaseModel
 from sqlmodel import SQLModel, Field, create_engine, Session, select
 
-from roadmap_generator import generate_roadmap
-from resume_parser import extract_text_from_pdf, extract_skills
+from roadmap_generator import (
+    agenerate_roadmap, astream_roadmap, cache as roadmap_cache, inflight as roadmap_inflight,
+    context_builder as memory_context, memory as roadmap_memory, recommender as course_recommender,
+    is_ready as models_ready, warmup as warmup_models, warmup_state
+)
+from resume_parser import extract_text_from_pdf, aextract_skills, inflight as skills_inflight
 from progress import init_db, Progress, ProgressBase, ProgressCreate, ProgressOut
 from progress_api import router as progress_router
 from deps import get_current_user, get_user_by_username, SECRET_KEY, ALGORITHM, oauth2_scheme
 from models import User
+from stage_timer import server_timing_header
+from llm_scheduler import scheduler as llm_scheduler
+from embeddings import cache as embedding_cache, encoder_stats
+
+logger = logging.getLogger(__name__)
 
 # --- Auth setup ----------------------------------------------------
 
@@ -74,11 +93,30 @@ def authenticate_user(username: str, password: str):
 def get_cors_origins():
     origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:5173")
     if origins == "*":
-        print("⚠️  WARNING: CORS_ORIGINS set to wildcard (*) - this is unsafe for production!")
+        logger.warning("CORS_ORIGINS set to wildcard (*) - this is unsafe for production!")
         return ["*"]
     return [origin.strip() for origin in origins.split(",") if origin.strip()]
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load models and indexes in the background on startup (/ready reports when
+    they're warm); on shutdown fold the roadmap memory log into a snapshot and
+    stop the catalog watcher before the worker exits"""
+    if os.getenv("MODEL_WARMUP", "1") != "0":
+        threading.Thread(target=_warmup_in_background, name="warmup", daemon=True).start()
+    yield
+    if roadmap_memory.ready:
+        roadmap_memory.close()
+    if course_recommender.ready:
+        course_recommender.close()
+
+def _warmup_in_background():
+    try:
+        warmup_models()
+    except Exception:
+        pass  # logged by warmup(); /ready keeps returning 503
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=get_cors_origins(),
@@ -87,6 +125,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Tag every log line of a request with its ID (honours an incoming X-Request-ID)"""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Init both DBs
 init_db()
 init_auth_db()
@@ -97,7 +147,7 @@ app.include_router(progress_router, prefix="/progress")
 # --- Data models --------------------------------------------------
 
 from pydantic import validator, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class SkillRequest(BaseModel):
     skills: List[str] = Field(..., min_items=1, max_items=20, description="List of user skills")
@@ -151,6 +201,8 @@ class Course(BaseModel):
 class RoadmapResponse(BaseModel):
     roadmap: str = Field(..., description="Generated roadmap content")
     recommended_courses: List[Course] = Field(default_factory=list, description="Recommended courses")
+    stage_timings: Dict[str, float] = Field(default_factory=dict, description="Per-stage pipeline timings in ms")
+    prompt_tokens: Dict[str, int] = Field(default_factory=dict, description="Prompt and memory-context token counts")
 
 class ResumeUploadResponse(BaseModel):
     extracted_skills: List[str] = Field(..., description="Skills extracted from resume")
@@ -166,27 +218,26 @@ class StatusResponse(BaseModel):
 
 @app.post("/signup", response_model=SuccessResponse)
 def signup(form: OAuth2PasswordRequestForm = Depends()):
-    # Debug logging
-    print(f"🔍 Signup attempt - Username: '{form.username}', Password length: {len(form.password) if form.password else 0}")
+    logger.debug("Signup attempt for %r", form.username)
     
     # Validate username
     if not form.username or len(form.username.strip()) < 3:
-        print(f"❌ Username validation failed: '{form.username}' (length: {len(form.username) if form.username else 0})")
+        logger.info("Signup rejected: username too short")
         raise HTTPException(400, "Username must be at least 3 characters long")
     if len(form.username) > 50:
-        print(f"❌ Username too long: '{form.username}' (length: {len(form.username)})")
+        logger.info("Signup rejected: username too long")
         raise HTTPException(400, "Username must be less than 50 characters")
     
     # Validate password
     if not form.password or len(form.password) < 6:
-        print(f"❌ Password validation failed: length {len(form.password) if form.password else 0}")
+        logger.info("Signup rejected: password too short")
         raise HTTPException(400, "Password must be at least 6 characters long")
     
     if get_user_by_username(form.username.strip()):
-        print(f"❌ Username already exists: '{form.username}'")
+        logger.info("Signup rejected: username %r already exists", form.username)
         raise HTTPException(400, "Username already registered")
     
-    print(f"✅ Creating user: '{form.username}'")
+    logger.info("Creating user %r", form.username)
     create_user(form.username.strip(), form.password)
     return SuccessResponse(message="User created successfully")
 
@@ -211,14 +262,49 @@ def login(form: OAuth2PasswordRequestForm = Depends()):
 def root():
     return StatusResponse(message="SkillMap AI backend is running 🚀")
 
+@app.get("/health")
+def health():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready(response: Response):
+    """Readiness: models and indexes are warm (always ready with MODEL_WARMUP=0)"""
+    warm = models_ready() or os.getenv("MODEL_WARMUP", "1") == "0"
+    if not warm:
+        response.status_code = 503
+    return {"status": "ready" if warm else warmup_state["status"],
+            "error": warmup_state["error"], "warmup_ms": warmup_state["timings"]}
+
+@app.get("/metrics")
+def metrics():
+    """Internal counters for the roadmap pipeline"""
+    return {
+        "roadmap_cache": roadmap_cache.stats(),
+        "roadmap_singleflight": roadmap_inflight.stats(),
+        "skills_singleflight": skills_inflight.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "memory_context": memory_context.stats(),
+        "memory": roadmap_memory.stats() if roadmap_memory.ready else {},
+        "courses": course_recommender.stats() if course_recommender.ready else {},
+        "embedding_models": encoder_stats(),
+        "embedding_cache": embedding_cache.stats(),
+    }
+
 @app.post(
     "/generate_roadmap",
-    response_model=RoadmapResponse,
-    dependencies=[Depends(get_current_user)]
+    response_model=RoadmapResponse
 )
-async def roadmap_endpoint(data: SkillRequest):
+async def roadmap_endpoint(
+    data: SkillRequest,
+    response: Response,
+    current_user: User = Depends(get_current_user)
+):
     try:
-        result = generate_roadmap(data.skills, data.goal)
+        result = await agenerate_roadmap(data.skills, data.goal, user_id=current_user.id)
+        stage_timings = result.get('stage_timings') or {}
+        if stage_timings:
+            response.headers["Server-Timing"] = server_timing_header(stage_timings)
         # Convert courses to proper format
         courses = [Course(title=course.get('title', ''), 
                          description=course.get('description'),
@@ -228,27 +314,53 @@ async def roadmap_endpoint(data: SkillRequest):
         
         return RoadmapResponse(
             roadmap=result.get('roadmap', ''),
-            recommended_courses=courses
+            recommended_courses=courses,
+            stage_timings=stage_timings,
+            prompt_tokens=result.get('prompt_tokens') or {}
         )
     except ValueError as e:
-        print(f"⚠️ Validation error in /generate_roadmap: {str(e)}")
+        logger.warning("Validation error in /generate_roadmap: %s", e)
         raise HTTPException(400, f"Invalid input: {str(e)}")
-    except Exception as e:
-        print(f"❌ Exception in /generate_roadmap: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Exception in /generate_roadmap")
         raise HTTPException(500, "Failed to generate roadmap. Please try again later.")
 
-@app.post(
-    "/upload_resume",
-    dependencies=[Depends(get_current_user)]
-)
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/generate_roadmap/stream")
+async def roadmap_stream_endpoint(data: SkillRequest, current_user: User = Depends(get_current_user)):
+    """Stream the roadmap as Server-Sent Events while the model is generating.
+
+    Events: token, cv_assessment, skill_gaps, learning_path, cv_tips,
+    recommended_courses, done (full result) and error.
+    """
+    async def event_stream():
+        try:
+            async for event, payload in astream_roadmap(data.skills, data.goal, user_id=current_user.id):
+                yield _sse(event, payload)
+        except ValueError as e:
+            logger.warning("Validation error in /generate_roadmap/stream: %s", e)
+            yield _sse("error", {"detail": f"Invalid input: {str(e)}"})
+        except Exception:
+            logger.exception("Exception in /generate_roadmap/stream")
+            yield _sse("error", {"detail": "Failed to generate roadmap. Please try again later."})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/upload_resume")
 async def upload_resume(
     file: UploadFile = File(...),
-    goal: str = Form(...)
+    goal: str = Form(...),
+    current_user: User = Depends(get_current_user)
 ):
     try:
-        print(f"📁 Received file: {file.filename}, content_type: {file.content_type}")
-        print(f"🎯 Goal: {goal}")
+        logger.debug("Received resume %r (%s) for goal %r", file.filename, file.content_type, goal)
         
         # Security validations
         MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB limit
@@ -270,7 +382,7 @@ async def upload_resume(
         if len(content) == 0:
             raise HTTPException(400, "File is empty")
         
-        print(f"📄 File size: {len(content)} bytes (within {MAX_FILE_SIZE // (1024*1024)}MB limit)")
+        logger.debug("Resume size: %d bytes", len(content))
         
         # Save PDF
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
@@ -278,16 +390,14 @@ async def upload_resume(
             tmp_path = tmp.name
 
         # Extract text & skills
-        print("🔍 Extracting text from PDF...")
-        text = extract_text_from_pdf(tmp_path)
-        print(f"📝 Extracted text length: {len(text)} characters")
+        text = await asyncio.to_thread(extract_text_from_pdf, tmp_path)
+        logger.debug("Extracted %d characters from PDF", len(text))
         
-        skills = extract_skills(text)
-        print(f"🛠️ Found skills: {skills}")
+        skills = await aextract_skills(text)
+        logger.info("Found %d skills in resume", len(skills))
 
         # Generate roadmap & courses
-        print("🗺️ Generating roadmap...")
-        result = generate_roadmap(skills, goal)
+        result = await agenerate_roadmap(skills, goal, user_id=current_user.id)
 
         # Clean up temp file
         os.unlink(tmp_path)
@@ -297,9 +407,8 @@ async def upload_resume(
 
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"❌ Exception in /upload_resume: {str(e)}")
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Exception in /upload_resume")
         raise HTTPException(500, "Internal Server Error")
 
 # --- Server startup -------------------------------------------
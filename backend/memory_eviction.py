@@ -0,0 +1,66 @@
+# backend/memory_eviction.py
+"""Eviction policies for a capacity-bounded MemoryManager.
+
+Each policy ranks entries by a key; the entries with the smallest keys are
+evicted first. Ticks come from a counter that advances on every add and
+every retrieval, so ordering doesn't depend on wall-clock resolution.
+"""
+import heapq
+
+
+class EntryStats:
+    """Bookkeeping the policies rank on"""
+    __slots__ = ("inserted", "last_used", "hits")
+
+    def __init__(self, inserted, last_used=None, hits=0):
+        self.inserted = inserted
+        self.last_used = inserted if last_used is None else last_used
+        self.hits = hits
+
+    def touch(self, tick):
+        self.last_used = tick
+        self.hits += 1
+
+
+class EvictionPolicy:
+    name = None
+
+    def key(self, stats: EntryStats):
+        raise NotImplementedError
+
+    def victims(self, entries: dict, count: int) -> list:
+        """IDs of the `count` entries to evict from {id: EntryStats}"""
+        return heapq.nsmallest(count, entries, key=lambda entry_id: self.key(entries[entry_id]))
+
+
+class OldestFirst(EvictionPolicy):
+    name = "fifo"
+
+    def key(self, stats):
+        return stats.inserted
+
+
+class LeastRecentlyUsed(EvictionPolicy):
+    """Least recently retrieved (or added, if never retrieved) goes first"""
+    name = "lru"
+
+    def key(self, stats):
+        return stats.last_used
+
+
+class LowestUtility(EvictionPolicy):
+    """Entries that were retrieved the fewest times go first, oldest first on ties"""
+    name = "utility"
+
+    def key(self, stats):
+        return (stats.hits, stats.last_used)
+
+
+POLICIES = {policy.name: policy for policy in (OldestFirst, LeastRecentlyUsed, LowestUtility)}
+
+
+def get_policy(name: str) -> EvictionPolicy:
+    try:
+        return POLICIES[name.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown eviction policy {name!r}, expected one of {sorted(POLICIES)}") from None
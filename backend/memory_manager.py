@@ -1,31 +1,460 @@
 # backend/memory_manager.py
-from sentence_transformers import SentenceTransformer
+import logging
+import os
+import threading
+import time
+
 import faiss, numpy as np
 
+from embeddings import get_encoder
+from memory_eviction import EntryStats, EvictionPolicy, get_policy
+from memory_meta import MetaStore
+from memory_store import MemoryStore
+from rwlock import ReadWriteLock
+from vector_index import AdaptiveIndex, IndexSpec, index_contents, new_flat_index
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingAdd:
+    """An add waiting for the next group commit"""
+    __slots__ = ("emb", "info", "entry_id", "error")
+
+    def __init__(self, emb, info):
+        self.emb = emb
+        self.info = info
+        self.entry_id = None
+        self.error = None
+
+
 class MemoryManager:
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
-        dim = self.model.get_sentence_embedding_dimension()
-        self.index = faiss.IndexFlatL2(dim)
-        self.meta = []
+    """FAISS memory of previous (prompt -> roadmap) exchanges.
+
+    Entries get stable integer IDs. With a capacity, adding to a full memory
+    first evicts a batch of entries chosen by the eviction policy ("lru",
+    "fifo" or "utility", see memory_eviction) and removes their vectors from
+    the ID-mapped index.
+
+    Without a store_dir everything lives in process memory. With one, adds
+    and removals are appended to an on-disk log and folded into a snapshot
+    every snapshot_every changes (in a background thread) and on close().
+    On startup the last snapshot is memory-mapped (read-only) and the log
+    replayed on top of it: new entries go to a small in-RAM index searched
+    alongside it, and entries evicted from the snapshot are masked until the
+    next snapshot drops them.
+    Infos are kept compressed outside the Python heap (memory_meta.MetaStore)
+    and only decompressed for the entries a search returns.
+
+    Snapshots stay flat (exact); once one holds index_spec.threshold entries,
+    an HNSW or IVF-PQ index over it is built in the background and searched
+    instead (see vector_index.AdaptiveIndex). Without a store there are no
+    snapshots: the log entries are folded into an in-RAM base index whenever
+    a (re)build is due.
+
+    With a dedup_distance, an add that lands within that squared L2 distance
+    of an existing entry doesn't create a row: "refresh" keeps the entry and
+    counts the add as a use of it, "replace" swaps in the new text.
+
+    Thread safety: searches run in parallel under the read side of a
+    reader-writer lock; adds, evictions and the snapshot swap take the write
+    side. Adds are group-committed, so under load many queued adds are
+    published together with one log flush and one index insert.
+    """
+
+    def __init__(self, model_name=None, store_dir=None, snapshot_every=500,
+                 fsync=False, model=None, capacity=0, eviction="lru", evict_batch=None,
+                 index_spec=None, dedup_distance=0.0, dedup="refresh"):
+        self.model = model if model is not None else get_encoder(model_name)
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.base = None                 # memory-mapped snapshot, read-only
+        self.base_index = AdaptiveIndex(index_spec or IndexSpec())  # searches the snapshot
+        self.index = new_flat_index(self.dim)  # entries added since the snapshot
+        self.entry_stats = {}            # id -> EntryStats
+        self.capacity = capacity
+        self.policy = eviction if isinstance(eviction, EvictionPolicy) else get_policy(eviction)
+        self.evict_batch = evict_batch or max(1, capacity // 100)
+        self.snapshot_every = snapshot_every
+        self.evictions = 0
+        if dedup not in ("refresh", "replace"):
+            raise ValueError(f"Unknown dedup mode {dedup!r}, expected 'refresh' or 'replace'")
+        self.dedup_distance = dedup_distance
+        self.dedup = dedup
+        self.duplicates = 0
+        self._tombstones = set()         # snapshot IDs that were removed since
+        self._stale = 0                  # removed IDs still in the approximate index
+        self._base_max_id = -1           # every ID in the snapshot is <= this
+        self._next_id = 0
+        self._tick = 0
+        self._since_snapshot = 0
+        self._snapshotting = False
+        self._removed_during_snapshot = set()
+        self._searches = 0
+        self._search_total = 0.0
+        self._search_max = 0.0
+        self._rw = ReadWriteLock()
+        self._queue = []                 # _PendingAdds for the next group commit
+        self._queue_lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # ticks and counters touched by parallel searches
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_thread = None
+
+        self.store = MemoryStore(store_dir, self.dim, fsync=fsync) if store_dir else None
+        self.meta = MetaStore(store_dir)  # id -> info, compressed on disk
+        if self.store is not None:
+            self._load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            store_dir=os.getenv("MEMORY_STORE_DIR") or None,
+            snapshot_every=int(os.getenv("MEMORY_SNAPSHOT_EVERY", "500")),
+            fsync=os.getenv("MEMORY_FSYNC", "0") == "1",
+            capacity=int(os.getenv("MEMORY_CAPACITY", "5000")),
+            eviction=os.getenv("MEMORY_EVICTION", "lru"),
+            index_spec=IndexSpec.from_env("MEMORY"),
+            dedup_distance=float(os.getenv("MEMORY_DEDUP_DISTANCE", "0.05")),
+            dedup=os.getenv("MEMORY_DEDUP_MODE", "refresh"),
+        )
+
+    def _load(self):
+        base, rows, records = self.store.load()
+        self.base = base
+        self.base_index.replace(base)
+        if rows and "info" not in rows[0]:
+            self.meta.load_snapshot(self.store.blobs_path(), rows)
+        for row in rows:
+            if "info" in row:  # snapshot written before infos moved to blob files
+                self.meta[row["id"]] = row["info"]
+            self.entry_stats[row["id"]] = EntryStats(row["inserted"], row["last_used"], row["hits"])
+        if rows:
+            self._base_max_id = max(row["id"] for row in rows)
+            self._tick = max(max(s.inserted, s.last_used) for s in self.entry_stats.values())
+        self._next_id = self._base_max_id + 1
+
+        for record in records:
+            if record[0] == "add":
+                _, entry_id, emb, info = record
+                self._tick += 1
+                self.index.add_with_ids(emb.reshape(1, -1), np.array([entry_id], dtype="int64"))
+                self.meta[entry_id] = info
+                self.entry_stats[entry_id] = EntryStats(self._tick)
+                self._next_id = max(self._next_id, entry_id + 1)
+            else:
+                self._drop(record[1])
+        self._since_snapshot = len(records)
+        with self._rw.write():
+            if self.capacity and len(self.meta) > self.capacity:
+                self._evict(len(self.meta) - self.capacity)
+            self._refresh_index()
+        logger.info("Loaded %d memory entries from %s (%d log records)",
+                    len(self.meta), self.store.directory, len(records))
+
+    @property
+    def base_count(self):
+        """Live entries in the memory-mapped snapshot"""
+        return self.base.ntotal - len(self._tombstones) if self.base is not None else 0
+
+    def __len__(self):
+        return len(self.meta)
+
+    # --- writes -------------------------------------------------------
 
     def add(self, text, info):
-        emb = self.model.encode([text]).astype("float32")
-        self.index.add(emb)
-        self.meta.append(info)
+        """Add an entry and return its ID.
+
+        The embedding is computed without any lock. Whichever caller gets the
+        write lock first then commits every add queued so far; the others
+        find theirs already done.
+        """
+        # Full prompts are unique: caching them would only evict repeated queries
+        emb = self.model.encode([text], cache=False).astype("float32")
+        pending = _PendingAdd(emb[0], info)
+        with self._queue_lock:
+            self._queue.append(pending)
+        with self._rw.write():
+            if pending.entry_id is None and pending.error is None:
+                with self._queue_lock:
+                    batch, self._queue = self._queue, []
+                self._commit(batch)
+            if self.store is None and self._fold_due():
+                self._fold()
+            due = self.store is not None and self.snapshot_every and self._since_snapshot >= self.snapshot_every
+        if pending.error is not None:
+            raise pending.error
+        if due and self._snapshot_lock.acquire(blocking=False):
+            # Written in the background: this add (and the ones queued behind
+            # it) doesn't wait for the whole store to hit the disk
+            self._snapshot_thread = threading.Thread(target=self._background_snapshot,
+                                                     name="memory-snapshot", daemon=True)
+            self._snapshot_thread.start()
+        return pending.entry_id
+
+    def _commit(self, batch):
+        """Publish queued adds in one go (write lock held)"""
+        try:
+            fresh, refreshed, replaced = self._dedupe(batch)
+            if replaced:
+                if self.store is not None:
+                    self.store.append_remove(replaced)
+                self._drop(replaced)
+                self._since_snapshot += 1
+            overflow = len(self.meta) + len(fresh) - self.capacity
+            if self.capacity and fresh and overflow > 0:
+                self._evict(max(self.evict_batch, overflow))
+            ids = list(range(self._next_id, self._next_id + len(fresh)))
+            if fresh:
+                if self.store is not None:
+                    self.store.append_adds([(i, p.emb, p.info) for i, p in zip(ids, fresh)])
+                self._next_id += len(fresh)
+                self.index.add_with_ids(np.vstack([p.emb for p in fresh]), np.array(ids, dtype="int64"))
+        except BaseException as e:
+            for p in batch:
+                p.error = e
+            raise
+        for entry_id, p in zip(ids, fresh):
+            self._tick += 1
+            self.meta[entry_id] = p.info
+            self.entry_stats[entry_id] = EntryStats(self._tick)
+            p.entry_id = entry_id
+        for p, match in refreshed:
+            if isinstance(match, _PendingAdd):
+                p.entry_id = match.entry_id
+            else:
+                self._tick += 1
+                self.entry_stats[match].touch(self._tick)
+                p.entry_id = match
+        self._since_snapshot += len(fresh)
+        self.duplicates += len(refreshed) + len(replaced)
+
+    def _dedupe(self, batch):
+        """Split a batch into (new rows, (add, duplicate) pairs, IDs to replace).
+
+        Without a dedup_distance everything is new. Otherwise an add within
+        dedup_distance of an entry (or of an earlier add in the batch) only
+        refreshes that entry's recency, or in "replace" mode takes its place
+        with the new text.
+        """
+        if not self.dedup_distance:
+            return batch, [], []
+        fresh, refreshed, replaced = [], [], []
+        for p in batch:
+            match = next((q for q in fresh if float(((q.emb - p.emb) ** 2).sum()) <= self.dedup_distance), None)
+            if match is None:
+                hits = self._search(p.emb.reshape(1, -1), 1)
+                if hits and hits[0][0] <= self.dedup_distance and hits[0][1] not in replaced:
+                    match = hits[0][1]
+            if match is None:
+                fresh.append(p)
+            elif self.dedup == "replace" and not isinstance(match, _PendingAdd):
+                replaced.append(match)
+                fresh.append(p)
+            else:
+                refreshed.append((p, match))
+        return fresh, refreshed, replaced
+
+    def _evict(self, count):
+        """Evict `count` entries picked by the policy (write lock held)"""
+        victims = self.policy.victims(self.entry_stats, count)
+        if not victims:
+            return
+        if self.store is not None:
+            self.store.append_remove(victims)
+        self._drop(victims)
+        self._since_snapshot += 1
+        self.evictions += len(victims)
+        logger.debug("Evicted %d memory entries (%s)", len(victims), self.policy.name)
+
+    def _drop(self, ids):
+        in_delta = [i for i in ids if i > self._base_max_id and i in self.meta]
+        if in_delta:
+            self.index.remove_ids(np.array(in_delta, dtype="int64"))
+        # The snapshot is read-only: mask its entries until the next snapshot
+        self._tombstones.update(i for i in ids if i <= self._base_max_id and i in self.meta)
+        if self._snapshotting:
+            self._removed_during_snapshot.update(i for i in ids if i in self.meta)
+        for i in ids:
+            if i in self.meta:
+                del self.meta[i]  # not pop(): that would decompress the info first
+            self.entry_stats.pop(i, None)
+
+    # --- reads --------------------------------------------------------
 
     def retrieve(self, text, k=3):
+        return [info for _, info in self.retrieve_with_scores(text, k)]
+
+    def retrieve_with_scores(self, text, k=3):
+        """Nearest entries as (squared L2 distance, info) pairs, closest first"""
         # If no memory yet, return empty
         if len(self.meta) == 0:
             return []
 
-        # Perform search
+        # Perform search; any number of searches run at once
         emb = self.model.encode([text]).astype("float32")
-        D, I = self.index.search(emb, min(k, len(self.meta)))
-
-        # Only keep valid indices
-        results = []
-        for idx in I[0]:
-            if idx < len(self.meta):
-                results.append(self.meta[idx])
-        return results
+        with self._rw.read():
+            start = time.perf_counter()
+            results = [(dist, idx, self.meta[idx]) for dist, idx in self._search(emb, k)]
+            with self._stats_lock:
+                self._tick += 1
+                for _, idx, _ in results:
+                    self.entry_stats[idx].touch(self._tick)
+                elapsed = time.perf_counter() - start
+                self._searches += 1
+                self._search_total += elapsed
+                self._search_max = max(self._search_max, elapsed)
+        return [(dist, info) for dist, _, info in results]
+
+    def _search(self, emb, k):
+        """Nearest live (distance, id) pairs of snapshot and log entries, closest first (lock held)"""
+        # Removed entries may still be in the snapshot index: fetch extra, keep live ones
+        hits = [(d, i) for d, i in self.base_index.search(emb, k, extra=len(self._tombstones) + self._stale)
+                if i in self.meta]
+        if self.index.ntotal:
+            D, I = self.index.search(emb, min(k, self.index.ntotal))
+            hits.extend((float(d), int(i)) for d, i in zip(D[0], I[0]) if i >= 0)
+        hits.sort(key=lambda hit: hit[0])
+        return hits[:k]
+
+    def stats(self) -> dict:
+        with self._rw.read(), self._stats_lock:
+            return {
+                "size": len(self.meta),
+                "capacity": self.capacity,
+                "policy": self.policy.name,
+                "evictions": self.evictions,
+                "duplicates": self.duplicates,
+                "snapshot_entries": self.base_count,
+                "log_entries": self.index.ntotal,
+                "tombstones": len(self._tombstones),
+                "index": self.base_index.kind,
+                "index_entries": self.base_index.covered,
+                "index_build_s": round(self.base_index.build_seconds, 3),
+                "searches": self._searches,
+                "avg_search_ms": round(self._search_total / self._searches * 1000, 3) if self._searches else 0.0,
+                "max_search_ms": round(self._search_max * 1000, 3),
+                **self.meta.stats(),
+            }
+
+    # --- persistence --------------------------------------------------
+
+    def snapshot(self, blocking=True):
+        """Fold the log into a new on-disk snapshot (no-op without a store).
+
+        Adds and searches keep running while the snapshot file is written;
+        only the final swap to the new memory-mapped index takes the write lock.
+        """
+        if self.store is None:
+            return False
+        if not self._snapshot_lock.acquire(blocking=blocking):
+            return False  # another snapshot is already running
+        return self._snapshot_locked()
+
+    def _background_snapshot(self):
+        try:
+            self._snapshot_locked()
+        except Exception:
+            logger.exception("Periodic memory snapshot failed, the log keeps every entry")
+
+    def wait_for_snapshot(self, timeout=None):
+        """Wait for a periodic snapshot started by add() to finish"""
+        thread = self._snapshot_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _snapshot_locked(self):
+        """snapshot() with _snapshot_lock already acquired; releases it"""
+        try:
+            with self._rw.write():
+                if self._since_snapshot == 0:
+                    return False
+                base, tombstones = self.base, set(self._tombstones)
+                delta_ids, delta_vectors = index_contents(self.index)
+                rows = []
+                for i in self.meta:
+                    s = self.entry_stats[i]
+                    rows.append({"id": i, "inserted": s.inserted, "last_used": s.last_used, "hits": s.hits})
+                # Blobs are append-only, so these stay readable while adds go on
+                locations = self.meta.locations(row["id"] for row in rows)
+                folded_max_id = self._next_id - 1
+                generation = self.store.rotate()
+                self._snapshotting = True
+                self._removed_during_snapshot = set()
+
+            combined = new_flat_index(self.dim)
+            if base is not None and base.ntotal:
+                base_ids = faiss.vector_to_array(base.id_map)
+                inner = faiss.downcast_index(base.index)
+                step = 65536
+                for start in range(0, base.ntotal, step):
+                    ids = base_ids[start:start + step]
+                    keep = ~np.isin(ids, list(tombstones)) if tombstones else slice(None)
+                    vectors = inner.reconstruct_n(start, len(ids))
+                    combined.add_with_ids(vectors[keep], ids[keep])
+            if delta_vectors is not None:
+                combined.add_with_ids(delta_vectors, delta_ids)
+            new_base = self.store.write_snapshot(
+                generation, combined, rows, (self.meta.raw(location) for location in locations)
+            )
+            del combined
+
+            with self._rw.write():
+                # Entries added or removed while the snapshot was written
+                ids, vectors = index_contents(self.index)
+                index = new_flat_index(self.dim)
+                if ids.size:
+                    newer = ids > folded_max_id
+                    if newer.any():
+                        index.add_with_ids(vectors[newer], ids[newer])
+                self.base, self.index = new_base, index
+                self.base_index.replace(new_base)
+                self.meta.attach_snapshot(self.store.blobs_path(generation), rows)
+                self._base_max_id = max(self._base_max_id, folded_max_id)
+                self._tombstones = {i for i in self._removed_during_snapshot if i <= folded_max_id}
+                self._since_snapshot = index.ntotal + len(self._tombstones)
+                self._refresh_index()
+            logger.info("Memory snapshot %d written (%d entries)", generation, len(rows))
+            return True
+        finally:
+            with self._rw.write():
+                self._snapshotting = False
+                self._removed_during_snapshot = set()
+            self._snapshot_lock.release()
+
+    def _refresh_index(self):
+        """Recount stale entries and start an index (re)build if one is due (lock held)"""
+        max_id = self.base_index.covered_max_id
+        live = sum(1 for i in self.meta if i <= max_id) if max_id >= 0 else 0
+        self._stale = max(0, self.base_index.covered - live)
+        if self.base_index.needs_upgrade(self._stale + len(self._tombstones)):
+            self.base_index.upgrade_async(exclude=self._tombstones)
+
+    def _fold_due(self):
+        """In-memory mode: whether the log entries should join the indexed base (lock held)"""
+        base_index = self.base_index
+        if not self.index.ntotal or base_index.building or not base_index.spec.wants_approximate(len(self.meta)):
+            return False
+        changed = self.index.ntotal + self._stale + len(self._tombstones)
+        return not base_index.covered or changed > base_index.spec.rebuild_fraction * base_index.covered
+
+    def _fold(self):
+        """In-memory mode: merge base and log entries into a new base and
+        start the approximate index build over it, as a snapshot would (lock held)"""
+        combined = new_flat_index(self.dim)
+        for index, removed in ((self.base, self._tombstones), (self.index, ())):
+            if index is None or not index.ntotal:
+                continue
+            ids, vectors = index_contents(index)
+            keep = ~np.isin(ids, list(removed)) if removed else slice(None)
+            combined.add_with_ids(vectors[keep], ids[keep])
+        self.base, self.index = combined, new_flat_index(self.dim)
+        self.base_index.replace(combined)
+        self._base_max_id = self._next_id - 1
+        self._tombstones = set()
+        self._refresh_index()
+
+    def close(self):
+        """Write a final snapshot (after any periodic one still running) and
+        close the log and blob files"""
+        if self.store is not None:
+            self.snapshot()
+            self.store.close()
+        self.meta.close()
@@ -0,0 +1,179 @@
+# backend/memory_meta.py
+"""Compressed, offset-indexed storage for memory entry metadata.
+
+Each entry's info (a full roadmap text) is JSON-encoded, zlib-compressed
+and appended to a file; RAM only holds a table from entry ID to the blob's
+location. Blobs are read through mmap and decompressed on access, so a
+search only ever decompresses the k entries it returns.
+
+There are two blob files: the one written with the current snapshot
+(read-only) and an append-only scratch file for entries added since, which
+is a temporary file rebuilt from the log after a restart. The scratch file
+is only created once something is written to it, so an idle or read-only
+store holds at most the snapshot's one descriptor.
+"""
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import zlib
+from collections.abc import MutableMapping
+
+SNAPSHOT, SCRATCH = 0, 1
+
+
+def _pack(segment, offset, length):
+    # One int per entry: a tuple would cost about three times as much
+    return (offset << 33) | (length << 1) | segment
+
+
+def _unpack(location):
+    return location & 1, location >> 33, (location >> 1) & 0xFFFFFFFF
+
+
+class BlobFile:
+    """Append-only blob file.
+
+    A snapshot's file is read through a memory map, which keeps its own
+    descriptor, so the file itself is closed as soon as it's mapped. The
+    scratch file is read with pread: one descriptor, no remapping as it grows.
+    """
+
+    def __init__(self, file=None, size=0, view=None):
+        self._file = file
+        self.size = size
+        self._view = view
+        self._lock = threading.Lock()  # seek + read/write where there's no pread
+
+    @classmethod
+    def scratch(cls, directory=None):
+        return cls(tempfile.TemporaryFile(dir=directory, buffering=0))
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb", buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        return cls(size=size, view=view)
+
+    def append(self, data: bytes) -> int:
+        with self._lock:
+            offset = self.size
+            self._file.seek(offset)
+            self._file.write(data)
+            self.size += len(data)
+        return offset
+
+    def read(self, offset, length) -> bytes:
+        if self._view is not None:
+            return self._view[offset:offset + length]
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def close(self):
+        # A map still referenced by a concurrent read is closed once released
+        self._view = None
+        if self._file is not None:
+            self._file.close()
+
+
+class MetaStore(MutableMapping):
+    """id -> info mapping backed by compressed blobs (see module docstring)"""
+
+    def __init__(self, directory=None, level=6):
+        self.directory = directory
+        self.level = level
+        self._snapshot = None
+        self._scratch = None  # created on the first write
+        self._locations = {}     # id -> packed (segment, offset, length)
+        self._blob_bytes = 0     # compressed bytes of live entries
+        self._written = 0        # infos stored so far and what they cost as
+        self._written_inline = 0  # Python objects, for stats()
+
+    def _file(self, segment):
+        return self._snapshot if segment == SNAPSHOT else self._scratch
+
+    def __getitem__(self, entry_id):
+        return json.loads(zlib.decompress(self.raw(self._locations[entry_id])))
+
+    def __setitem__(self, entry_id, info):
+        if entry_id in self._locations:
+            del self[entry_id]
+        data = zlib.compress(json.dumps(info).encode("utf-8"), self.level)
+        if self._scratch is None:
+            self._scratch = BlobFile.scratch(self.directory)
+        self._locations[entry_id] = _pack(SCRATCH, self._scratch.append(data), len(data))
+        self._blob_bytes += len(data)
+        self._written += 1
+        self._written_inline += sys.getsizeof(info)
+
+    def __delitem__(self, entry_id):
+        self._blob_bytes -= _unpack(self._locations.pop(entry_id))[2]
+
+    def __contains__(self, entry_id):
+        return entry_id in self._locations
+
+    def __iter__(self):
+        return iter(self._locations)
+
+    def __len__(self):
+        return len(self._locations)
+
+    # --- snapshots ----------------------------------------------------
+
+    def locations(self, ids):
+        """Current blob locations of `ids`, to be read with raw() while adds go on"""
+        return [self._locations[i] for i in ids]
+
+    def raw(self, location) -> bytes:
+        """Compressed blob at a location"""
+        segment, offset, length = _unpack(location)
+        return self._file(segment).read(offset, length)
+
+    def attach_snapshot(self, path, rows):
+        """Serve the entries in `rows` ({"id", "offset", "length"}) from the
+        snapshot blob file at `path`; the rest move to a fresh scratch file"""
+        snapshot = BlobFile.open(path)
+        in_snapshot = {row["id"]: _pack(SNAPSHOT, row["offset"], row["length"]) for row in rows}
+        scratch = None
+        locations = {}
+        for entry_id, location in self._locations.items():
+            if entry_id in in_snapshot:
+                locations[entry_id] = in_snapshot[entry_id]
+            else:
+                data = self.raw(location)
+                if scratch is None:
+                    scratch = BlobFile.scratch(self.directory)
+                locations[entry_id] = _pack(SCRATCH, scratch.append(data), len(data))
+        for old in (self._snapshot, self._scratch):
+            if old is not None:
+                old.close()
+        self._snapshot, self._scratch, self._locations = snapshot, scratch, locations
+
+    def load_snapshot(self, path, rows):
+        """Start out with the entries of a snapshot blob file written by MemoryStore"""
+        self._snapshot = BlobFile.open(path)
+        for row in rows:
+            self._locations[row["id"]] = _pack(SNAPSHOT, row["offset"], row["length"])
+            self._blob_bytes += row["length"]
+
+    def stats(self) -> dict:
+        """Bytes per entry: compressed on disk, offset table in RAM, and what the
+        infos stored by this process would take as Python objects"""
+        n = len(self._locations)
+        table = sys.getsizeof(self._locations) + 32 * n  # dict slots + one int per entry
+        return {
+            "meta_disk_bytes_per_entry": round(self._blob_bytes / n) if n else 0,
+            "meta_ram_bytes_per_entry": round(table / n) if n else 0,
+            "meta_inline_bytes_per_entry": round(self._written_inline / self._written) if self._written else 0,
+        }
+
+    def close(self):
+        for blobs in (self._snapshot, self._scratch):
+            if blobs is not None:
+                blobs.close()
@@ -0,0 +1,269 @@
+# backend/memory_shards.py
+"""Roadmap memory sharded by user (and optionally by goal category).
+
+Each shard is an independent MemoryManager, so a lookup only searches the
+requesting user's own history and nobody else's roadmaps end up in their
+prompt. Shards are created on first write and loaded lazily, and the least
+recently used shards beyond max_loaded are closed: with a store_dir they
+are snapshotted and loaded again (memory-mapped) when the user comes back,
+without one they are dropped.
+
+Every loaded shard holds open files (up to FDS_PER_SHARD: its log, the
+snapshot's blob map and the scratch blob file), so from_env() caps
+max_loaded to a share of the process's file descriptor limit.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows: no RLIMIT_NOFILE, trust MEMORY_MAX_LOADED_SHARDS
+    resource = None
+
+from embeddings import get_encoder
+from memory_manager import MemoryManager
+from vector_index import IndexSpec
+
+logger = logging.getLogger(__name__)
+
+ANONYMOUS = "anonymous"
+FDS_PER_SHARD = 3
+FD_SHARE = 0.5  # of RLIMIT_NOFILE; sockets, SQLite and the rest need the others
+_META_KEYS = ("meta_disk_bytes_per_entry", "meta_ram_bytes_per_entry", "meta_inline_bytes_per_entry")
+_SENIORITY = {"junior", "senior", "lead", "principal", "staff", "entry", "level", "mid", "intern"}
+
+
+def goal_category(goal: str) -> str:
+    """Coarse goal bucket: lowercase words without seniority qualifiers"""
+    words = [w for w in re.findall(r"[a-z0-9+#]+", goal.lower()) if w not in _SENIORITY]
+    return "-".join(words) or "general"
+
+
+def shard_key(user_id, goal=None, by_goal=False) -> str:
+    user = str(user_id) if user_id is not None else ANONYMOUS
+    return f"{user}/{goal_category(goal)}" if by_goal and goal else user
+
+
+def max_shards_for_fd_limit(default=None):
+    """How many shards fit in FD_SHARE of the soft open-files limit"""
+    if resource is None:
+        return default
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return default
+    return max(int(soft * FD_SHARE) // FDS_PER_SHARD, 1)
+
+
+def _shard_dir(root, key):
+    # Usernames are user input: hash them into a safe, fixed-length directory name
+    return os.path.join(root, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32])
+
+
+class _Slot:
+    """A shard in the map: loading until `ready` is set, then `memory` (or
+    `error`); `users` counts the calls working on it right now"""
+    __slots__ = ("memory", "error", "ready", "users", "evicted")
+
+    def __init__(self):
+        self.memory = None
+        self.error = None
+        self.ready = threading.Event()
+        self.users = 0
+        self.evicted = False
+
+
+class ShardedMemory:
+    """Lazily loaded, independently evictable MemoryManager shards.
+
+    All shards share one embedding model (the process-wide encoder from
+    embeddings.py by default). Without a store_dir shards only live in
+    memory, so a shard paged out of max_loaded loses its entries.
+
+    A shard is loaded outside the map lock, so one user's cold load doesn't
+    hold up everyone else's lookups. A paged-out shard is closed only once
+    the last call using it is done, and its key isn't reopened until that
+    close (the final snapshot) has finished.
+    """
+
+    def __init__(self, store_dir=None, max_loaded=128, by_goal=False, model=None,
+                 model_name=None, **shard_kwargs):
+        self.model = model if model is not None else get_encoder(model_name)
+        self.store_dir = store_dir
+        self.max_loaded = max_loaded
+        self.by_goal = by_goal
+        self.shard_kwargs = shard_kwargs
+        self._shards = OrderedDict()  # key -> _Slot, least recently used first
+        self._closing = {}            # key -> Event set once its old shard is closed
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.page_outs = 0
+
+    @classmethod
+    def from_env(cls):
+        max_loaded = int(os.getenv("MEMORY_MAX_LOADED_SHARDS", "128"))
+        fd_cap = max_shards_for_fd_limit(max_loaded)
+        if fd_cap < max_loaded:
+            logger.warning("MEMORY_MAX_LOADED_SHARDS=%d needs more file descriptors than the "
+                           "open-files limit leaves, using %d", max_loaded, fd_cap)
+            max_loaded = fd_cap
+        return cls(
+            store_dir=os.getenv("MEMORY_STORE_DIR") or None,
+            max_loaded=max_loaded,
+            by_goal=os.getenv("MEMORY_SHARD_BY_GOAL", "0") == "1",
+            snapshot_every=int(os.getenv("MEMORY_SNAPSHOT_EVERY", "500")),
+            fsync=os.getenv("MEMORY_FSYNC", "0") == "1",
+            capacity=int(os.getenv("MEMORY_CAPACITY", "500")),
+            eviction=os.getenv("MEMORY_EVICTION", "lru"),
+            index_spec=IndexSpec.from_env("MEMORY"),
+            dedup_distance=float(os.getenv("MEMORY_DEDUP_DISTANCE", "0.05")),
+            dedup=os.getenv("MEMORY_DEDUP_MODE", "refresh"),
+        )
+
+    def shard(self, user_id, goal=None, create=True):
+        """The shard for user_id (and goal), loading it if needed; None if it doesn't exist.
+
+        For inspection only: the shard may be paged out as soon as this returns.
+        """
+        with self._use(user_id, goal, create) as memory:
+            return memory
+
+    @contextmanager
+    def _use(self, user_id, goal=None, create=True):
+        """Hold the shard (or None) loaded and open for the duration of the block"""
+        key = shard_key(user_id, goal, self.by_goal)
+        slot = self._acquire(key, create)
+        try:
+            yield slot.memory if slot is not None else None
+        finally:
+            if slot is not None:
+                self._release(key, slot)
+
+    def _acquire(self, key, create):
+        while True:
+            wait_for = None
+            with self._lock:
+                slot = self._shards.get(key)
+                if slot is not None:
+                    if slot.ready.is_set():
+                        slot.users += 1
+                        self._shards.move_to_end(key)
+                        return slot
+                    wait_for = slot.ready          # someone else is loading it
+                elif key in self._closing:
+                    wait_for = self._closing[key]  # its old instance is still snapshotting
+                else:
+                    directory = _shard_dir(self.store_dir, key) if self.store_dir else None
+                    if not create and not (directory and os.path.isdir(directory)):
+                        return None
+                    slot = self._shards[key] = _Slot()
+                    slot.users = 1
+            if wait_for is not None:
+                wait_for.wait()
+                continue
+            return self._load(key, slot, directory)
+
+    def _load(self, key, slot, directory):
+        try:
+            slot.memory = MemoryManager(model=self.model, store_dir=directory, **self.shard_kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._shards[key]
+            slot.error = e
+            slot.ready.set()
+            raise
+        slot.ready.set()
+        with self._lock:
+            self.loads += 1
+            to_close = self._page_out()
+        self._close_all(to_close)
+        return slot
+
+    def _page_out(self):
+        """Drop least recently used shards beyond max_loaded from the map (under
+        the lock); returns those nobody is using, to be closed right away"""
+        loaded = [key for key, slot in self._shards.items() if slot.ready.is_set()]
+        to_close = []
+        for key in loaded[:max(len(loaded) - self.max_loaded, 0)]:
+            slot = self._shards.pop(key)
+            slot.evicted = True
+            self._closing[key] = threading.Event()
+            if slot.users == 0:
+                to_close.append((key, slot))
+        return to_close
+
+    def _release(self, key, slot):
+        with self._lock:
+            slot.users -= 1
+            last = slot.evicted and slot.users == 0
+        if last:
+            self._close_all([(key, slot)])
+
+    def _close_all(self, slots):
+        # Snapshot cold shards outside the map lock
+        for key, slot in slots:
+            try:
+                slot.memory.close()
+                logger.debug("Paged out memory shard %s", key)
+            finally:
+                with self._lock:
+                    self.page_outs += 1
+                    done = self._closing.pop(key)
+                done.set()
+
+    def add(self, user_id, text, info, goal=None):
+        with self._use(user_id, goal) as memory:
+            return memory.add(text, info)
+
+    def retrieve_with_scores(self, user_id, text, k=3, goal=None):
+        with self._use(user_id, goal, create=False) as memory:
+            return memory.retrieve_with_scores(text, k) if memory is not None else []
+
+    def retrieve(self, user_id, text, k=3, goal=None):
+        return [info for _, info in self.retrieve_with_scores(user_id, text, k, goal)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            shards = [slot.memory for slot in self._shards.values() if slot.memory is not None]
+            stats = {
+                "loaded_shards": len(shards),
+                "max_loaded_shards": self.max_loaded,
+                "shard_loads": self.loads,
+                "shard_page_outs": self.page_outs,
+            }
+        per_shard = [shard.stats() for shard in shards]
+        sizes = [s["size"] for s in per_shard]
+        entries = sum(sizes)
+        searches = sum(s["searches"] for s in per_shard)
+        stats["loaded_entries"] = entries
+        stats["largest_shard"] = max(sizes, default=0)
+        # 0 means unbounded, so one unbounded shard makes the total unbounded
+        capacities = [s["capacity"] for s in per_shard]
+        stats["capacity"] = 0 if 0 in capacities else sum(capacities)
+        stats["evictions"] = sum(s["evictions"] for s in per_shard)
+        stats["duplicates"] = sum(s["duplicates"] for s in per_shard)
+        stats["searches"] = searches
+        total_ms = sum(s["avg_search_ms"] * s["searches"] for s in per_shard)
+        stats["avg_search_ms"] = round(total_ms / searches, 3) if searches else 0.0
+        stats["max_search_ms"] = max((s["max_search_ms"] for s in per_shard), default=0.0)
+        for key in _META_KEYS:
+            # Weighted by entries, so a few tiny shards don't skew the average
+            weighted = sum(s[key] * s["size"] for s in per_shard)
+            stats[key] = round(weighted / entries) if entries else 0
+            stats[f"max_{key}"] = max((s[key] for s in per_shard), default=0)
+        return stats
+
+    def close(self):
+        """Snapshot and close every loaded shard (call once requests have stopped)"""
+        with self._lock:
+            shards = [slot.memory for slot in self._shards.values() if slot.memory is not None]
+            self._shards.clear()
+            closing = list(self._closing.values())
+        for shard in shards:
+            shard.close()
+        for done in closing:
+            done.wait()
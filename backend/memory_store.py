@@ -0,0 +1,244 @@
+# backend/memory_store.py
+"""On-disk persistence for MemoryManager.
+
+Layout of the store directory:
+
+    MANIFEST               {"generation": g, "count": n, "dim": d} - the commit point
+    index.<g>.faiss        FAISS IndexIDMap2 snapshot with n vectors
+    meta.<g>.json          eviction stats and blob offsets of those n entries
+    blobs.<g>.dat          their compressed infos, back to back (see memory_meta)
+    wal.<g>.log            adds and removals logged after snapshot g was started
+
+A snapshot is written to temporary files, fsynced and renamed into place, and
+only becomes visible when MANIFEST is atomically replaced. Log records are
+length + CRC32 framed, so a torn write at the tail is detected and cut off on
+the next load. Either way the store always loads the last complete snapshot
+plus every intact log record after it.
+"""
+import glob
+import json
+import logging
+import os
+import re
+import struct
+import zlib
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "MANIFEST"
+_HEADER = struct.Struct("<II")  # payload length, crc32(payload)
+_ID = struct.Struct("<q")
+
+# Log record kinds (first payload byte)
+ADD = b"A"      # id, embedding, JSON info
+REMOVE = b"R"   # int64 ids
+
+# Map the snapshot in place when this FAISS build supports it (read-only,
+# shared through the page cache); otherwise fall back to a mapped read
+MMAP_FLAG = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # e.g. directories can't be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _write_index_atomic(path, index):
+    # Written straight to disk, no serialized copy of a large index in RAM
+    tmp = f"{path}.tmp"
+    faiss.write_index(index, tmp)
+    with open(tmp, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _generation(path):
+    match = re.search(r"\.(\d+)\.", os.path.basename(path))
+    return int(match.group(1)) if match else -1
+
+
+class MemoryStore:
+    """Snapshot + append-only log files for one MemoryManager"""
+
+    def __init__(self, directory, dim, fsync=False):
+        self.directory = directory
+        self.dim = dim
+        self.fsync = fsync
+        self.generation = 0
+        self._log = None
+        self._log_generation = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # --- loading ------------------------------------------------------
+
+    def load(self):
+        """Return (snapshot index or None, snapshot meta, log records).
+
+        Log records are ("add", id, embedding, info) and ("remove", ids) tuples
+        in the order they were written.
+        """
+        for tmp in glob.glob(self._path("*.tmp")):
+            os.remove(tmp)
+
+        base, meta = None, []
+        manifest_path = self._path(MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest["dim"] != self.dim:
+                raise ValueError(f"Memory store has dim {manifest['dim']}, model has {self.dim}")
+            self.generation = manifest["generation"]
+            base = faiss.read_index(self._path(f"index.{self.generation}.faiss"), MMAP_FLAG)
+            with open(self._path(f"meta.{self.generation}.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if base.ntotal != manifest["count"] or len(meta) != manifest["count"]:
+                raise ValueError("Memory store snapshot does not match its manifest")
+
+        # Files of a snapshot that never got committed
+        for path in (glob.glob(self._path("index.*.faiss")) + glob.glob(self._path("meta.*.json"))
+                     + glob.glob(self._path("blobs.*.dat"))):
+            if _generation(path) != self.generation:
+                os.remove(path)
+
+        records = []
+        logs = sorted(
+            (p for p in glob.glob(self._path("wal.*.log")) if _generation(p) >= self.generation),
+            key=_generation,
+        )
+        for path in logs:
+            records.extend(self._replay(path))
+        for path in glob.glob(self._path("wal.*.log")):
+            if _generation(path) < self.generation:
+                os.remove(path)
+
+        self._open_log(max([self.generation] + [_generation(p) for p in logs]))
+        return base, meta, records
+
+    def _replay(self, path):
+        records = []
+        with open(path, "r+b") as f:
+            data = f.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, crc = _HEADER.unpack_from(data, offset)
+                payload = data[offset + _HEADER.size:offset + _HEADER.size + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                record = self._decode(payload)
+                if record is None:
+                    break
+                records.append(record)
+                offset += _HEADER.size + length
+            if offset < len(data):
+                logger.warning("Truncating torn memory log %s at byte %d of %d", path, offset, len(data))
+                f.truncate(offset)
+        return records
+
+    def _decode(self, payload):
+        kind, body = payload[:1], payload[1:]
+        if kind == ADD and len(body) >= _ID.size + self.dim * 4:
+            (entry_id,) = _ID.unpack_from(body)
+            end = _ID.size + self.dim * 4
+            emb = np.frombuffer(body[_ID.size:end], dtype="float32")
+            return ("add", entry_id, emb, json.loads(body[end:].decode("utf-8")))
+        if kind == REMOVE and len(body) % _ID.size == 0:
+            return ("remove", np.frombuffer(body, dtype="int64").tolist())
+        return None
+
+    # --- appending ----------------------------------------------------
+
+    def _open_log(self, generation):
+        # The file itself is opened by the first append: a store that is only
+        # read (e.g. a shard loaded for a lookup) holds no log descriptor
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._log_generation = generation
+
+    def append_add(self, entry_id, emb, info):
+        self.append_adds([(entry_id, emb, info)])
+
+    def append_adds(self, entries):
+        """Log (id, embedding, info) adds with a single flush (and fsync)"""
+        self._append(*(ADD + _ID.pack(entry_id) + np.asarray(emb, dtype="float32").tobytes()
+                       + json.dumps(info).encode("utf-8") for entry_id, emb, info in entries))
+
+    def append_remove(self, ids):
+        self._append(REMOVE + np.asarray(ids, dtype="int64").tobytes())
+
+    def _append(self, *payloads):
+        if self._log is None:
+            self._log = open(self._path(f"wal.{self._log_generation}.log"), "ab")
+        self._log.write(b"".join(_HEADER.pack(len(p), zlib.crc32(p)) + p for p in payloads))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+    def rotate(self):
+        """Start a new log for entries that won't be in the snapshot being written"""
+        generation = self._log_generation + 1
+        self._open_log(generation)
+        return generation
+
+    # --- snapshots ----------------------------------------------------
+
+    def blobs_path(self, generation=None):
+        return self._path(f"blobs.{self.generation if generation is None else generation}.dat")
+
+    def write_snapshot(self, generation, index, meta, blobs):
+        """Persist index + meta + blobs (one compressed info per meta row) as
+        `generation` and commit it via the manifest; adds "offset" and
+        "length" to the meta rows"""
+        index_path = self._path(f"index.{generation}.faiss")
+        meta_path = self._path(f"meta.{generation}.json")
+        _write_index_atomic(index_path, index)
+        blobs_tmp = f"{self.blobs_path(generation)}.tmp"
+        with open(blobs_tmp, "wb") as f:
+            offset = 0
+            for row, data in zip(meta, blobs):
+                f.write(data)
+                row["offset"], row["length"] = offset, len(data)
+                offset += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(blobs_tmp, self.blobs_path(generation))
+        _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        manifest = {"generation": generation, "count": index.ntotal, "dim": self.dim}
+        _write_atomic(self._path(MANIFEST), json.dumps(manifest).encode("utf-8"))
+        _fsync_dir(self.directory)
+
+        previous = self.generation
+        self.generation = generation
+        for name in (f"index.{previous}.faiss", f"meta.{previous}.json", f"blobs.{previous}.dat"):
+            if previous != generation and os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        for path in glob.glob(self._path("wal.*.log")):
+            if _generation(path) < generation:
+                os.remove(path)
+        return faiss.read_index(index_path, MMAP_FLAG)
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -6,9 +6,10 @@ This script will parse the existing roadmap text and convert it to the new struc
 
 import sqlite3
 import json
-import re
 from pathlib import Path
 
+from roadmap_parser import parse_roadmap_sections
+
 def parse_roadmap_text(roadmap_text):
     """Parse roadmap text into structured sections."""
     if not roadmap_text or not isinstance(roadmap_text, list):
@@ -22,48 +23,16 @@ def parse_roadmap_text(roadmap_text):
     # Convert roadmap array to text for parsing
     full_text = '\n'.join(roadmap_text) if isinstance(roadmap_text, list) else str(roadmap_text)
     
-    # Initialize sections
-    cv_assessment = ''
-    skill_gaps = []
-    learning_path = []
-    cv_tips = []
-    
-    # Try to extract sections based on common patterns
+    # Parse with the same parser used for freshly generated roadmaps
+    sections = parse_roadmap_sections(full_text)
     lines = full_text.split('\n')
-    current_section = None
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Detect section headers
-        if any(keyword in line.lower() for keyword in ['assessment', 'overview', 'analysis']):
-            current_section = 'cv_assessment'
-            if not cv_assessment:
-                cv_assessment = line
-        elif any(keyword in line.lower() for keyword in ['skill', 'gap', 'missing', 'need']):
-            current_section = 'skill_gaps'
-        elif any(keyword in line.lower() for keyword in ['learning', 'path', 'step', 'course', 'study']):
-            current_section = 'learning_path'
-        elif any(keyword in line.lower() for keyword in ['tip', 'advice', 'recommendation', 'improve']):
-            current_section = 'cv_tips'
-        else:
-            # Add content to current section
-            if current_section == 'cv_assessment' and line:
-                if cv_assessment:
-                    cv_assessment += ' ' + line
-                else:
-                    cv_assessment = line
-            elif current_section == 'skill_gaps' and line:
-                skill_gaps.append(line)
-            elif current_section == 'learning_path' and line:
-                learning_path.append(line)
-            elif current_section == 'cv_tips' and line:
-                cv_tips.append(line)
-    
+    cv_assessment = sections['cv_assessment']
+    skill_gaps = sections['skill_gaps']
+    learning_path = sections['learning_path']
+    cv_tips = sections['cv_tips']
+
     # If no structured sections found, create default ones from the roadmap
-    if not cv_assessment and not skill_gaps and not learning_path and not cv_tips:
+    if not skill_gaps and not learning_path and not cv_tips:
         cv_assessment = "Based on your profile, here's an assessment of your current skills and experience."
         
         # Extract potential skills and learning items
@@ -0,0 +1,131 @@
+# backend/onnx_encoder.py
+"""Sentence embeddings on ONNX Runtime, without torch.
+
+Runs the ONNX export of a mean-pooled sentence-transformers model (the
+all-MiniLM-L6-v2 hub repo ships one under onnx/) with the fast tokenizer
+from `tokenizers`, so neither torch nor sentence-transformers is imported.
+With quantized=True the graph's weights are converted to int8 once
+(onnxruntime dynamic quantization) and the quantized file is reused; it is
+written to an artifacts directory, never into the Hugging Face cache.
+
+Needs `onnxruntime` (optional, see requirements.txt).
+"""
+import json
+import logging
+import os
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ONNX_FILE = os.path.join("onnx", "model.onnx")
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+
+
+def _hub_repo(model_name):
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def _download(model_name):
+    from huggingface_hub import snapshot_download
+    return snapshot_download(
+        _hub_repo(model_name),
+        allow_patterns=[ONNX_FILE, "tokenizer.json", "sentence_bert_config.json", "modules.json"],
+    )
+
+
+def mean_pool(hidden, attention_mask, normalize=True) -> np.ndarray:
+    """Average of the token vectors that aren't padding, L2-normalized"""
+    mask = attention_mask[..., None].astype("float32")
+    pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+    if normalize:
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    return pooled.astype("float32")
+
+
+def _normalizes(model_dir):
+    # sentence-transformers models list a Normalize module when their output is unit length
+    path = os.path.join(model_dir, "modules.json")
+    if not os.path.exists(path):
+        return True
+    with open(path, encoding="utf-8") as f:
+        return any(module.get("type", "").endswith("Normalize") for module in json.load(f))
+
+
+def _max_length(model_dir, default=256):
+    path = os.path.join(model_dir, "sentence_bert_config.json")
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("max_seq_length", default)
+
+
+def quantize(model_dir, out_dir, model_name) -> str:
+    """Path of the int8 copy of model_dir's ONNX graph in out_dir, created on first use"""
+    target = os.path.join(out_dir, re.sub(r"[^A-Za-z0-9.-]+", "_", model_name) + ".int8.onnx")
+    if not os.path.exists(target):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        os.makedirs(out_dir, exist_ok=True)
+        stem, ext = os.path.splitext(os.path.basename(target))
+        tmp = os.path.join(out_dir, f"{stem}.{os.getpid()}.tmp{ext}")
+        quantize_dynamic(os.path.join(model_dir, ONNX_FILE), tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, target)
+        logger.info("Quantized %s to int8 at %s", model_dir, target)
+    return target
+
+
+class OnnxModel:
+    """Drop-in for SentenceTransformer.encode on ONNX Runtime (CPU).
+
+    model_dir holds onnx/model.onnx and tokenizer.json (the layout of the
+    sentence-transformers hub repos); without it they are downloaded. The
+    int8 graph goes to artifact_dir, by default ARTIFACTS_DIR.
+    """
+
+    def __init__(self, model_name="all-MiniLM-L6-v2", model_dir=None, quantized=False, threads=0,
+                 artifact_dir=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        model_dir = model_dir or _download(model_name)
+        if quantized:
+            path = quantize(model_dir, artifact_dir or ARTIFACTS_DIR, model_name)
+        else:
+            path = os.path.join(model_dir, ONNX_FILE)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_bytes = os.path.getsize(path)
+        self.normalize = _normalizes(model_dir)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=_max_length(model_dir))
+        self.tokenizer.enable_padding()
+
+        dim = self.session.get_outputs()[0].shape[-1]
+        self.dim = dim if isinstance(dim, int) else self.encode(["probe"]).shape[1]
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=None, **kwargs) -> np.ndarray:
+        """Embeddings for a list of texts (sentence-transformers' extra kwargs are ignored)"""
+        normalize = self.normalize if normalize_embeddings is None else normalize_embeddings
+        chunks = [self._encode_batch(texts[i:i + batch_size], normalize)
+                  for i in range(0, len(texts), batch_size)]
+        return np.concatenate(chunks) if chunks else np.zeros((0, self.dim), dtype="float32")
+
+    def _encode_batch(self, texts, normalize):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        mask = np.array([e.attention_mask for e in encodings], dtype="int64")
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype="int64"),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype="int64"),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        return mean_pool(hidden, mask, normalize)
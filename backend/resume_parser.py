@@ -1,11 +1,14 @@
 import fitz  # PyMuPDF
+import hashlib
+import logging
 import re
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from singleflight import SingleFlight
+from llm_scheduler import scheduler, PRIORITY_RESUME, PRIORITY_BATCH
 
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+# Concurrent extractions of the same resume text share one API call
+inflight = SingleFlight()
 
 def extract_text_from_pdf(file_path):
     """Extract text from PDF file"""
@@ -15,11 +18,10 @@ def extract_text_from_pdf(file_path):
             text += page.get_text()
     return text
 
-def extract_skills(text):
-    """Use AI to intelligently extract skills from resume text"""
-    try:
-        # Enhanced prompt for comprehensive skill extraction
-        prompt = f"""
+def _skills_prompt(text):
+    """Build the skill extraction prompt for a resume"""
+    # Enhanced prompt for comprehensive skill extraction
+    return f"""
 You are an expert resume analyzer. Extract ALL technical and professional skills from this resume text.
 
 Resume Text:
@@ -38,30 +40,57 @@ Please extract and return a comprehensive list of skills including:
 Return ONLY a comma-separated list of skills, no explanations or formatting.
 Example: Python, React, AWS, Machine Learning, Project Management
 """
-        
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,  # Lower temperature for more consistent extraction
-            max_tokens=500
-        )
-        
-        skills_text = response.choices[0].message.content.strip()
-        
-        # Parse the comma-separated skills
-        skills = [skill.strip() for skill in skills_text.split(',') if skill.strip()]
-        
-        # Remove duplicates and normalize
-        unique_skills = list(set(skills))
-        
-        print(f"🤖 AI extracted {len(unique_skills)} skills: {unique_skills}")
-        return unique_skills
-        
+
+def _completion_kwargs(text):
+    return dict(
+        model="gpt-4",
+        messages=[{"role": "user", "content": _skills_prompt(text)}],
+        temperature=0.3,  # Lower temperature for more consistent extraction
+        max_tokens=500
+    )
+
+def _parse_skills(skills_text):
+    """Turn the model's comma-separated answer into a unique skill list"""
+    # Parse the comma-separated skills
+    skills = [skill.strip() for skill in skills_text.strip().split(',') if skill.strip()]
+
+    # Remove duplicates and normalize
+    unique_skills = list(set(skills))
+
+    logger.info("AI extracted %d skills", len(unique_skills))
+    logger.debug("Extracted skills: %s", unique_skills)
+    return unique_skills
+
+def _text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def extract_skills(text):
+    """Use AI to intelligently extract skills from resume text"""
+    return inflight.do_sync(_text_key(text), _extract_skills, text)
+
+def _extract_skills(text):
+    try:
+        response = scheduler.complete(priority=PRIORITY_BATCH, **_completion_kwargs(text))
+        return _parse_skills(response.choices[0].message.content)
+
     except Exception as e:
-        print(f"❌ Error in AI skill extraction: {e}")
+        logger.warning("AI skill extraction failed, using keyword fallback: %s", e)
         # Fallback to basic keyword matching if AI fails
         return extract_skills_fallback(text)
 
+async def aextract_skills(text):
+    """Async version of extract_skills, queued at resume priority"""
+    return await inflight.do(_text_key(text), _aextract_skills, text)
+
+async def _aextract_skills(text):
+    try:
+        response = await scheduler.acomplete(priority=PRIORITY_RESUME, **_completion_kwargs(text))
+        return _parse_skills(response.choices[0].message.content)
+
+    except Exception as e:
+        logger.warning("AI skill extraction failed, using keyword fallback: %s", e)
+        return extract_skills_fallback(text)
+
 def extract_skills_fallback(text):
     """Fallback skill extraction using keyword matching"""
     SKILL_KEYWORDS = [
@@ -0,0 +1,174 @@
+# backend/roadmap_cache.py
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def roadmap_cache_key(user_skills: list[str], goal: str, user_id: str = None) -> str:
+    """Content hash of the normalized (skills, goal) pair for one user.
+
+    Skills are stripped, lowercased, de-duplicated and sorted and the goal is
+    lowercased with whitespace collapsed, so reordered or re-cased requests
+    map to the same key. The prompt carries the user's own memory, so users
+    never share an entry.
+    """
+    skills = sorted({skill.strip().lower() for skill in user_skills if skill.strip()})
+    normalized_goal = " ".join(goal.lower().split())
+    payload = json.dumps({"user": user_id, "skills": skills, "goal": normalized_goal},
+                         separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RoadmapCache:
+    """In-process LRU + TTL cache for generated roadmaps.
+
+    If db_path is given, entries are also written to a SQLite table so they
+    survive restarts; a miss in memory falls through to that tier and
+    promotes the entry back into the LRU. SQLite calls take their own lock,
+    never the LRU's, so aget()/aset() can run them in a worker thread while
+    the event loop keeps serving memory hits.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, db_path=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS roadmap_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("ROADMAP_CACHE_SIZE", "256")),
+            ttl_seconds=float(os.getenv("ROADMAP_CACHE_TTL", "3600")),
+            db_path=os.getenv("ROADMAP_CACHE_DB") or None,
+        )
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss"""
+        now = self._clock()
+        with self._lock:
+            value = self._get_memory(key, now)
+        if value is not None:
+            return value
+        return self._get_persistent(key, now)
+
+    async def aget(self, key):
+        """get() for coroutines: the SQLite tier is read in a worker thread"""
+        now = self._clock()
+        with self._lock:
+            value = self._get_memory(key, now)
+        if value is not None:
+            return value
+        if self._db is None:
+            return self._get_persistent(key, now)
+        return await asyncio.to_thread(self._get_persistent, key, now)
+
+    def set(self, key, value):
+        self._set_persistent(*self._set_memory(key, value))
+
+    async def aset(self, key, value):
+        """set() for coroutines: the SQLite write runs in a worker thread"""
+        entry = self._set_memory(key, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._set_persistent, *entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM roadmap_cache")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent_hits": self.persistent_hits,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _get_memory(self, key, now):
+        """A copy of a live LRU entry, counted as a hit; None otherwise (lock held)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    def _set_memory(self, key, value):
+        expires_at = self._clock() + self.ttl_seconds
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._put_memory(key, value, expires_at)
+        return key, value, expires_at
+
+    def _put_memory(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_persistent(self, key, now):
+        """Look a memory miss up in SQLite and promote it into the LRU"""
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM roadmap_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] <= now:
+                    self._db.execute("DELETE FROM roadmap_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = json.loads(row[0]), row[1]
+            if key not in self._entries:  # else a set() raced ahead with a newer value
+                self._put_memory(key, value, expires_at)
+            self.hits += 1
+            self.persistent_hits += 1
+        return copy.deepcopy(value)
+
+    def _set_persistent(self, key, value, expires_at):
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO roadmap_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+            self._db.commit()
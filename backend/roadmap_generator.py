@@ -1,27 +1,98 @@
-   
 import os
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv           # 1. Import dotenv
-load_dotenv()   
-from openai import OpenAI            # 3. Now OpenAI will find the key
-from memory_manager import MemoryManager
+load_dotenv()
+from memory_shards import ShardedMemory
 from course_recommender import CourseRecommender
+from lazy import Lazy
+from roadmap_cache import RoadmapCache, roadmap_cache_key
+from singleflight import SingleFlight
+from stage_timer import StageTimer
+from context_builder import ContextBuilder, count_tokens
+from llm_scheduler import scheduler, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+from roadmap_parser import SECTION_NAMES, RoadmapSectionParser, parse_roadmap_sections
+from roadmap_schema import (
+    IncrementalJSONObject, StructuredOutputError, render_markdown, repair_completion_kwargs,
+    response_arguments, structured_completion_kwargs, valid_section, validate_sections
+)
 
-# 4. Initialize OpenAI client with loaded key
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
 
-# 5. FAISS memory for context
-memory = MemoryManager()
+# 4. OpenAI calls go through the shared rate-limit-aware scheduler
+# (llm_scheduler.scheduler). The sync path is for scripts and runs at batch
+# priority; the API endpoints use the async path at interactive priority.
 
-# 6. Course recommendations
-recommender = CourseRecommender()
+# 5. FAISS memory for context, one lazily loaded shard per user (persisted
+# when MEMORY_STORE_DIR is set). Built on first use or by warmup(), so
+# importing this module doesn't load the embedding model.
+memory = Lazy("memory", ShardedMemory.from_env)
 
-def generate_roadmap(user_skills: list[str], goal: str) -> dict:
-    # Clean and normalize user skills
-    normalized_skills = [skill.strip().lower() for skill in user_skills if skill.strip()]
+# 6. Course recommendations (embeds the whole catalog, so also lazy)
+recommender = Lazy("recommender", CourseRecommender)
+
+# 7. Result cache keyed on normalized (skills, goal); a hit skips the LLM call,
+# the memory write and the course search
+cache = RoadmapCache.from_env()
+
+# 8. Identical generations already in flight are shared instead of repeated
+inflight = SingleFlight()
+
+# 9. Memory hits are filtered by distance, compressed and capped to a token
+# budget before they go into the prompt
+context_builder = ContextBuilder.from_env()
+
+# "markdown" (default): free-form text parsed by roadmap_parser
+# "json": the model fills a strict function-call schema, no text parsing needed
+OUTPUT_MODE = os.getenv("ROADMAP_OUTPUT_MODE", "markdown").lower()
+
+# Worker threads that let the sync pipeline overlap independent stages
+_background = ThreadPoolExecutor(max_workers=4, thread_name_prefix="roadmap")
+
+# Set once warmup() has built the models and indexes and run them once
+_warm = threading.Event()
+warmup_state = {"status": "cold", "error": None, "timings": {}}
+
+
+def warmup() -> dict:
+    """Build memory and the course index and run one dummy encode and search
+    through each, so the first real request doesn't pay for model loading,
+    catalog embedding or first-call allocations. Returns per-step timings (ms)."""
+    warmup_state.update(status="warming", error=None)
+    timings = {}
+
+    def step(name, fn, *args):
+        started = time.perf_counter()
+        fn(*args)
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    try:
+        step("memory_init", memory.get)
+        step("recommender_init", recommender.get)
+        step("encode", memory.model.encode, ["warmup query"])
+        step("course_search", recommender.recommend, _course_query("software engineer", []), 1)
+    except Exception as e:
+        warmup_state.update(status="failed", error=f"{type(e).__name__}: {e}", timings=timings)
+        logger.exception("Warmup failed")
+        raise
+    warmup_state.update(status="ready", timings=timings)
+    _warm.set()
+    logger.info("Warmup done", extra={"timings": timings})
+    return timings
+
+
+def is_ready() -> bool:
+    return _warm.is_set()
+
+def build_roadmap_prompt(user_skills: list[str], goal: str) -> str:
+    """Build the personalized roadmap prompt (without memory context)"""
     skills_text = ', '.join(user_skills) if user_skills else 'No specific skills listed'
-    
+
     # Enhanced personalized prompt
-    base_prompt = (
+    return (
         f"You are an expert career mentor and CV consultant. A user wants to become a {goal}.\n\n"
         f"**CURRENT SKILLS FROM THEIR RESUME:** {skills_text}\n\n"
         f"Create a comprehensive, personalized career development plan with exactly four sections:\n\n"
@@ -37,221 +108,346 @@ def generate_roadmap(user_skills: list[str], goal: str) -> dict:
         f"Make your response highly personalized based on their existing skills. Be specific and actionable."
     )
 
-    # 2) Pull context from memory
-    ctx_items = memory.retrieve(f"{','.join(user_skills)}::{goal}", k=3)
-    context = "\n".join(ctx_items) if ctx_items else ""
+def _memory_query(user_skills: list[str], goal: str) -> str:
+    return f"{','.join(user_skills)}::{goal}"
+
+def _with_context(hits: list, base_prompt: str, query: str):
+    """Prepend the relevant memory context; returns (prompt, token stats)"""
+    context, token_stats = context_builder.build(hits, query)
     full_prompt = f"{context}\n\n{base_prompt}" if context else base_prompt
+    token_stats["prompt_tokens"] = count_tokens(full_prompt)
+    return full_prompt, token_stats
 
-    # 3) Make request to OpenAI
-    resp = client.chat.completions.create(
+def _completion_kwargs(full_prompt: str) -> dict:
+    return dict(
         model="gpt-4",
         messages=[{"role": "user", "content": full_prompt}],
         temperature=0.7,
         max_tokens=700
     )
-    roadmap_text = resp.choices[0].message.content
 
-    # 4) Save new dialogue to memory
-    memory.add(full_prompt, roadmap_text)
-
-    # 5) Generate course recommendations based on skill gaps
+def _course_query(goal: str, normalized_skills: list[str]) -> str:
     # Create a query focusing on skills they need to learn (not what they have)
     gap_query = f"skills needed for {goal} career development learning roadmap"
     if normalized_skills:
         gap_query += f" excluding {', '.join(normalized_skills)}"
-    
-    top_courses = recommender.recommend(gap_query, k=8)
-    print(f"📚 Found {len(top_courses)} relevant courses for skill gaps")
-
-    # 6) Parse the roadmap text into structured sections
-    def parse_roadmap_sections(text):
-        """Parse AI-generated roadmap text into structured sections"""
-        sections = {
-            "cv_assessment": "",
-            "skill_gaps": [],
-            "learning_path": [],
-            "cv_tips": []
-        }
-        
-        try:
-            # Split by section headers
-            lines = text.split('\n')
-            current_section = None
-            current_content = []
-            
-            print(f"🔍 DEBUG: Parsing roadmap with {len(lines)} lines")
-            
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                print(f"🔍 Line {i}: '{line}' -> Current section: {current_section}")
-                    
-                # Detect section headers with more precise matching
-                line_lower = line.lower()
-                
-                # More flexible section detection
-                is_section_header = False
-                
-                # CV Overview & Assessment section (1.)
-                if (line.startswith("1.") and ("cv overview" in line_lower or "assessment" in line_lower)) or \
-                   ("cv overview" in line_lower and "assessment" in line_lower):
-                    print(f"✅ Found CV Assessment section: {line}")
-                    if current_section and current_content:
-                        _save_section_content(sections, current_section, current_content)
-                    current_section = "cv_assessment"
-                    current_content = []
-                    is_section_header = True
-                    
-                # Skills Gap Analysis section (2.)
-                elif (line.startswith("2.") and ("skill" in line_lower and "gap" in line_lower)) or \
-                     ("skills gap" in line_lower and "analysis" in line_lower):
-                    print(f"✅ Found Skills Gap section: {line}")
-                    if current_section and current_content:
-                        _save_section_content(sections, current_section, current_content)
-                    current_section = "skill_gaps"
-                    current_content = []
-                    is_section_header = True
-                    
-                # Learning Roadmap section (3.)
-                elif (line.startswith("3.") and ("learning" in line_lower or "roadmap" in line_lower)) or \
-                     ("learning roadmap" in line_lower):
-                    print(f"✅ Found Learning Path section: {line}")
-                    if current_section and current_content:
-                        _save_section_content(sections, current_section, current_content)
-                    current_section = "learning_path"
-                    current_content = []
-                    is_section_header = True
-                    
-                # CV Enhancement Tips section (4.)
-                elif (line.startswith("4.") and ("cv" in line_lower or "tips" in line_lower)) or \
-                     ("cv enhancement" in line_lower and "tips" in line_lower):
-                    print(f"✅ Found CV Tips section: {line}")
-                    if current_section and current_content:
-                        _save_section_content(sections, current_section, current_content)
-                    current_section = "cv_tips"
-                    current_content = []
-                    is_section_header = True
-                elif current_section and line and not line.startswith('**') and not line.startswith('#') and not is_section_header:
-                    # Add content to current section (skip section headers)
-                    if line.startswith(('-', '•', '1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')):
-                        # Remove bullet points and numbering
-                        clean_line = line.lstrip('-•123456789. ').strip()
-                        if clean_line:
-                            print(f"📝 Adding to {current_section}: {clean_line}")
-                            current_content.append(clean_line)
-                    elif len(line) > 10:  # Avoid short fragments
-                        print(f"📝 Adding to {current_section}: {line}")
-                        current_content.append(line)
-            
-            # Save the last section
-            if current_section and current_content:
-                _save_section_content(sections, current_section, current_content)
-                
-        except Exception as e:
-            print(f"⚠️ Error parsing roadmap sections: {e}")
-            # Fallback: put everything in learning_path
-            sections["learning_path"] = [roadmap_text]
-            
-        # Ensure CV assessment has content - fallback to first part of roadmap if empty
-        if not sections["cv_assessment"] and roadmap_text:
-            # Try to extract first paragraph as CV assessment
-            first_paragraph = roadmap_text.split('\n\n')[0] if '\n\n' in roadmap_text else roadmap_text[:200]
-            sections["cv_assessment"] = first_paragraph
-            print(f"🔄 Fallback: Using first paragraph as CV assessment: {first_paragraph[:50]}...")
-            
-        return sections
-    
-    def _save_section_content(sections, section_name, content):
-        """Helper to save content to the appropriate section"""
-        if section_name == "cv_assessment":
-            sections["cv_assessment"] = " ".join(content)
-        elif section_name == "learning_path":
-            # Special handling for learning path - split into individual actionable steps
-            for item in content:
-                individual_steps = _split_learning_path_into_steps(item)
-                sections[section_name].extend(individual_steps)
+    return gap_query
+
+def _cached_result(cache_key: str, user_skills: list[str]):
+    return _counted_hit(cache.get(cache_key), user_skills)
+
+async def _acached_result(cache_key: str, user_skills: list[str]):
+    return _counted_hit(await cache.aget(cache_key), user_skills)
+
+def _counted_hit(cached, user_skills: list[str]):
+    if cached is not None:
+        logger.info("Roadmap cache hit", extra={"sample_rate": 0.1})
+        cached["extracted_skills_count"] = len(user_skills)
+    return cached
+
+def generate_roadmap(user_skills: list[str], goal: str, user_id: str = None) -> dict:
+    # 1) Serve this user's repeated (skills, goal) pairs from the cache
+    cache_key = roadmap_cache_key(user_skills, goal, user_id)
+    cached = _cached_result(cache_key, user_skills)
+    if cached is not None:
+        return cached
+    return inflight.do_sync(cache_key, _generate_roadmap, user_skills, goal, cache_key, user_id)
+
+def _generate_roadmap(user_skills: list[str], goal: str, cache_key: str, user_id: str = None) -> dict:
+    timer = StageTimer()
+    # Clean and normalize user skills
+    normalized_skills = [skill.strip().lower() for skill in user_skills if skill.strip()]
+
+    # 2) Course search only depends on the inputs, so run it alongside the LLM call
+    courses_future = _background.submit(
+        _timed_call, timer, "course_search",
+        recommender.recommend, _course_query(goal, normalized_skills), 8
+    )
+
+    with timer.stage("prompt_build"):
+        base_prompt = build_roadmap_prompt(user_skills, goal)
+
+    # 3) Pull context from the user's memory shard
+    memory_query = _memory_query(user_skills, goal)
+    with timer.stage("memory_retrieve"):
+        hits = memory.retrieve_with_scores(user_id, memory_query, k=3, goal=goal)
+    with timer.stage("context_build"):
+        full_prompt, token_stats = _with_context(hits, base_prompt, memory_query)
+
+    # 4) Make request to OpenAI
+    structured_roadmap = None
+    with timer.stage("llm"):
+        if OUTPUT_MODE == "json":
+            roadmap_text, structured_roadmap = _complete_structured(full_prompt)
         else:
-            sections[section_name].extend(content)
-    
-    def _split_learning_path_into_steps(text):
-        """Split learning path text into individual actionable steps"""
-        steps = []
-        
-        # Split by common sentence patterns that indicate separate steps
-        import re
-        
-        # Patterns that typically indicate step boundaries
-        step_patterns = [
-            r'\. Next,',
-            r'\. Then,', 
-            r'\. After that,',
-            r'\. This will be followed by',
-            r'\. Simultaneously,',
-            r'\. Finally,',
-            r'\. Subsequently,',
-            r'\. Additionally,'
-        ]
-        
-        # Split the text by these patterns
-        current_text = text
-        for pattern in step_patterns:
-            parts = re.split(pattern, current_text, flags=re.IGNORECASE)
-            if len(parts) > 1:
-                # Rejoin with a delimiter we can split on later
-                current_text = '|||STEP_BREAK|||'.join(parts)
-        
-        # Split by the delimiter
-        potential_steps = current_text.split('|||STEP_BREAK|||')
-        
-        for step in potential_steps:
-            step = step.strip()
-            if len(step) > 20:  # Only include substantial steps
-                # Clean up the step text
-                step = step.strip('.').strip()
-                
-                # Extract time estimates if present
-                time_match = re.search(r'\((\d+[-–]?\d*\s*months?)\)', step)
-                if time_match:
-                    # Keep the time estimate for clarity
-                    steps.append(step)
-                else:
-                    # Add the step even without time estimate
-                    steps.append(step)
-        
-        # If no clear splits found, try to split by periods and filter
-        if len(steps) <= 1 and len(text) > 100:
-            sentences = text.split('. ')
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if len(sentence) > 30 and ('learn' in sentence.lower() or 
-                                         'understand' in sentence.lower() or
-                                         'focus' in sentence.lower() or
-                                         'obtain' in sentence.lower() or
-                                         'familiarize' in sentence.lower()):
-                    steps.append(sentence.strip('.'))
-        
-        # Ensure we have at least the original text if no splits worked
-        if not steps:
-            steps = [text]
-            
-        print(f"🔄 Split learning path into {len(steps)} steps:")
-        for i, step in enumerate(steps):
-            print(f"  {i+1}. {step[:60]}...")
-            
-        return steps
-    
-    # Parse the roadmap into structured sections
-    structured_roadmap = parse_roadmap_sections(roadmap_text)
-    
-    print(f"📊 Structured roadmap sections:")
-    print(f"  - CV Assessment: {len(structured_roadmap['cv_assessment'])} chars")
-    print(f"    Content: '{structured_roadmap['cv_assessment'][:100]}...'")  # Show first 100 chars
-    print(f"  - Skill Gaps: {len(structured_roadmap['skill_gaps'])} items")
-    print(f"  - Learning Path: {len(structured_roadmap['learning_path'])} items")
-    print(f"  - CV Tips: {len(structured_roadmap['cv_tips'])} items")
-    
+            resp = scheduler.complete(priority=PRIORITY_BATCH, **_completion_kwargs(full_prompt))
+            roadmap_text = resp.choices[0].message.content
+
+    # 5) Save new dialogue to memory while the text is parsed
+    add_future = _background.submit(
+        _timed_call, timer, "memory_add", memory.add, user_id, full_prompt, roadmap_text, goal
+    )
+    if structured_roadmap is None:
+        with timer.stage("parse"):
+            structured_roadmap = parse_roadmap_sections(roadmap_text)
+
+    top_courses = courses_future.result()
+    add_future.result()
+    logger.debug("Found %d relevant courses for skill gaps", len(top_courses))
+
+    result = _build_result(roadmap_text, top_courses, user_skills, structured_roadmap)
+    cache.set(cache_key, result)
+    return _with_timings(result, timer, token_stats)
+
+async def agenerate_roadmap(user_skills: list[str], goal: str, user_id: str = None) -> dict:
+    """Async version of generate_roadmap for use inside request handlers.
+
+    The OpenAI call goes through the async scheduler path, and the CPU-bound
+    embedding/FAISS work runs in worker threads, so the event loop stays
+    free to serve other requests while the completion is in flight.
+    """
+    cache_key = roadmap_cache_key(user_skills, goal, user_id)
+    cached = await _acached_result(cache_key, user_skills)
+    if cached is not None:
+        return cached
+    # Double-clicks and client retries await the generation already running
+    return await inflight.do(cache_key, _agenerate_roadmap, user_skills, goal, cache_key, user_id)
+
+async def _agenerate_roadmap(user_skills: list[str], goal: str, cache_key: str, user_id: str = None) -> dict:
+    timer = StageTimer()
+    normalized_skills = [skill.strip().lower() for skill in user_skills if skill.strip()]
+
+    # Memory retrieval and course search both start immediately; only the
+    # memory context is needed before the LLM call, the course search
+    # overlaps with the whole round trip
+    courses_task = asyncio.create_task(timer.timed("course_search", asyncio.to_thread(
+        recommender.recommend, _course_query(goal, normalized_skills), 8
+    )))
+    memory_query = _memory_query(user_skills, goal)
+    memory_task = asyncio.create_task(timer.timed("memory_retrieve", asyncio.to_thread(
+        memory.retrieve_with_scores, user_id, memory_query, 3, goal
+    )))
+    add_task = None
+    try:
+        with timer.stage("prompt_build"):
+            base_prompt = build_roadmap_prompt(user_skills, goal)
+        hits = await memory_task
+        with timer.stage("context_build"):
+            full_prompt, token_stats = _with_context(hits, base_prompt, memory_query)
+
+        structured_roadmap = None
+        if OUTPUT_MODE == "json":
+            roadmap_text, structured_roadmap = await timer.timed(
+                "llm", _acomplete_structured(full_prompt, PRIORITY_INTERACTIVE)
+            )
+        else:
+            resp = await timer.timed("llm", scheduler.acomplete(
+                priority=PRIORITY_INTERACTIVE, **_completion_kwargs(full_prompt)
+            ))
+            roadmap_text = resp.choices[0].message.content
+
+        # The memory write runs in a worker thread while the text is parsed
+        add_task = asyncio.create_task(timer.timed("memory_add", asyncio.to_thread(
+            memory.add, user_id, full_prompt, roadmap_text, goal
+        )))
+        if structured_roadmap is None:
+            with timer.stage("parse"):
+                structured_roadmap = parse_roadmap_sections(roadmap_text)
+
+        top_courses = await courses_task
+        await add_task
+    finally:
+        for task in (courses_task, memory_task, add_task):
+            if task is not None and not task.done():
+                task.cancel()
+    logger.debug("Found %d relevant courses for skill gaps", len(top_courses))
+
+    result = _build_result(roadmap_text, top_courses, user_skills, structured_roadmap)
+    await cache.aset(cache_key, result)
+    return _with_timings(result, timer, token_stats)
+
+async def astream_roadmap(user_skills: list[str], goal: str, user_id: str = None):
+    """Stream a roadmap as (event, data) pairs while the model is generating.
+
+    Emits a "token" event for every text delta, one event per roadmap section
+    (see SECTION_NAMES) as soon as the next section header shows up, a
+    "recommended_courses" event once the course search finishes, and a final
+    "done" event carrying the same dict agenerate_roadmap returns. In JSON
+    output mode there are no token events; each section is emitted as soon as
+    its JSON value is complete.
+    """
+    cache_key = roadmap_cache_key(user_skills, goal, user_id)
+    cached = await _acached_result(cache_key, user_skills)
+    if cached is not None:
+        # Replay the cached result in the same event order as a live stream
+        yield "token", cached["roadmap"]
+        for name in SECTION_NAMES:
+            yield name, cached[name]
+        yield "recommended_courses", cached["recommended_courses"]
+        yield "done", cached
+        return
+
+    timer = StageTimer()
+    normalized_skills = [skill.strip().lower() for skill in user_skills if skill.strip()]
+
+    # Course search doesn't depend on the model output, so start it right away
+    courses_task = asyncio.create_task(timer.timed("course_search", asyncio.to_thread(
+        recommender.recommend, _course_query(goal, normalized_skills), 8
+    )))
+    courses_sent = False
+    try:
+        with timer.stage("prompt_build"):
+            base_prompt = build_roadmap_prompt(user_skills, goal)
+        memory_query = _memory_query(user_skills, goal)
+        hits = await timer.timed("memory_retrieve", asyncio.to_thread(
+            memory.retrieve_with_scores, user_id, memory_query, 3, goal
+        ))
+        with timer.stage("context_build"):
+            full_prompt, token_stats = _with_context(hits, base_prompt, memory_query)
+
+        emitted = {}
+        output = {}
+        stream_sections = _stream_structured if OUTPUT_MODE == "json" else _stream_markdown
+        async for event, data in stream_sections(full_prompt, timer, output):
+            if not courses_sent and courses_task.done():
+                courses_sent = True
+                yield "recommended_courses", courses_task.result()
+            if event in SECTION_NAMES:
+                emitted[event] = data
+            yield event, data
+
+        timer.mark("llm_done")
+        roadmap_text = output["roadmap_text"]
+        structured_roadmap = output["sections"]
+        # Sections never streamed, or changed since (e.g. by a structured repair)
+        for name in SECTION_NAMES:
+            if name not in emitted or emitted[name] != structured_roadmap[name]:
+                yield name, structured_roadmap[name]
+
+        top_courses = await courses_task
+        if not courses_sent:
+            courses_sent = True
+            yield "recommended_courses", top_courses
+
+        await timer.timed("memory_add", asyncio.to_thread(
+            memory.add, user_id, full_prompt, roadmap_text, goal
+        ))
+        result = _build_result(roadmap_text, top_courses, user_skills, structured_roadmap)
+        await cache.aset(cache_key, result)
+        yield "done", _with_timings(result, timer, token_stats)
+    finally:
+        # Client went away mid-stream: don't leave the search running detached
+        if not courses_task.done():
+            courses_task.cancel()
+
+async def _stream_markdown(full_prompt: str, timer: StageTimer, output: dict):
+    """Stream markdown tokens, emitting sections as their headers close them"""
+    parser = RoadmapSectionParser()
+    chunks = []
+    stream = await scheduler.acomplete(
+        priority=PRIORITY_INTERACTIVE, stream=True, **_completion_kwargs(full_prompt)
+    )
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        if not chunks:
+            timer.mark("first_token")
+        chunks.append(delta)
+        yield "token", delta
+        for name in parser.feed(delta):
+            yield name, parser.sections[name]
+
+    output["roadmap_text"] = "".join(chunks)
+    parser.close()
+    output["sections"] = parser.finish(output["roadmap_text"])
+
+async def _stream_structured(full_prompt: str, timer: StageTimer, output: dict):
+    """Stream function-call arguments, emitting each field once its JSON value is complete"""
+    kwargs = structured_completion_kwargs(full_prompt)
+    fields = IncrementalJSONObject()
+    parts = []
+    stream = await scheduler.acomplete(priority=PRIORITY_INTERACTIVE, stream=True, **kwargs)
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = _arguments_delta(chunk.choices[0].delta)
+        if not delta:
+            continue
+        if not parts:
+            timer.mark("first_token")
+        parts.append(delta)
+        for name, value in fields.feed(delta):
+            # Fields of the wrong type wait for the repair instead
+            if valid_section(name, value):
+                yield name, value
+
+    arguments = "".join(parts)
+    try:
+        sections = validate_sections(arguments)
+    except StructuredOutputError as e:
+        sections = await _arepair_structured(kwargs, arguments, e, PRIORITY_INTERACTIVE)
+    output["roadmap_text"] = render_markdown(sections)
+    output["sections"] = sections
+
+def _arguments_delta(delta) -> str:
+    if getattr(delta, "tool_calls", None):
+        return delta.tool_calls[0].function.arguments or ""
+    return delta.content or ""
+
+def _complete_structured(full_prompt: str):
+    """Schema-constrained completion; returns (markdown text, sections)"""
+    kwargs = structured_completion_kwargs(full_prompt)
+    arguments = response_arguments(scheduler.complete(priority=PRIORITY_BATCH, **kwargs))
+    try:
+        sections = validate_sections(arguments)
+    except StructuredOutputError as e:
+        # One cheap repair round trip, then give up
+        logger.warning("Invalid structured roadmap (%s), asking the model to repair it", e)
+        retry = repair_completion_kwargs(kwargs, arguments, e)
+        sections = validate_sections(response_arguments(scheduler.complete(priority=PRIORITY_BATCH, **retry)))
+    return render_markdown(sections), sections
+
+async def _acomplete_structured(full_prompt: str, priority: int):
+    kwargs = structured_completion_kwargs(full_prompt)
+    arguments = response_arguments(await scheduler.acomplete(priority=priority, **kwargs))
+    try:
+        sections = validate_sections(arguments)
+    except StructuredOutputError as e:
+        sections = await _arepair_structured(kwargs, arguments, e, priority)
+    return render_markdown(sections), sections
+
+async def _arepair_structured(kwargs: dict, arguments: str, error: Exception, priority: int) -> dict:
+    logger.warning("Invalid structured roadmap (%s), asking the model to repair it", error)
+    retry = repair_completion_kwargs(kwargs, arguments, error)
+    return validate_sections(response_arguments(await scheduler.acomplete(priority=priority, **retry)))
+
+def _timed_call(timer, name, fn, *args):
+    with timer.stage(name):
+        return fn(*args)
+
+def _with_timings(result: dict, timer: StageTimer, token_stats: dict) -> dict:
+    """Attach per-stage timings (ms) and prompt token counts to a freshly generated result"""
+    timings = timer.as_dict()
+    logger.info("Roadmap generated", extra={"stage_timings": timings, "prompt_tokens": token_stats})
+    return {**result, "stage_timings": timings, "prompt_tokens": token_stats}
+
+def _build_result(roadmap_text: str, top_courses: list, user_skills: list[str],
+                  structured_roadmap: dict = None) -> dict:
+    # 6) Parse the roadmap into structured sections
+    if structured_roadmap is None:
+        structured_roadmap = parse_roadmap_sections(roadmap_text)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Structured roadmap sections", extra={"sections": {
+            "cv_assessment_chars": len(structured_roadmap["cv_assessment"]),
+            "skill_gaps": len(structured_roadmap["skill_gaps"]),
+            "learning_path": len(structured_roadmap["learning_path"]),
+            "cv_tips": len(structured_roadmap["cv_tips"]),
+        }})
+
     # 7) Return comprehensive roadmap with structured data
     return {
         "roadmap": roadmap_text,  # Keep original for backwards compatibility
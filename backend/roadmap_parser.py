@@ -0,0 +1,174 @@
+# backend/roadmap_parser.py
+"""Parse AI-generated roadmap text into the structured Progress sections.
+
+A single pass over the lines drives a small state machine (current section +
+its pending content). The parser is incremental, so it works the same for a
+complete text and for streamed tokens.
+"""
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+SECTION_NAMES = ("cv_assessment", "skill_gaps", "learning_path", "cv_tips")
+
+# Sentence openers that mark a boundary between two learning steps
+_STEP_BREAK = re.compile(
+    r"\. (?:Next,|Then,|After that,|This will be followed by|Simultaneously,"
+    r"|Finally,|Subsequently,|Additionally,)",
+    re.IGNORECASE,
+)
+_STEP_KEYWORDS = re.compile(r"learn|understand|focus|obtain|familiarize")
+
+_BULLET_PREFIXES = ('-', '•', '1.', '2.', '3.', '4.', '5.', '6.', '7.', '8.', '9.')
+_BULLET_CHARS = '-•123456789. '
+
+
+def _detect_header(line, line_lower):
+    """Return the section a header line opens, or None for content lines"""
+    # CV Overview & Assessment section (1.)
+    if (line.startswith("1.") and ("cv overview" in line_lower or "assessment" in line_lower)) or \
+       ("cv overview" in line_lower and "assessment" in line_lower):
+        return "cv_assessment"
+    # Skills Gap Analysis section (2.)
+    if (line.startswith("2.") and ("skill" in line_lower and "gap" in line_lower)) or \
+       ("skills gap" in line_lower and "analysis" in line_lower):
+        return "skill_gaps"
+    # Learning Roadmap section (3.)
+    if (line.startswith("3.") and ("learning" in line_lower or "roadmap" in line_lower)) or \
+       "learning roadmap" in line_lower:
+        return "learning_path"
+    # CV Enhancement Tips section (4.)
+    if (line.startswith("4.") and ("cv" in line_lower or "tips" in line_lower)) or \
+       ("cv enhancement" in line_lower and "tips" in line_lower):
+        return "cv_tips"
+    return None
+
+
+class RoadmapSectionParser:
+    """Incremental parser for AI-generated roadmap text.
+
+    Text can be fed in arbitrary chunks (e.g. streamed tokens). Each call to
+    feed() returns the names of sections that were completed by it, which
+    happens as soon as the next section header is detected.
+    """
+
+    def __init__(self):
+        self.sections = {
+            "cv_assessment": "",
+            "skill_gaps": [],
+            "learning_path": [],
+            "cv_tips": []
+        }
+        self.current_section = None
+        self.current_content = []
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the sections it completed"""
+        if '\n' not in chunk:
+            self._buffer += chunk
+            return []
+        lines = (self._buffer + chunk).split('\n')
+        self._buffer = lines.pop()
+        completed = []
+        for line in lines:
+            finished = self._process_line(line)
+            if finished:
+                completed.append(finished)
+        return completed
+
+    def close(self):
+        """Flush the trailing line and the last open section"""
+        completed = []
+        if self._buffer:
+            finished = self._process_line(self._buffer)
+            self._buffer = ""
+            if finished:
+                completed.append(finished)
+        finished = self._switch_section(None)
+        if finished:
+            completed.append(finished)
+        return completed
+
+    def finish(self, text):
+        """Return the parsed sections, applying the CV assessment fallback"""
+        sections = self.sections
+        # Ensure CV assessment has content - fallback to first part of roadmap if empty
+        if not sections["cv_assessment"] and text:
+            first_paragraph = text.split('\n\n', 1)[0] if '\n\n' in text else text[:200]
+            sections["cv_assessment"] = first_paragraph
+        return sections
+
+    def _switch_section(self, new_section):
+        # Save the section we are leaving and report it as completed
+        finished = self.current_section
+        if finished and self.current_content:
+            _save_section_content(self.sections, finished, self.current_content)
+        self.current_section = new_section
+        self.current_content = []
+        return finished
+
+    def _process_line(self, line):
+        line = line.strip()
+        if not line:
+            return None
+
+        header = _detect_header(line, line.lower())
+        if header:
+            return self._switch_section(header)
+
+        # Add content to current section (skip markdown headers)
+        if self.current_section and not line.startswith(('**', '#')):
+            if line.startswith(_BULLET_PREFIXES):
+                # Remove bullet points and numbering
+                clean_line = line.lstrip(_BULLET_CHARS).strip()
+                if clean_line:
+                    self.current_content.append(clean_line)
+            elif len(line) > 10:  # Avoid short fragments
+                self.current_content.append(line)
+        return None
+
+
+def parse_roadmap_sections(text):
+    """Parse AI-generated roadmap text into structured sections"""
+    parser = RoadmapSectionParser()
+    try:
+        parser.feed(text)
+        parser.close()
+    except Exception as e:
+        logger.warning("Error parsing roadmap sections: %s", e)
+        # Fallback: put everything in learning_path
+        parser.sections["learning_path"] = [text]
+    return parser.finish(text)
+
+
+def _save_section_content(sections, section_name, content):
+    """Helper to save content to the appropriate section"""
+    if section_name == "cv_assessment":
+        sections["cv_assessment"] = " ".join(content)
+    elif section_name == "learning_path":
+        # Special handling for learning path - split into individual actionable steps
+        for item in content:
+            sections["learning_path"].extend(split_learning_path_into_steps(item))
+    else:
+        sections[section_name].extend(content)
+
+
+def split_learning_path_into_steps(text):
+    """Split learning path text into individual actionable steps"""
+    steps = []
+    for step in _STEP_BREAK.split(text):
+        step = step.strip()
+        if len(step) > 20:  # Only include substantial steps
+            steps.append(step.strip('.').strip())
+
+    # If no clear splits found, try to split by periods and filter
+    if len(steps) <= 1 and len(text) > 100:
+        for sentence in text.split('. '):
+            sentence = sentence.strip()
+            if len(sentence) > 30 and _STEP_KEYWORDS.search(sentence.lower()):
+                steps.append(sentence.strip('.'))
+
+    # Ensure we have at least the original text if no splits worked
+    return steps or [text]
@@ -0,0 +1,212 @@
+# backend/roadmap_schema.py
+"""Schema-constrained (JSON) output mode for roadmap generation.
+
+Instead of free-form markdown, the model is forced to call a
+``submit_roadmap`` function whose arguments are the four structured roadmap
+fields. The arguments are validated against the same shape ProgressBase
+stores, so no text parsing is needed.
+"""
+import json
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError
+
+from progress import ProgressBase
+from roadmap_parser import SECTION_NAMES
+
+TOOL_NAME = "submit_roadmap"
+
+
+class StructuredOutputError(RuntimeError):
+    """The model did not return valid structured roadmap arguments"""
+
+
+class RoadmapSections(BaseModel):
+    """The structured roadmap fields of ProgressBase, all required"""
+    model_config = ConfigDict(extra="forbid")
+
+    cv_assessment: str
+    skill_gaps: List[str]
+    learning_path: List[str]
+    cv_tips: List[str]
+
+
+_FIELD_ADAPTERS = {name: TypeAdapter(field.annotation) for name, field in RoadmapSections.model_fields.items()}
+
+
+ROADMAP_TOOL = {
+    "type": "function",
+    "function": {
+        "name": TOOL_NAME,
+        "description": "Submit the personalized career development plan.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "cv_assessment": {
+                    "type": "string",
+                    "description": "3-4 sentence assessment of the CV's strengths and areas for improvement",
+                },
+                "skill_gaps": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "6-10 actionable skills to learn, one per item",
+                },
+                "learning_path": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "Ordered learning steps with estimated timeframes, one step per item",
+                },
+                "cv_tips": {
+                    "type": "array", "items": {"type": "string"},
+                    "description": "5-7 specific CV improvement tips, one per item",
+                },
+            },
+            "required": list(SECTION_NAMES),
+            "additionalProperties": False,
+        },
+    },
+}
+
+STRUCTURED_INSTRUCTIONS = (
+    f"\n\nReturn the plan by calling the {TOOL_NAME} function. Put each of the four sections "
+    f"in its own field; skill_gaps, learning_path and cv_tips must be lists with one item per "
+    f"skill, step or tip, without numbering or bullet characters."
+)
+
+
+def structured_completion_kwargs(full_prompt: str) -> dict:
+    return dict(
+        model="gpt-4",
+        messages=[{"role": "user", "content": full_prompt + STRUCTURED_INSTRUCTIONS}],
+        tools=[ROADMAP_TOOL],
+        tool_choice={"type": "function", "function": {"name": TOOL_NAME}},
+        temperature=0.7,
+        max_tokens=900  # JSON syntax costs a little more than markdown
+    )
+
+
+def repair_completion_kwargs(kwargs: dict, bad_output: str, error: Exception) -> dict:
+    """Follow-up request asking the model to fix its invalid arguments"""
+    messages = kwargs["messages"] + [
+        {"role": "assistant", "content": bad_output},
+        {"role": "user", "content": (
+            f"Those {TOOL_NAME} arguments were invalid: {error}. "
+            f"Call {TOOL_NAME} again with arguments that match the schema exactly."
+        )},
+    ]
+    return {**kwargs, "messages": messages, "temperature": 0}
+
+
+def response_arguments(resp) -> str:
+    """Function-call arguments from a completion (falls back to the message content)"""
+    message = resp.choices[0].message
+    if message.tool_calls:
+        return message.tool_calls[0].function.arguments
+    return message.content or ""
+
+
+def validate_sections(arguments: str) -> dict:
+    """Parse and validate submit_roadmap arguments into the four roadmap sections"""
+    try:
+        data = RoadmapSections.model_validate_json(arguments).model_dump()
+        # Same shape the progress API will later store
+        ProgressBase(goal="-", skills=[], roadmap=[], **data)
+    except ValidationError as e:
+        raise StructuredOutputError(_short_error(e)) from e
+    return data
+
+
+def valid_section(name: str, value) -> bool:
+    """Whether a single streamed field already has its RoadmapSections type"""
+    adapter = _FIELD_ADAPTERS.get(name)
+    if adapter is None:
+        return False
+    try:
+        adapter.validate_python(value)
+    except ValidationError:
+        return False
+    return True
+
+
+def render_markdown(sections: dict) -> str:
+    """Markdown rendering of the sections, for clients that display `roadmap`"""
+    def bullets(items):
+        return "\n".join(f"- {item}" for item in items)
+
+    return (
+        f"1. **CV Overview & Assessment**\n{sections['cv_assessment']}\n\n"
+        f"2. **Skills Gap Analysis**\n{bullets(sections['skill_gaps'])}\n\n"
+        f"3. **Learning Roadmap**\n{bullets(sections['learning_path'])}\n\n"
+        f"4. **CV Enhancement Tips**\n{bullets(sections['cv_tips'])}"
+    )
+
+
+def _short_error(e: ValidationError) -> str:
+    first = e.errors()[0]
+    location = ".".join(str(part) for part in first["loc"]) or "arguments"
+    return f"{location}: {first['msg']}"
+
+
+class IncrementalJSONObject:
+    """Pull top-level fields out of a JSON object that arrives in chunks.
+
+    feed() returns the (key, value) pairs whose values became complete with
+    that chunk, so each structured field can be streamed as soon as the
+    model has finished writing it.
+    """
+
+    _WHITESPACE = " \t\r\n"
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk):
+        self._buffer += chunk
+        fields = []
+        while not self.done:
+            pos = self._skip(self._pos)
+            if pos >= len(self._buffer):
+                break
+            if not self._started:
+                if self._buffer[pos] != "{":
+                    break
+                self._started = True
+                self._pos = pos + 1
+                continue
+            if self._buffer[pos] == ",":
+                self._pos = pos + 1
+                continue
+            if self._buffer[pos] == "}":
+                self.done = True
+                break
+            field = self._read_field(pos)
+            if field is None:
+                break  # incomplete, wait for more text
+            key, value, self._pos = field
+            fields.append((key, value))
+        return fields
+
+    def _read_field(self, pos):
+        try:
+            key, pos = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            return None
+        pos = self._skip(pos)
+        if pos >= len(self._buffer) or self._buffer[pos] != ":":
+            return None
+        pos = self._skip(pos + 1)
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            return None
+        # A number at the very end of the buffer may still be growing
+        if end >= len(self._buffer) and isinstance(value, (int, float)):
+            return None
+        return key, value, end
+
+    def _skip(self, pos):
+        while pos < len(self._buffer) and self._buffer[pos] in self._WHITESPACE:
+            pos += 1
+        return pos
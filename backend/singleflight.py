@@ -0,0 +1,81 @@
+# backend/singleflight.py
+import asyncio
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one computation.
+
+    The first caller for a key starts the work; callers that arrive while it
+    is still running wait for the same result (or the same exception)
+    instead of starting their own. Nothing is remembered once the call
+    finishes - that is the cache's job.
+    """
+
+    def __init__(self):
+        self._tasks = {}      # key -> asyncio.Task
+        self._futures = {}    # key -> concurrent.futures.Future
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def do(self, key, fn, *args):
+        """Await fn(*args), sharing the in-flight task with concurrent callers"""
+        task = self._tasks.get(key)
+        with self._lock:
+            self.calls += 1
+            if task is not None:
+                self.coalesced += 1
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finish_task(key, t))
+        # shield: one caller being cancelled must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def do_sync(self, key, fn, *args):
+        """Blocking counterpart of do() for callers running in threads"""
+        with self._lock:
+            self.calls += 1
+            future = self._futures.get(key)
+            if future is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                future = Future()
+                self._futures[key] = future
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            with self._lock:
+                self.failures += 1
+                self._futures.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._futures.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "in_flight": len(self._tasks) + len(self._futures),
+            }
+
+    def _finish_task(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if task.cancelled() or task.exception() is not None:
+            with self._lock:
+                self.failures += 1
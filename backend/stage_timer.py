@@ -0,0 +1,47 @@
+# backend/stage_timer.py
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Collect wall-clock durations (ms) of named pipeline stages.
+
+    Stages may overlap; compare each one against "total" to see which of
+    them sit on the critical path.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = _ms_since(started)
+
+    async def timed(self, name, awaitable):
+        """Await awaitable and record how long it took under name"""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[name] = _ms_since(started)
+
+    def mark(self, name):
+        """Record the time elapsed since the timer was created"""
+        self.timings[name] = _ms_since(self._start)
+
+    def as_dict(self) -> dict:
+        return {**self.timings, "total": _ms_since(self._start)}
+
+
+def server_timing_header(timings: dict) -> str:
+    """Render stage timings as a Server-Timing header value"""
+    return ", ".join(f"{name};dur={duration}" for name, duration in timings.items())
+
+
+def _ms_since(started):
+    return round((time.perf_counter() - started) * 1000, 2)
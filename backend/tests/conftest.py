@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import embeddings
+from embedding_cache import EmbeddingCache
+from embeddings import Encoder
+from memory_manager import MemoryManager
+
+
+class FakeEncoder:
+    """Deterministic bag-of-words embeddings, so tests don't need a real model"""
+
+    def __init__(self, dim=32):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, texts, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            for token in text.lower().split():
+                out[i, int(hashlib.md5(token.encode()).hexdigest(), 16) % self.dim] += 1.0
+            norm = np.linalg.norm(out[i])
+            if norm:
+                out[i] /= norm
+        return out
+
+
+class CountingModel(FakeEncoder):
+    """FakeEncoder that records how many encodes overlap"""
+
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.max_active = 0
+        self._guard = threading.Lock()
+
+    def encode(self, texts, **kwargs):
+        with self._guard:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            return super().encode(texts, **kwargs)
+        finally:
+            with self._guard:
+                self.active -= 1
+
+
+class RecordingModel(CountingModel):
+    """CountingModel that remembers batch sizes and takes a while per call"""
+
+    def __init__(self, latency=0.0, fail=False):
+        super().__init__()
+        self.latency = latency
+        self.fail = fail
+        self.batches = []
+
+    def encode(self, texts, **kwargs):
+        self.batches.append(len(texts))
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("model failed")
+        return super().encode(texts, **kwargs)
+
+
+@pytest.fixture
+def fake_encoder(request):
+    """A FakeEncoder; parametrize indirectly with its dim"""
+    return FakeEncoder(getattr(request, "param", 32))
+
+
+@pytest.fixture
+def counting_model():
+    return CountingModel()
+
+
+@pytest.fixture
+def recording_model(request):
+    """A RecordingModel; parametrize indirectly with its kwargs (latency, fail)"""
+    return RecordingModel(**getattr(request, "param", {}))
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty encoder registry whose models are FakeEncoders; lists the names loaded"""
+    monkeypatch.setattr(embeddings, "_encoders", {})
+    monkeypatch.setattr(embeddings, "cache", EmbeddingCache())
+    loads = []
+
+    def fake_init(self, model_name=embeddings.DEFAULT_MODEL, model=None, **kwargs):
+        loads.append(model_name)
+        original_init(self, model_name, model if model is not None else FakeEncoder(), **kwargs)
+    original_init = Encoder.__init__
+    monkeypatch.setattr(Encoder, "__init__", fake_init)
+    return loads
+
+
+@pytest.fixture
+def encoder(fake_encoder):
+    """An Encoder over fake_encoder, without a cache or batching"""
+    return Encoder("fake", fake_encoder)
+
+
+@pytest.fixture
+def memory(request, fake_encoder):
+    """In-memory MemoryManager; parametrize indirectly with its kwargs"""
+    return MemoryManager(model=fake_encoder, **getattr(request, "param", {}))
+
+
+@pytest.fixture
+def stored_memory(request, fake_encoder, tmp_path):
+    """MemoryManager persisted to tmp_path; parametrize indirectly with its kwargs"""
+    return MemoryManager(model=fake_encoder, store_dir=str(tmp_path), **getattr(request, "param", {}))
+
+
+@pytest.fixture
+def fill():
+    """fill(memory, n, start=0) adds roadmaps start..start+n-1"""
+    def fill(memory, n, start=0):
+        for i in range(start, start + n):
+            memory.add(f"skills python sql goal role{i}", f"roadmap {i}")
+    return fill
+
+
+@pytest.fixture
+def reopen(fake_encoder, tmp_path):
+    """reopen(**kwargs) loads stored_memory's directory again, as a restart would"""
+    return lambda **kwargs: MemoryManager(model=fake_encoder, store_dir=str(tmp_path), **kwargs)
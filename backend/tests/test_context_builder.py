@@ -0,0 +1,91 @@
+import asyncio
+from unittest.mock import patch
+
+from context_builder import ContextBuilder, compress_entry, count_tokens
+from llm_scheduler import FakeLLM, scheduler
+from roadmap_cache import RoadmapCache
+
+DOCKER_ROADMAP = (
+    "1. **CV Overview & Assessment**\n"
+    "The candidate has a solid foundation in Python scripting and automation.\n\n"
+    "2. **Skills Gap Analysis**\n"
+    "- Learn Docker to containerize Python services.\n"
+    "- Learn Kubernetes for orchestration of Docker containers.\n"
+    "- Practice public speaking at meetups.\n"
+    "- Improve watercolor painting as a hobby to relax on weekends.\n\n"
+    "3. **Learning Roadmap**\n"
+    "Start with Docker fundamentals over two weeks. Then move to Kubernetes. "
+    "Finally, spend a month on unrelated soft skills and personal branding.\n"
+) * 3
+QUERY = "python,docker::DevOps Engineer"
+
+
+class TestCountTokens:
+    def test_empty_and_growing(self):
+        assert count_tokens("") == 0
+        assert 0 < count_tokens("Learn Docker.") < count_tokens("Learn Docker and Kubernetes, then Terraform.")
+
+
+class TestCompressEntry:
+    """Test extractive compression of retrieved roadmaps"""
+
+    def test_short_text_is_kept(self):
+        assert compress_entry("Learn Docker.", QUERY, 50) == "Learn Docker."
+
+    def test_respects_budget_and_keeps_relevant_sentences(self):
+        compressed = compress_entry(DOCKER_ROADMAP, QUERY, 40)
+        assert count_tokens(compressed) <= 40
+        assert "Docker" in compressed
+        assert "watercolor" not in compressed
+
+    def test_keeps_original_order(self):
+        compressed = compress_entry(DOCKER_ROADMAP, QUERY, 60)
+        sentences = [s for s in ("containerize Python", "Kubernetes for orchestration") if s in compressed]
+        positions = [compressed.index(s) for s in sentences]
+        assert positions == sorted(positions)
+
+
+class TestContextBuilder:
+    """Test distance filtering, the token budget and per-request stats"""
+
+    def test_drops_distant_hits(self):
+        builder = ContextBuilder(max_distance=1.0, token_budget=500, entry_tokens=500)
+        context, stats = builder.build([(0.3, "Learn Docker."), (1.7, "Become a pastry chef.")], QUERY)
+        assert context == "Learn Docker."
+        assert stats["context_entries"] == 1
+        assert builder.stats()["dropped_by_distance"] == 1
+
+    def test_total_budget_is_hard(self):
+        builder = ContextBuilder(max_distance=2.0, token_budget=100, entry_tokens=80)
+        hits = [(0.1, DOCKER_ROADMAP), (0.2, DOCKER_ROADMAP), (0.3, DOCKER_ROADMAP)]
+        context, stats = builder.build(hits, QUERY)
+        assert stats["context_tokens"] <= 100
+        assert count_tokens(context) <= 100 + stats["context_entries"]  # joining newlines
+        assert stats["context_raw_tokens"] == 3 * count_tokens(DOCKER_ROADMAP)
+        assert builder.stats()["tokens_saved"] > 0
+
+    def test_no_hits(self):
+        context, stats = ContextBuilder().build([], QUERY)
+        assert context == ""
+        assert stats["context_tokens"] == 0
+
+
+class TestPromptTokenReporting:
+    def test_generated_result_reports_prompt_tokens(self):
+        import roadmap_generator
+
+        fake_llm = FakeLLM("1. CV Overview & Assessment\nSolid Python foundation for the role.")
+        with patch.object(roadmap_generator, 'cache', RoadmapCache()), \
+             patch.object(roadmap_generator, 'context_builder', ContextBuilder(token_budget=60)), \
+             patch.object(scheduler, 'backend', fake_llm), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = [(0.2, DOCKER_ROADMAP), (1.9, "Pastry chef plan.")]
+            mock_recommender.recommend.return_value = []
+            result = asyncio.run(roadmap_generator.agenerate_roadmap(["Python", "Docker"], "DevOps Engineer"))
+
+        tokens = result["prompt_tokens"]
+        assert tokens["context_entries"] == 1
+        assert tokens["context_tokens"] <= 60
+        assert tokens["prompt_tokens"] == count_tokens(fake_llm.calls[0]["messages"][0]["content"])
+        assert "Pastry" not in fake_llm.calls[0]["messages"][0]["content"]
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+
+import pytest
+
+import course_embeddings
+import embeddings
+from course_embeddings import artifact_path, catalog_hash, load_catalog, load_or_build, write_artifact
+from course_recommender import CourseRecommender
+from embeddings import Encoder
+from vector_index import index_contents
+
+COURSES = [
+    {"title": "SQL Basics", "desc": "learn sql queries joins databases"},
+    {"title": "React", "desc": "frontend react components javascript"},
+    {"title": "Docker", "desc": "containers docker images devops"},
+]
+
+
+class TestCatalogHash:
+    """The artifact name follows what the embeddings depend on"""
+
+    def test_depends_on_descriptions_and_model(self):
+        key = catalog_hash(COURSES, "fake")
+        retitled = [dict(c, title=c["title"].upper()) for c in COURSES]
+        assert catalog_hash(retitled, "fake") == key
+        assert catalog_hash(COURSES[:2], "fake") != key
+        assert catalog_hash(COURSES, "fake:onnx") != key
+
+
+class TestArtifact:
+    """Built once, then memory-mapped"""
+
+    def test_second_load_reuses_file(self, tmp_path, encoder):
+        first = load_or_build(str(tmp_path), COURSES, encoder)
+        assert encoder.stats()["texts_encoded"] == 3
+        again = load_or_build(str(tmp_path), COURSES, encoder)
+        assert encoder.stats()["texts_encoded"] == 3
+        ids, vectors = index_contents(again)
+        assert list(ids) == [0, 1, 2]
+        assert (vectors == index_contents(first)[1]).all()
+
+    def test_changed_catalog_rebuilds_and_drops_stale(self, tmp_path, encoder):
+        load_or_build(str(tmp_path), COURSES, encoder)
+        old = artifact_path(str(tmp_path), COURSES, "fake")
+        changed = COURSES + [{"title": "Go", "desc": "golang backend services"}]
+        assert load_or_build(str(tmp_path), changed, encoder).ntotal == 4
+        assert not os.path.exists(old)
+        assert os.path.exists(artifact_path(str(tmp_path), changed, "fake"))
+
+    def test_mismatched_artifact_is_rejected(self, tmp_path, encoder, fake_encoder):
+        write_artifact(str(tmp_path), COURSES, encoder)
+        fake_encoder.dim = 16
+        with pytest.raises(ValueError):
+            load_or_build(str(tmp_path), COURSES, Encoder("fake", fake_encoder))
+
+
+class TestRecommenderArtifact:
+    def test_same_recommendations_as_in_process_encode(self, tmp_path, encoder):
+        in_process = CourseRecommender(model=encoder)
+        mapped = CourseRecommender(model=encoder, artifact_dir=str(tmp_path))
+        assert len(os.listdir(tmp_path)) == 2  # artifact + build lock
+        for query in ["sql databases", "react javascript", "docker devops"]:
+            assert mapped.recommend(query, k=2) == in_process.recommend(query, k=2)
+
+    def test_env_selects_artifact_dir(self, tmp_path, monkeypatch, encoder):
+        monkeypatch.setenv("COURSE_EMBEDDINGS_DIR", str(tmp_path))
+        CourseRecommender(model=encoder)
+        assert any(name.endswith(".faiss") for name in os.listdir(tmp_path))
+
+
+class TestCli:
+    def test_builds_the_artifact_the_recommender_maps(self, tmp_path, monkeypatch, encoder):
+        catalog = tmp_path / "courses.json"
+        catalog.write_text(json.dumps(COURSES + [dict(COURSES[0], desc="duplicate title")]))
+        assert load_catalog(str(catalog)) == COURSES
+        out = tmp_path / "artifacts"
+        monkeypatch.setattr(embeddings, "get_encoder", lambda name=None: encoder)
+        monkeypatch.setattr(sys, "argv", ["course_embeddings.py", "--catalog", str(catalog),
+                                          "--out", str(out)])
+        course_embeddings.main()
+        assert encoder.stats()["texts_encoded"] == 3
+        CourseRecommender(model=encoder, artifact_dir=str(out), catalog_path=str(catalog),
+                          reload_interval=0)
+        assert encoder.stats()["texts_encoded"] == 3  # mapped, not rebuilt
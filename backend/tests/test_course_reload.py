@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from course_embeddings import course_key
+from course_recommender import CourseRecommender
+from embeddings import Encoder
+from vector_index import IndexSpec
+
+COURSES = [
+    {"title": "SQL Basics", "desc": "learn sql queries joins databases", "url": "https://x/sql"},
+    {"title": "React", "desc": "frontend react components javascript", "url": "https://x/react"},
+    {"title": "Docker", "desc": "containers docker images devops", "url": "https://x/docker"},
+]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "courses.json"
+    path.write_text(json.dumps(COURSES))
+    return path
+
+
+@pytest.fixture
+def recommender(request, catalog, recording_model, tmp_path):
+    """CourseRecommender over `catalog` without a watcher; parametrize indirectly
+    with its kwargs (an artifact_dir is taken relative to tmp_path)"""
+    kwargs = {"reload_interval": 0, **getattr(request, "param", {})}
+    if "artifact_dir" in kwargs:
+        kwargs["artifact_dir"] = str(tmp_path / kwargs["artifact_dir"])
+    recommender = CourseRecommender(model=Encoder("fake", recording_model), catalog_path=str(catalog),
+                                    **kwargs)
+    yield recommender
+    recommender.close()
+
+
+def _titles(recommender, query, k=3):
+    return [c["title"] for c in recommender.recommend(query, k=k)]
+
+
+class TestCourseKey:
+    def test_prefers_id_then_url_then_title(self):
+        assert course_key({"id": 7, "url": "u", "title": "t"}) == "7"
+        assert course_key({"url": "u", "title": "t"}) == "u"
+        assert course_key({"title": "t"}) == "t"
+
+
+class TestReload:
+    """Only the delta is embedded"""
+
+    def test_added_course_is_the_only_one_embedded(self, recommender, recording_model, catalog):
+        version = recommender.version
+        catalog.write_text(json.dumps(COURSES + [
+            {"title": "Go", "desc": "golang backend services concurrency", "url": "https://x/go"}]))
+        stats = recommender.reload()
+        assert stats["added"] == 1 and stats["embedded"] == 1
+        assert recording_model.batches == [3, 1]
+        assert _titles(recommender, "golang backend services", k=1) == ["Go"]
+        assert recommender.version != version
+        assert recommender.stats()["courses"] == 4
+
+    def test_removed_course_is_never_recommended(self, recommender, recording_model):
+        stats = recommender.reload(COURSES[1:])
+        assert stats == {"added": 0, "changed": 0, "removed": 1, "embedded": 0, "ms": stats["ms"]}
+        assert recording_model.batches == [3]
+        assert "SQL Basics" not in _titles(recommender, "sql databases")
+
+    def test_changed_description_is_re_embedded(self, recommender):
+        changed = [dict(COURSES[0], desc="kubernetes clusters helm charts")] + COURSES[1:]
+        stats = recommender.reload(changed)
+        assert (stats["changed"], stats["embedded"]) == (1, 1)
+        assert _titles(recommender, "kubernetes helm", k=1) == ["SQL Basics"]
+
+    def test_title_only_change_keeps_embedding(self, recommender):
+        renamed = [dict(COURSES[0], title="SQL Fundamentals")] + COURSES[1:]
+        stats = recommender.reload(renamed)
+        assert (stats["changed"], stats["embedded"]) == (1, 0)
+        assert _titles(recommender, "sql databases", k=1) == ["SQL Fundamentals"]
+
+    def test_in_flight_call_finishes_on_old_catalog(self, recommender, recording_model):
+        entered, release = threading.Event(), threading.Event()
+        original = recording_model.encode
+
+        def slow_encode(texts, **kwargs):
+            if texts == ["sql databases"]:
+                entered.set()
+                release.wait(5)
+            return original(texts, **kwargs)
+        recording_model.encode = slow_encode
+        result = []
+        call = threading.Thread(target=lambda: result.extend(_titles(recommender, "sql databases", k=1)))
+        call.start()
+        entered.wait(5)
+        recommender.reload(COURSES[1:])
+        release.set()
+        call.join()
+        assert result == ["SQL Basics"]
+        assert "SQL Basics" not in _titles(recommender, "sql databases")
+
+    @pytest.mark.parametrize("recommender", [{"index_spec": IndexSpec(kind="hnsw", threshold=1)}],
+                             indirect=True)
+    def test_removed_courses_filtered_from_approximate_index(self, recommender):
+        recommender._catalog.index.wait()
+        assert recommender.stats()["index"] == "hnsw"
+        recommender.reload(COURSES[1:])
+        assert "SQL Basics" not in _titles(recommender, "sql databases")
+        assert len(_titles(recommender, "sql databases")) == 2
+
+    @pytest.mark.parametrize("recommender", [{"artifact_dir": "artifacts"}], indirect=True)
+    def test_reload_refreshes_artifact(self, recommender, recording_model, catalog):
+        added = COURSES + [{"title": "Go", "desc": "golang backend services", "url": "https://x/go"}]
+        recommender.reload(added)
+        # A restart maps the reloaded version without embedding anything
+        catalog.write_text(json.dumps(added))
+        embedded = list(recording_model.batches)
+        restarted = CourseRecommender(model=Encoder("fake", recording_model), catalog_path=str(catalog),
+                                      artifact_dir=recommender.artifact_dir, reload_interval=0)
+        assert recording_model.batches == embedded
+        assert _titles(restarted, "golang backend services", k=1) == ["Go"]
+
+
+class TestWatcher:
+    @pytest.mark.parametrize("recommender", [{"reload_interval": 0.01}], indirect=True)
+    def test_file_change_is_picked_up(self, recommender, catalog):
+        catalog.write_text(json.dumps(COURSES[:1]))
+        os.utime(catalog, ns=(time.time_ns(), time.time_ns() + 10**9))
+        deadline = time.monotonic() + 5
+        while recommender.stats()["reloads"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        recommender.close()
+        assert recommender.stats()["courses"] == 1
+
+    @pytest.mark.parametrize("recommender", [{"reload_interval": 0.01}], indirect=True)
+    def test_broken_file_keeps_current_catalog(self, recommender, catalog):
+        version = recommender.version
+        catalog.write_text("[{not json")
+        os.utime(catalog, ns=(time.time_ns(), time.time_ns() + 10**9))
+        time.sleep(0.2)
+        recommender.close()
+        assert recommender.version == version
+        assert len(_titles(recommender, "sql")) == 3
@@ -0,0 +1,94 @@
+import numpy as np
+
+from embedding_cache import EmbeddingCache, embedding_cache_key
+from embeddings import Encoder
+from memory_manager import MemoryManager
+
+
+def _vec(value, dim=32):
+    return np.full(dim, value, dtype="float32")
+
+
+class TestEmbeddingCacheKey:
+    """Keys are scoped to the model"""
+
+    def test_key_differs_by_model_and_text(self):
+        key = embedding_cache_key("all-MiniLM-L6-v2", "python sql")
+        assert key == embedding_cache_key("all-MiniLM-L6-v2", "python sql")
+        assert key != embedding_cache_key("paraphrase-MiniLM-L3-v2", "python sql")
+        assert key != embedding_cache_key("all-MiniLM-L6-v2", "python  sql")
+
+
+class TestEmbeddingCache:
+    """Test the byte-bounded LRU and its SQLite tier"""
+
+    def test_hit_and_miss_counters(self):
+        cache = EmbeddingCache()
+        cache.set_many([("a", _vec(1))])
+        found = cache.get_many(["a", "b"])
+        assert list(found) == ["a"]
+        np.testing.assert_array_equal(found["a"], _vec(1))
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+    def test_vectors_are_read_only(self):
+        cache = EmbeddingCache()
+        cache.set_many([("a", _vec(1))])
+        assert not cache.get_many(["a"])["a"].flags.writeable
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        probe = EmbeddingCache()
+        probe.set_many([("a", _vec(0))])
+        cache = EmbeddingCache(max_bytes=probe.stats()["bytes"] * 2)
+        cache.set_many([("a", _vec(1)), ("b", _vec(2))])
+        cache.get_many(["a"])
+        cache.set_many([("c", _vec(3))])
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["bytes"] <= stats["max_bytes"]
+
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        db = str(tmp_path / "embeddings.db")
+        EmbeddingCache(db_path=db).set_many([("a", _vec(1))])
+        restarted = EmbeddingCache(max_bytes=0, db_path=db)
+        np.testing.assert_array_equal(restarted.get_many(["a"])["a"], _vec(1))
+        assert restarted.stats()["persistent_hits"] == 1
+
+    def test_disabled(self):
+        assert not EmbeddingCache(max_bytes=0).enabled
+
+
+class TestCachedEncoder:
+    """A hit skips the model entirely"""
+
+    def test_hit_skips_forward_pass(self, counting_model):
+        encoder = Encoder("fake", counting_model, cache=EmbeddingCache())
+        first = encoder.encode(["skills python goal data scientist"])
+        again = encoder.encode(["skills python goal data scientist"])
+        np.testing.assert_array_equal(first, again)
+        assert encoder.stats()["encode_calls"] == 1
+
+    def test_only_misses_reach_the_model(self, counting_model):
+        encoder = Encoder("fake", counting_model, cache=EmbeddingCache())
+        encoder.encode(["a b", "c d"])
+        out = encoder.encode(["c d", "e f", "a b", "e f"])
+        assert encoder.stats()["texts_encoded"] == 3
+        np.testing.assert_array_equal(out, encoder.encode(["c d", "e f", "a b", "e f"], cache=False))
+        assert out.shape == (4, 32)
+
+    def test_cache_false_and_model_kwargs_bypass(self, counting_model):
+        cache = EmbeddingCache()
+        encoder = Encoder("fake", counting_model, cache=cache)
+        encoder.encode(["a b"], cache=False)
+        encoder.encode(["a b"], normalize_embeddings=True)
+        assert cache.stats()["entries"] == 0
+        assert encoder.stats()["encode_calls"] == 2
+
+    def test_memory_adds_bypass_cache(self, counting_model):
+        cache = EmbeddingCache()
+        memory = MemoryManager(model=Encoder("fake", counting_model, cache=cache))
+        memory.add("skills python goal data scientist", "roadmap")
+        assert cache.stats()["entries"] == 0
+        assert memory.retrieve("skills python goal data scientist") == ["roadmap"]
+        assert cache.stats()["entries"] == 1
@@ -0,0 +1,72 @@
+import threading
+
+import numpy as np
+import pytest
+
+import embeddings
+from course_recommender import CourseRecommender
+from embeddings import Encoder, encoder_stats, get_encoder
+from memory_manager import MemoryManager
+from memory_shards import ShardedMemory
+
+
+class TestRegistry:
+    """One model instance per name per process"""
+
+    def test_same_instance(self, registry):
+        assert get_encoder("all-MiniLM-L6-v2") is get_encoder("all-MiniLM-L6-v2")
+        assert registry == ["all-MiniLM-L6-v2"]
+
+    def test_env_selects_default(self, registry, monkeypatch):
+        monkeypatch.setenv("EMBEDDING_MODEL", "paraphrase-MiniLM-L3-v2")
+        assert get_encoder().model_name == "paraphrase-MiniLM-L3-v2"
+        assert get_encoder("paraphrase-MiniLM-L3-v2") is get_encoder()
+
+    def test_concurrent_first_use_loads_once(self, registry):
+        threads = [threading.Thread(target=get_encoder, args=("m",)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert registry == ["m"]
+
+    def test_consumers_share_the_model(self, registry):
+        memory = MemoryManager()
+        shards = ShardedMemory()
+        recommender = CourseRecommender()
+        assert memory.model is shards.model is recommender.model
+        assert len(registry) == 1
+        assert shards.shard("u1").model is memory.model
+
+
+class TestEncoder:
+    """Thread-safe encode and per-model stats"""
+
+    def test_encode_is_serialized(self, counting_model):
+        encoder = Encoder("fake", counting_model)
+        threads = [threading.Thread(target=encoder.encode, args=([f"text {i}"] * 50,))
+                   for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert counting_model.max_active == 1
+        assert encoder.stats()["texts_encoded"] == 400
+
+    def test_single_string(self, encoder):
+        out = encoder.encode("python sql")
+        assert out.shape == (1, 32) and out.dtype == np.float32
+
+    def test_stats(self, registry):
+        get_encoder("m").encode(["a", "b"])
+        stats = encoder_stats()["m"]
+        assert stats["dim"] == 32
+        assert stats["encode_calls"] == 1
+        assert stats["texts_encoded"] == 2
+        # FakeEncoder isn't a torch module, so it has no measurable footprint
+        assert stats["model_bytes"] is None
+
+    def test_model_bytes_of_torch_module(self):
+        torch = pytest.importorskip("torch")
+        module = torch.nn.Linear(4, 2)
+        assert embeddings._model_bytes(module) == (4 * 2 + 2) * 4
@@ -0,0 +1,93 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from embeddings import Encoder, MicroBatcher
+
+
+def _concurrently(fn, n):
+    results = [None] * n
+    start = threading.Barrier(n)
+
+    def run(i):
+        start.wait()
+        results[i] = fn(i)
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestMicroBatcher:
+    """Single texts from many threads share model calls"""
+
+    @pytest.mark.parametrize("recording_model", [{"latency": 0.01}], indirect=True)
+    def test_concurrent_submits_share_a_batch(self, recording_model):
+        model = recording_model
+        batcher = MicroBatcher(model.encode, max_batch=32, max_wait=0.05)
+        futures = _concurrently(lambda i: batcher.submit(f"text {i}"), 16)
+        vectors = [f.result(timeout=5) for f in futures]
+        batcher.close()
+        assert sum(model.batches) == 16
+        assert len(model.batches) < 16
+        np.testing.assert_array_equal(vectors[3], model.encode(["text 3"])[0])
+
+    def test_full_batch_flushes_without_waiting(self, recording_model):
+        model = recording_model
+        batcher = MicroBatcher(model.encode, max_batch=4, max_wait=10)
+        started = time.monotonic()
+        futures = [batcher.submit(f"text {i}") for i in range(4)]
+        for future in futures:
+            future.result(timeout=5)
+        assert time.monotonic() - started < 5
+        assert batcher.stats()["largest_batch"] == 4
+        batcher.close()
+
+    def test_lone_text_flushes_after_max_wait(self, recording_model):
+        batcher = MicroBatcher(recording_model.encode, max_batch=32, max_wait=0.001)
+        assert batcher.submit("alone").result(timeout=5).shape == (32,)
+        batcher.close()
+
+    @pytest.mark.parametrize("recording_model", [{"fail": True}], indirect=True)
+    def test_errors_reach_every_caller(self, recording_model):
+        batcher = MicroBatcher(recording_model.encode, max_batch=8, max_wait=0.01)
+        futures = [batcher.submit("a"), batcher.submit("b")]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+        batcher.close()
+
+    def test_close_drains_queue(self, recording_model):
+        batcher = MicroBatcher(recording_model.encode, max_batch=32, max_wait=10)
+        future = batcher.submit("queued")
+        batcher.close()
+        assert future.done()
+        with pytest.raises(RuntimeError):
+            batcher.submit("late")
+
+
+class TestBatchingEncoder:
+    """Encoder routes small encodes through the batcher"""
+
+    @pytest.mark.parametrize("recording_model", [{"latency": 0.01}], indirect=True)
+    def test_single_text_encodes_are_coalesced(self, recording_model):
+        model = recording_model
+        encoder = Encoder("fake", model, max_batch=32, max_wait=0.02)
+        out = _concurrently(lambda i: encoder.encode([f"skills {i}"]), 12)
+        encoder.close()
+        assert all(vector.shape == (1, 32) for vector in out)
+        assert encoder.stats()["encode_calls"] < 12
+        assert encoder.stats()["texts_encoded"] == 12
+
+    def test_large_and_kwarg_encodes_go_direct(self, recording_model):
+        model = recording_model
+        encoder = Encoder("fake", model, max_batch=4, max_wait=10)
+        encoder.encode([f"text {i}" for i in range(4)])
+        encoder.encode(["one"], normalize_embeddings=True)
+        assert model.batches == [4, 1]
+        assert encoder.stats()["batches"] == 0
+        encoder.close()
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import time
+import pytest
+
+from llm_scheduler import (
+    LLMScheduler, TokenBucket, FakeLLM, estimate_tokens,
+    PRIORITY_INTERACTIVE, PRIORITY_RESUME, PRIORITY_BATCH,
+)
+
+
+def _request(content="hello", max_tokens=10):
+    return dict(model="gpt-4", messages=[{"role": "user", "content": content}], max_tokens=max_tokens)
+
+
+class TestTokenBucket:
+    """Test token bucket refill and accounting"""
+
+    def test_take_and_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(capacity=2, refill_per_second=1, clock=lambda: now[0])
+        assert bucket.try_take(1)
+        assert bucket.try_take(1)
+        assert not bucket.try_take(1)
+        assert bucket.time_until(1) == pytest.approx(1.0)
+        now[0] += 1.0
+        assert bucket.try_take(1)
+
+    def test_never_exceeds_capacity(self):
+        now = [0.0]
+        bucket = TokenBucket(capacity=3, refill_per_second=10, clock=lambda: now[0])
+        now[0] += 100
+        bucket.try_take(0)
+        assert bucket.tokens == 3
+
+
+class TestLLMScheduler:
+    """Test admission control, priorities and the fake backend"""
+
+    def test_fake_backend_completion(self):
+        scheduler = LLMScheduler(backend=FakeLLM("Python, SQL"))
+        resp = asyncio.run(scheduler.acomplete(**_request()))
+        assert resp.choices[0].message.content == "Python, SQL"
+        assert scheduler.backend.calls[0]["model"] == "gpt-4"
+
+    def test_fake_backend_streaming(self):
+        scheduler = LLMScheduler(backend=FakeLLM("abcdefghij", chunk_size=4))
+
+        async def run():
+            stream = await scheduler.acomplete(stream=True, **_request())
+            return [chunk.choices[0].delta.content async for chunk in stream]
+
+        assert asyncio.run(run()) == ["abcd", "efgh", "ij"]
+
+    def test_sync_complete(self):
+        scheduler = LLMScheduler(backend=FakeLLM("done"))
+        assert scheduler.complete(**_request()).choices[0].message.content == "done"
+        assert scheduler.stats()["by_priority"]["batch"]["admitted"] == 1
+
+    def test_requests_per_minute_limit_queues_excess(self):
+        # Burst of 2, then requests wait for the bucket to refill
+        scheduler = LLMScheduler(requests_per_minute=2, backend=FakeLLM("ok"))
+        scheduler._requests = TokenBucket(2, 20, time.monotonic)  # refill fast for the test
+
+        async def run():
+            started = time.monotonic()
+            await asyncio.gather(*[scheduler.acomplete(**_request()) for _ in range(4)])
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(run())
+        assert elapsed >= 0.08  # two requests had to wait for refill
+        stats = scheduler.stats()
+        assert stats["by_priority"]["interactive"]["admitted"] == 4
+        assert stats["max_queue_depth"] >= 2
+        assert stats["queue_depth"] == 0
+
+    def test_priority_order_when_saturated(self):
+        scheduler = LLMScheduler(requests_per_minute=1, backend=FakeLLM("ok"))
+        scheduler._requests = TokenBucket(1, 50, time.monotonic)
+        order = []
+
+        async def call(priority, name):
+            await scheduler.acomplete(priority=priority, **_request())
+            order.append(name)
+
+        async def run():
+            await scheduler.acomplete(**_request())  # drain the burst
+            await asyncio.gather(
+                call(PRIORITY_BATCH, "batch"),
+                call(PRIORITY_RESUME, "resume"),
+                call(PRIORITY_INTERACTIVE, "interactive"),
+            )
+
+        asyncio.run(run())
+        assert order == ["interactive", "resume", "batch"]
+
+    def test_token_budget_limits_large_requests(self):
+        scheduler = LLMScheduler(tokens_per_minute=100, backend=FakeLLM("ok"))
+        scheduler._tokens = TokenBucket(100, 2000, time.monotonic)
+
+        async def run():
+            started = time.monotonic()
+            await asyncio.gather(*[scheduler.acomplete(**_request(max_tokens=90)) for _ in range(3)])
+            return time.monotonic() - started
+
+        # each request needs ~92 tokens, so only one fits in the bucket at a time
+        assert asyncio.run(run()) >= 0.08
+
+    def test_cancelled_waiter_leaves_queue(self):
+        scheduler = LLMScheduler(requests_per_minute=1, backend=FakeLLM("ok"))
+
+        async def run():
+            await scheduler.acomplete(**_request())
+            waiting = asyncio.ensure_future(scheduler.acomplete(**_request()))
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["queue_depth"] == 1
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+
+        asyncio.run(run())
+        assert scheduler.stats()["queue_depth"] == 0
+
+    def test_sync_and_async_callers_share_budget(self):
+        scheduler = LLMScheduler(requests_per_minute=1, backend=FakeLLM("ok"))
+        scheduler._requests = TokenBucket(1, 20, time.monotonic)
+        scheduler.complete(**_request())
+
+        result = []
+        worker = threading.Thread(target=lambda: result.append(scheduler.complete(**_request())))
+        started = time.monotonic()
+        worker.start()
+        worker.join(timeout=2)
+        assert result and time.monotonic() - started >= 0.03
+
+    def test_backend_errors_propagate(self):
+        scheduler = LLMScheduler(backend=FakeLLM(error=RuntimeError("rate limited")))
+        with pytest.raises(RuntimeError):
+            asyncio.run(scheduler.acomplete(**_request()))
+
+    def test_estimate_tokens(self):
+        messages = [{"role": "user", "content": "x" * 400}]
+        assert estimate_tokens(messages, max_tokens=700) == 100 + 4 + 700
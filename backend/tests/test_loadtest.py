@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import sys
+import pytest
+import httpx
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "loadtest"))
+
+from loadgen import percentile, run  # noqa: E402
+from stub_openai import Latency, create_app  # noqa: E402
+from roadmap_schema import ROADMAP_TOOL, validate_sections  # noqa: E402
+
+
+def _chat(client, **body):
+    return client.post("/v1/chat/completions", json={"model": "gpt-4", "messages": [
+        {"role": "user", "content": "Create a roadmap"}], **body})
+
+
+class TestStubServer:
+    """Test the local OpenAI stand-in"""
+
+    def test_completion_returns_canned_roadmap(self):
+        response = _chat(TestClient(create_app(seed=1)))
+        assert response.status_code == 200
+        body = response.json()
+        assert "CV" in body["choices"][0]["message"]["content"]
+        assert body["usage"]["completion_tokens"] > 0
+
+    def test_tools_return_valid_function_call(self):
+        response = _chat(TestClient(create_app(seed=1)), tools=[ROADMAP_TOOL])
+        call = response.json()["choices"][0]["message"]["tool_calls"][0]
+        assert call["function"]["name"] == "submit_roadmap"
+        validate_sections(call["function"]["arguments"])
+
+    def test_streaming_ends_with_done(self):
+        response = _chat(TestClient(create_app(seed=1)), stream=True)
+        lines = [line for line in response.text.split("\n\n") if line]
+        assert lines[-1] == "data: [DONE]"
+        text = "".join(json.loads(line[6:])["choices"][0]["delta"].get("content") or "" for line in lines[:-1])
+        assert "CV" in text
+
+    def test_error_rate(self):
+        client = TestClient(create_app(error_rate=1.0, seed=1))
+        codes = {_chat(client).status_code for _ in range(20)}
+        assert codes == {429, 500}
+
+    def test_latency_specs(self):
+        import random
+        rng = random.Random(0)
+        assert Latency("fixed:0.5", rng).sample() == 0.5
+        assert 1.0 <= Latency("uniform:1,2", rng).sample() <= 2.0
+        assert Latency("lognormal:1.0,0.5", rng).sample() > 0
+        with pytest.raises(ValueError):
+            Latency("pareto:1", rng)
+
+
+class TestLoadGenerator:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 95) == 0.0
+
+    def test_journey_against_stub(self):
+        """Drive the real app in-process with the OpenAI client pointed at the stub"""
+        import roadmap_generator
+        from llm_scheduler import OpenAIBackend, scheduler
+        from main import app
+        from roadmap_cache import RoadmapCache
+        from openai import AsyncOpenAI
+
+        backend = OpenAIBackend()
+        backend._async_client = AsyncOpenAI(
+            api_key="sk-stub", base_url="http://stub/v1",
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(seed=1))),
+        )
+        with patch.object(scheduler, 'backend', backend), \
+             patch.object(roadmap_generator, 'cache', RoadmapCache()), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.return_value = []
+            report, wall = asyncio.run(run(app=app, users=3, iterations=1, toggles=2, seed=7))
+
+        assert report["POST /generate_roadmap"]["requests"] == 3
+        assert report["PATCH /progress/{id}/step/"]["requests"] == 6
+        assert all(row["errors"] == 0 for row in report.values())
+        assert report["POST /generate_roadmap"]["p99_ms"] >= report["POST /generate_roadmap"]["p50_ms"]
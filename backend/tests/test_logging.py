@@ -0,0 +1,98 @@
+import io
+import json
+import logging
+import pytest
+from fastapi.testclient import TestClient
+
+from log_config import JSONFormatter, SamplingFilter, configure_logging, request_id_var
+
+
+@pytest.fixture
+def log_stream():
+    """Route the root logger to an in-memory JSON stream for one test"""
+    stream = io.StringIO()
+    configure_logging(level="DEBUG", fmt="json", stream=stream)
+    yield stream
+    configure_logging(level="INFO", fmt="json")
+
+
+def _lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestStructuredLogging:
+    """Test JSON output, request IDs and levels"""
+
+    def test_json_line_with_request_id_and_extra(self, log_stream):
+        token = request_id_var.set("req-123")
+        try:
+            logging.getLogger("roadmap_generator").info(
+                "Roadmap generated in %d ms", 42, extra={"stage_timings": {"llm": 40.0}}
+            )
+        finally:
+            request_id_var.reset(token)
+
+        entry = _lines(log_stream)[-1]
+        assert entry["msg"] == "Roadmap generated in 42 ms"
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "roadmap_generator"
+        assert entry["request_id"] == "req-123"
+        assert entry["stage_timings"] == {"llm": 40.0}
+
+    def test_exception_is_included(self, log_stream):
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            logging.getLogger("main").exception("Exception in /generate_roadmap")
+        entry = _lines(log_stream)[-1]
+        assert entry["level"] == "ERROR"
+        assert "RuntimeError: boom" in entry["exc"]
+
+    def test_disabled_level_is_never_formatted(self):
+        configure_logging(level="WARNING", fmt="json", stream=io.StringIO())
+        try:
+            class Expensive:
+                def __str__(self):
+                    raise AssertionError("formatted a disabled debug message")
+            logging.getLogger("roadmap_parser").debug("value: %s", Expensive())
+        finally:
+            configure_logging(level="INFO", fmt="json")
+
+    def test_parser_hot_path_is_silent(self, log_stream):
+        from roadmap_parser import parse_roadmap_sections
+        parse_roadmap_sections("1. CV Overview & Assessment\nSolid Python foundation for the role.")
+        assert log_stream.getvalue() == ""
+
+
+class TestSamplingFilter:
+    def _record(self, level=logging.INFO, rate=None, msg="Roadmap cache hit"):
+        record = logging.LogRecord("roadmap_generator", level, __file__, 1, msg, (), None)
+        if rate is not None:
+            record.sample_rate = rate
+        return record
+
+    def test_keeps_one_in_n_per_message(self):
+        sampler = SamplingFilter()
+        kept = sum(sampler.filter(self._record(rate=0.1)) for _ in range(100))
+        assert kept == 10
+        # A different call site has its own counter
+        assert sampler.filter(self._record(rate=0.1, msg="other"))
+
+    def test_unsampled_and_warnings_always_pass(self):
+        sampler = SamplingFilter()
+        assert all(sampler.filter(self._record()) for _ in range(10))
+        assert all(sampler.filter(self._record(logging.WARNING, rate=0.0)) for _ in range(10))
+        assert not sampler.filter(self._record(rate=0.0))
+
+
+class TestRequestIdMiddleware:
+    def test_generates_and_echoes_request_id(self):
+        from main import app
+        client = TestClient(app)
+        generated = client.get("/metrics").headers["X-Request-ID"]
+        assert generated
+        assert client.get("/metrics", headers={"X-Request-ID": "abc"}).headers["X-Request-ID"] == "abc"
+
+    def test_json_formatter_defaults_request_id(self):
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "hello", (), None)
+        assert json.loads(JSONFormatter().format(record))["request_id"] == "-"
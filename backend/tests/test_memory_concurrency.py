@@ -0,0 +1,124 @@
+import random
+import threading
+import time
+
+import pytest
+
+from rwlock import ReadWriteLock
+
+
+class TestReadWriteLock:
+    """Test reader/writer exclusion"""
+
+    def test_readers_share_writers_exclude(self):
+        lock = ReadWriteLock()
+        inside = []
+        writer_done = threading.Event()
+
+        def writer():
+            with lock.write():
+                inside.append("writer")
+            writer_done.set()
+
+        with lock.read():
+            with lock.read():  # a second reader gets in while the first holds the lock
+                inside.append("reader")
+            thread = threading.Thread(target=writer)
+            thread.start()
+            assert not writer_done.wait(0.05)
+        thread.join(1)
+        assert inside == ["reader", "writer"]
+
+    def test_waiting_writer_blocks_new_readers(self):
+        lock = ReadWriteLock()
+        order = []
+        release_writer = threading.Event()
+
+        def writer():
+            with lock.write():
+                order.append("writer")
+                release_writer.wait(1)
+
+        def reader():
+            with lock.read():
+                order.append("reader")
+
+        with lock.read():
+            threads = [threading.Thread(target=writer)]
+            threads[0].start()
+            time.sleep(0.05)
+            threads.append(threading.Thread(target=reader))
+            threads[1].start()
+            time.sleep(0.05)
+            assert order == []
+        time.sleep(0.05)
+        assert order == ["writer"]
+        release_writer.set()
+        for t in threads:
+            t.join(1)
+        assert order == ["writer", "reader"]
+
+
+class TestMemoryStress:
+    """Hammer one MemoryManager from many threads"""
+
+    @pytest.mark.parametrize("stored_memory", [
+        dict(snapshot_every=40, capacity=150, eviction="lru", evict_batch=5)], indirect=True)
+    def test_concurrent_adds_and_searches(self, stored_memory, reopen):
+        memory = stored_memory
+        errors, ids = [], []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for i in range(60):
+                    if rng.random() < 0.4:
+                        ids.append(memory.add(f"skills python goal role{seed}-{i}", f"roadmap {seed}-{i}"))
+                    else:
+                        hits = memory.retrieve_with_scores(f"skills python goal role{rng.randrange(16)}-{i}", k=3)
+                        assert len(hits) <= 3
+                        assert all(isinstance(info, str) for _, info in hits)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        memory.wait_for_snapshot()
+
+        assert errors == []
+        assert len(set(ids)) == len(ids)
+        assert len(memory) <= 150
+        # The index and the metadata always agree
+        assert memory.base_count + memory.index.ntotal == len(memory)
+        assert set(memory.meta) == set(memory.entry_stats)
+        expected = dict(memory.meta.items())
+        memory.close()
+        restarted = reopen(capacity=150)
+        assert restarted.meta == expected
+
+    @pytest.mark.parametrize("stored_memory", [{"snapshot_every": 0}], indirect=True)
+    def test_concurrent_adds_are_group_committed(self, stored_memory):
+        memory = stored_memory
+        original = memory.store.append_adds
+        batches = []
+
+        def slow_append(entries):
+            entries = list(entries)
+            batches.append(len(entries))
+            time.sleep(0.01)  # e.g. an fsync
+            original(entries)
+        memory.store.append_adds = slow_append
+
+        threads = [threading.Thread(target=memory.add, args=(f"skills goal role{i}", f"roadmap {i}"))
+                   for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sum(batches) == 20
+        assert len(batches) < 20
+        assert sorted(memory.meta) == list(range(20))
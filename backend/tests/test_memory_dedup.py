@@ -0,0 +1,69 @@
+import pytest
+
+from memory_manager import MemoryManager, _PendingAdd
+
+pytestmark = pytest.mark.parametrize("fake_encoder", [256], indirect=True)
+
+
+@pytest.fixture
+def dedup(request, fake_encoder):
+    """MemoryManager folding near-duplicate adds; parametrize indirectly with more kwargs"""
+    kwargs = {"dedup": "refresh", **getattr(request, "param", {})}
+    return MemoryManager(model=fake_encoder, dedup_distance=0.05, **kwargs)
+
+
+class TestNearDuplicates:
+    """Near-identical adds don't create new rows"""
+
+    def test_refresh_keeps_one_row(self, dedup):
+        memory = dedup
+        first = memory.add("skills python sql goal data scientist", "roadmap A")
+        again = memory.add("skills python sql goal data scientist", "roadmap B")
+        assert again == first
+        assert list(memory.meta.values()) == ["roadmap A"]
+        assert memory.stats()["duplicates"] == 1
+        assert memory.entry_stats[first].hits == 1
+
+    def test_distinct_entries_are_kept(self, dedup):
+        memory = dedup
+        memory.add("skills python sql goal data scientist", "roadmap A")
+        memory.add("skills react css goal frontend developer", "roadmap B")
+        assert len(memory) == 2
+        assert memory.duplicates == 0
+
+    @pytest.mark.parametrize("stored_memory", [
+        dict(dedup="replace", dedup_distance=0.05, snapshot_every=0)], indirect=True)
+    def test_replace_swaps_in_new_text(self, stored_memory, reopen):
+        memory = stored_memory
+        first = memory.add("skills python sql goal data scientist", "roadmap A")
+        memory.snapshot()
+        second = memory.add("skills python sql goal data scientist", "roadmap B")
+        assert second != first
+        assert list(memory.meta.values()) == ["roadmap B"]
+        assert memory.retrieve("skills python sql goal data scientist", k=3) == ["roadmap B"]
+        # The swap is logged like any other remove + add
+        restarted = reopen(dedup="replace", dedup_distance=0.05)
+        assert list(restarted.meta.values()) == ["roadmap B"]
+
+    @pytest.mark.parametrize("dedup", [dict(capacity=2, eviction="lru", evict_batch=1)], indirect=True)
+    def test_refreshed_entry_survives_lru_eviction(self, dedup):
+        memory = dedup
+        memory.add("skills python sql goal data scientist", "roadmap A")
+        memory.add("skills react css goal frontend developer", "roadmap B")
+        memory.add("skills python sql goal data scientist", "roadmap A again")
+        memory.add("skills go kubernetes goal devops engineer", "roadmap C")
+        assert set(memory.meta.values()) == {"roadmap A", "roadmap C"}
+
+    def test_duplicates_within_one_batch(self, dedup):
+        memory = dedup
+        # Two identical adds queued behind a third caller, which commits all of them
+        emb = memory.model.encode(["skills python goal ml engineer"])[0]
+        queued = [_PendingAdd(emb, "roadmap 1"), _PendingAdd(emb, "roadmap 2")]
+        memory._queue = list(queued)
+        memory.add("skills react goal web developer", "roadmap 3")
+        assert len(memory) == 2
+        assert queued[0].entry_id == queued[1].entry_id is not None
+
+    def test_unknown_mode(self, fake_encoder):
+        with pytest.raises(ValueError):
+            MemoryManager(model=fake_encoder, dedup_distance=0.05, dedup="merge")
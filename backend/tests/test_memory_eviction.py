@@ -0,0 +1,124 @@
+import pytest
+
+from memory_eviction import EntryStats, get_policy
+
+
+def bounded(capacity, eviction, fixture="memory", evict_batch=1, **kwargs):
+    """Parametrizes the memory fixture with a capacity and an eviction policy"""
+    params = dict(capacity=capacity, eviction=eviction, evict_batch=evict_batch, **kwargs)
+    return pytest.mark.parametrize(fixture, [params], indirect=True)
+
+
+class TestEvictionPolicies:
+    """Test victim selection of each policy"""
+
+    def _entries(self):
+        # id: (inserted, last_used, hits)
+        return {0: EntryStats(1, 9, 3), 1: EntryStats(2, 3, 1), 2: EntryStats(3, 3, 0)}
+
+    def test_fifo(self):
+        assert get_policy("fifo").victims(self._entries(), 1) == [0]
+
+    def test_lru(self):
+        assert get_policy("lru").victims(self._entries(), 2) == [1, 2]
+
+    def test_utility(self):
+        assert get_policy("utility").victims(self._entries(), 2) == [2, 1]
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            get_policy("random")
+
+
+class TestBoundedMemory:
+    """Test that capacity holds and evicted vectors leave the index"""
+
+    @bounded(5, "fifo")
+    def test_capacity_is_never_exceeded(self, memory, fill):
+        fill(memory, 12)
+        assert len(memory) == 5
+        assert memory.index.ntotal == 5
+        assert list(memory.meta.values()) == [f"roadmap {i}" for i in range(7, 12)]
+        assert memory.stats()["evictions"] == 7
+
+    @bounded(3, "fifo")
+    def test_evicted_entries_are_not_retrieved(self, memory, fill):
+        fill(memory, 4)
+        results = memory.retrieve("skills python sql goal role0", k=3)
+        assert "roadmap 0" not in results
+        assert len(results) == 3
+
+    @bounded(3, "lru")
+    def test_lru_keeps_recently_retrieved(self, memory, fill):
+        fill(memory, 3)
+        memory.retrieve("skills python sql goal role0", k=1)
+        fill(memory, 1, start=3)
+        assert "roadmap 0" in memory.meta.values()
+        assert "roadmap 1" not in memory.meta.values()
+
+    @bounded(3, "utility")
+    def test_utility_keeps_frequently_retrieved(self, memory, fill):
+        fill(memory, 3)
+        for _ in range(3):
+            memory.retrieve("skills python sql goal role2", k=1)
+        memory.retrieve("skills python sql goal role0", k=1)
+        fill(memory, 1, start=3)
+        assert "roadmap 1" not in memory.meta.values()
+        assert {"roadmap 0", "roadmap 2"} <= set(memory.meta.values())
+
+    @bounded(10, "fifo", evict_batch=4)
+    def test_batch_eviction(self, memory, fill):
+        fill(memory, 11)
+        assert len(memory) == 7
+        assert memory.evictions == 4
+
+    @bounded(2, "lru")
+    def test_gauges(self, memory, fill):
+        fill(memory, 3)
+        memory.retrieve("skills python sql goal role2", k=1)
+        stats = memory.stats()
+        assert stats["size"] == 2
+        assert stats["capacity"] == 2
+        assert stats["policy"] == "lru"
+        assert stats["evictions"] == 1
+        assert stats["searches"] == 1
+        assert stats["max_search_ms"] >= stats["avg_search_ms"] > 0
+
+
+class TestPersistentEviction:
+    """Evictions are logged and survive restarts, also for snapshot entries"""
+
+    @bounded(3, "fifo", "stored_memory", snapshot_every=0)
+    def test_eviction_survives_restart(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 5)
+        restarted = reopen(capacity=3, eviction="fifo", evict_batch=1)
+        assert list(restarted.meta.values()) == ["roadmap 2", "roadmap 3", "roadmap 4"]
+
+    @bounded(3, "fifo", "stored_memory", snapshot_every=0)
+    def test_snapshot_entries_are_masked_then_compacted(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 3)
+        memory.snapshot()
+        fill(memory, 1, start=3)  # evicts roadmap 0 from the read-only snapshot
+
+        assert memory.stats()["tombstones"] == 1
+        assert "roadmap 0" not in memory.retrieve("skills python sql goal role0", k=3)
+        restarted = reopen(capacity=3, eviction="fifo", evict_batch=1)
+        assert "roadmap 0" not in restarted.meta.values()
+        assert "roadmap 0" not in restarted.retrieve("skills python sql goal role0", k=3)
+
+        memory.snapshot()
+        assert memory.stats()["tombstones"] == 0
+        assert memory.base.ntotal == 3
+        assert reopen(capacity=3, eviction="fifo", evict_batch=1).base.ntotal == 3
+
+    @bounded(3, "utility", "stored_memory", snapshot_every=0)
+    def test_retrieval_stats_are_snapshotted(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 3)
+        memory.retrieve("skills python sql goal role0", k=1)
+        memory.close()
+        restarted = reopen(capacity=3, eviction="utility", evict_batch=1)
+        fill(restarted, 1, start=3)
+        assert "roadmap 0" in restarted.meta.values()
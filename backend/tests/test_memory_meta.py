@@ -0,0 +1,80 @@
+import json
+import zlib
+
+import pytest
+
+import memory_meta
+from memory_meta import MetaStore
+
+ROADMAP = "## Skill Gaps\n- Docker\n- Kubernetes\n" * 20
+
+
+class TestMetaStore:
+    """Test the compressed, offset-indexed mapping"""
+
+    def test_round_trip(self):
+        store = MetaStore()
+        store[3] = ROADMAP
+        store[7] = {"roadmap": "dict infos work too"}
+        assert store[3] == ROADMAP
+        assert store[7] == {"roadmap": "dict infos work too"}
+        del store[3]
+        assert 3 not in store
+        assert list(store) == [7]
+
+    def test_blobs_are_compressed(self):
+        store = MetaStore()
+        for i in range(20):
+            store[i] = ROADMAP
+        stats = store.stats()
+        assert stats["meta_disk_bytes_per_entry"] < len(ROADMAP) / 4
+        assert stats["meta_ram_bytes_per_entry"] < stats["meta_inline_bytes_per_entry"]
+
+    def test_search_only_decompresses_k(self, memory, fill, monkeypatch):
+        fill(memory, 30)
+        calls = []
+        original = zlib.decompress
+
+        def counting(data):
+            calls.append(data)
+            return original(data)
+        monkeypatch.setattr(memory_meta.zlib, "decompress", counting)
+        assert len(memory.retrieve("skills python sql goal role4", k=3)) == 3
+        assert len(calls) == 3
+
+
+class TestMetaPersistence:
+    """Snapshots carry a blob file instead of inline infos"""
+
+    @pytest.mark.parametrize("stored_memory", [{"snapshot_every": 0}], indirect=True)
+    def test_snapshot_writes_blob_file(self, stored_memory, tmp_path, fill, reopen):
+        memory = stored_memory
+        fill(memory, 4)
+        memory.snapshot()
+        fill(memory, 2, start=4)
+
+        rows = json.loads((tmp_path / "meta.1.json").read_text())
+        assert all("info" not in row and row["length"] > 0 for row in rows)
+        assert (tmp_path / "blobs.1.dat").exists()
+        assert memory.meta[1] == "roadmap 1"
+        assert memory.meta[5] == "roadmap 5"
+
+        memory.close()
+        restarted = reopen()
+        assert list(restarted.meta.values()) == [f"roadmap {i}" for i in range(6)]
+        assert sorted(p.name for p in tmp_path.glob("blobs.*")) == ["blobs.2.dat"]
+
+    @pytest.mark.parametrize("stored_memory", [{"snapshot_every": 0}], indirect=True)
+    def test_loads_snapshot_with_inline_infos(self, stored_memory, tmp_path, fill, reopen):
+        memory = stored_memory
+        fill(memory, 2)
+        memory.close()
+        # Rewrite the snapshot the way it was stored before blob files
+        rows = json.loads((tmp_path / "meta.1.json").read_text())
+        for row in rows:
+            del row["offset"], row["length"]
+            row["info"] = f"old {row['id']}"
+        (tmp_path / "meta.1.json").write_text(json.dumps(rows))
+
+        restarted = reopen()
+        assert list(restarted.meta.values()) == ["old 0", "old 1"]
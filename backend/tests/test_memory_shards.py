@@ -0,0 +1,220 @@
+import os
+import threading
+
+import pytest
+
+import memory_shards
+from memory_manager import MemoryManager
+from memory_shards import ShardedMemory, goal_category, max_shards_for_fd_limit, shard_key
+
+
+@pytest.fixture
+def sharded(request, fake_encoder):
+    """In-memory ShardedMemory; parametrize indirectly with its kwargs"""
+    return ShardedMemory(model=fake_encoder, snapshot_every=0, **getattr(request, "param", {}))
+
+
+@pytest.fixture
+def stored_sharded(request, fake_encoder, tmp_path):
+    """ShardedMemory under tmp_path; parametrize indirectly with its kwargs"""
+    return ShardedMemory(store_dir=str(tmp_path), model=fake_encoder, snapshot_every=0,
+                         **getattr(request, "param", {}))
+
+
+class TestShardKeys:
+    """Test shard naming"""
+
+    def test_user_only_by_default(self):
+        assert shard_key("alice", "Senior Data Scientist") == "alice"
+        assert shard_key(None) == "anonymous"
+
+    def test_goal_category(self):
+        assert goal_category("Senior Data Scientist") == "data-scientist"
+        assert goal_category("data scientist") == "data-scientist"
+        assert shard_key("alice", "Junior Data Scientist", by_goal=True) == "alice/data-scientist"
+
+
+class TestShardedMemory:
+    """Each user only retrieves from their own shard"""
+
+    def test_users_are_isolated(self, sharded):
+        memory = sharded
+        memory.add("alice", "skills python goal data scientist", "alice roadmap")
+        memory.add("bob", "skills python goal data scientist", "bob roadmap")
+        assert memory.retrieve("alice", "skills python goal data scientist") == ["alice roadmap"]
+        assert memory.retrieve("bob", "skills python goal data scientist") == ["bob roadmap"]
+
+    def test_unknown_user_gets_nothing_and_no_shard(self, sharded):
+        memory = sharded
+        assert memory.retrieve_with_scores("carol", "anything") == []
+        assert memory.stats()["loaded_shards"] == 0
+
+    @pytest.mark.parametrize("sharded", [dict(by_goal=True)], indirect=True)
+    def test_goal_shards(self, sharded):
+        memory = sharded
+        memory.add("alice", "skills python", "ds roadmap", goal="Data Scientist")
+        memory.add("alice", "skills python", "web roadmap", goal="Web Developer")
+        assert memory.retrieve("alice", "skills python", goal="Senior Data Scientist") == ["ds roadmap"]
+        assert memory.stats()["loaded_shards"] == 2
+
+    @pytest.mark.parametrize("sharded", [dict(capacity=2, eviction="fifo", evict_batch=1)],
+                             indirect=True)
+    def test_capacity_is_per_shard(self, sharded):
+        memory = sharded
+        for i in range(3):
+            memory.add("alice", f"skills python goal role{i}", f"alice {i}")
+        memory.add("bob", "skills python goal role0", "bob 0")
+        assert len(memory.shard("alice")) == 2
+        assert memory.retrieve("bob", "skills python goal role0") == ["bob 0"]
+        assert memory.stats()["evictions"] == 1
+
+    @pytest.mark.parametrize("sharded", [dict(capacity=10)], indirect=True)
+    def test_stats_aggregate_loaded_shards(self, sharded):
+        memory = sharded
+        for i in range(3):
+            memory.add("alice", f"skills python goal role{i}", "alice " * 50)
+        memory.add("bob", "skills python goal role0", "bob")
+        for user in ("alice", "alice", "bob"):
+            memory.retrieve(user, "skills python goal role0")
+
+        stats = memory.stats()
+        alice, bob = memory.shard("alice").stats(), memory.shard("bob").stats()
+        assert stats["capacity"] == 20
+        assert stats["searches"] == 3
+        assert stats["max_search_ms"] == max(alice["max_search_ms"], bob["max_search_ms"])
+        assert 0 < stats["avg_search_ms"] <= stats["max_search_ms"]
+        key = "meta_inline_bytes_per_entry"
+        assert stats[f"max_{key}"] == alice[key] > bob[key]
+        assert stats[key] == round((3 * alice[key] + bob[key]) / 4)
+
+
+class TestShardPaging:
+    """Cold shards are snapshotted, dropped from RAM and reloaded on demand"""
+
+    @pytest.mark.parametrize("stored_sharded", [dict(max_loaded=2)], indirect=True)
+    def test_cold_shards_are_paged_out_and_reloaded(self, stored_sharded):
+        memory = stored_sharded
+        for user in ("alice", "bob", "carol"):
+            memory.add(user, f"skills python goal {user}", f"{user} roadmap")
+
+        stats = memory.stats()
+        assert stats["loaded_shards"] == 2
+        assert stats["shard_page_outs"] == 1
+        assert memory.retrieve("alice", "skills python goal alice") == ["alice roadmap"]
+        assert memory.shard("alice").base_count == 1  # reloaded from its snapshot
+        assert memory.stats()["shard_loads"] == 4
+
+    def test_shards_survive_restart(self, stored_sharded, tmp_path, fake_encoder):
+        memory = stored_sharded
+        memory.add("alice", "skills python goal ds", "alice roadmap")
+        memory.add("../../etc", "skills python goal ds", "odd name roadmap")
+        memory.close()
+        # Shard directories are hashed, whatever the user name contains
+        assert all(len(name) == 32 for name in os.listdir(tmp_path))
+
+        restarted = ShardedMemory(store_dir=str(tmp_path), model=fake_encoder)
+        assert restarted.retrieve("alice", "skills python goal ds") == ["alice roadmap"]
+        assert restarted.retrieve("../../etc", "skills python goal ds") == ["odd name roadmap"]
+        assert restarted.retrieve("bob", "skills python goal ds") == []
+
+
+class TestShardFiles:
+    """Loaded shards, and the files they hold open, stay bounded"""
+
+    @staticmethod
+    def _open_fds():
+        return len(os.listdir("/proc/self/fd"))
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+    @pytest.mark.parametrize("sharded", [dict(max_loaded=5)], indirect=True)
+    def test_in_memory_shards_are_dropped(self, sharded):
+        before = self._open_fds()
+        for i in range(50):
+            sharded.add(f"user{i}", "skills python goal ds", f"roadmap {i}")
+        stats = sharded.stats()
+        assert (stats["loaded_shards"], stats["shard_page_outs"]) == (5, 45)
+        assert self._open_fds() - before <= 5
+        assert sharded.retrieve("user0", "skills python goal ds") == []  # dropped
+        assert sharded.retrieve("user49", "skills python goal ds") == ["roadmap 49"]
+
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+    def test_read_only_shard_holds_one_file(self, stored_sharded, tmp_path, fake_encoder):
+        for i in range(10):
+            stored_sharded.add(f"user{i}", "skills python goal ds", f"roadmap {i}")
+        stored_sharded.close()
+        restarted = ShardedMemory(store_dir=str(tmp_path), model=fake_encoder)
+        before = self._open_fds()
+        for i in range(10):
+            assert restarted.retrieve(f"user{i}", "skills python goal ds") == [f"roadmap {i}"]
+        assert self._open_fds() - before == 10  # the snapshot's blob map, no log or scratch file
+
+    @pytest.mark.skipif(memory_shards.resource is None, reason="needs RLIMIT_NOFILE")
+    def test_max_loaded_follows_fd_limit(self, registry, monkeypatch):
+        monkeypatch.setattr(memory_shards.resource, "getrlimit", lambda which: (1024, 4096))
+        assert max_shards_for_fd_limit(128) == 170
+        monkeypatch.setenv("MEMORY_MAX_LOADED_SHARDS", "256")
+        assert ShardedMemory.from_env().max_loaded == 170
+        monkeypatch.setenv("MEMORY_MAX_LOADED_SHARDS", "64")
+        assert ShardedMemory.from_env().max_loaded == 64
+
+
+class TestShardLifecycle:
+    """Paging out never pulls a shard from under a call, and loads don't block the map"""
+
+    @pytest.mark.parametrize("stored_sharded", [dict(max_loaded=1)], indirect=True)
+    def test_shard_in_use_is_closed_after_the_call(self, stored_sharded):
+        memory = stored_sharded
+        memory.add("alice", "skills python goal ds", "alice 0")
+        with memory._use("alice") as alice:
+            memory.add("bob", "skills python goal ds", "bob 0")  # pages alice out
+            assert memory.stats()["shard_page_outs"] == 0
+            alice.add("skills sql goal ds", "alice 1")
+        assert memory.stats()["shard_page_outs"] == 1
+        assert sorted(memory.retrieve("alice", "skills goal ds", k=5)) == ["alice 0", "alice 1"]
+
+    @pytest.mark.parametrize("stored_sharded", [dict(max_loaded=1)], indirect=True)
+    def test_reopen_waits_for_close(self, stored_sharded, monkeypatch):
+        memory = stored_sharded
+        memory.add("alice", "skills python goal ds", "alice 0")
+        closing, release = threading.Event(), threading.Event()
+        original = MemoryManager.close
+
+        def slow_close(self):
+            closing.set()
+            release.wait(5)
+            original(self)
+        monkeypatch.setattr(MemoryManager, "close", slow_close)
+
+        pager = threading.Thread(target=memory.add, args=("bob", "skills go goal be", "bob 0"))
+        pager.start()
+        assert closing.wait(5)
+        result = []
+        reader = threading.Thread(
+            target=lambda: result.extend(memory.retrieve("alice", "skills python goal ds")))
+        reader.start()
+        reader.join(0.2)
+        assert reader.is_alive()  # alice's snapshot is still being written
+        release.set()
+        pager.join()
+        reader.join()
+        assert result == ["alice 0"]
+
+    def test_cold_load_does_not_block_other_users(self, stored_sharded, monkeypatch):
+        memory = stored_sharded
+        memory.add("bob", "skills go goal be", "bob 0")
+        loading, release = threading.Event(), threading.Event()
+
+        class SlowManager(MemoryManager):
+            def __init__(self, *args, **kwargs):
+                loading.set()
+                release.wait(5)
+                super().__init__(*args, **kwargs)
+        monkeypatch.setattr(memory_shards, "MemoryManager", SlowManager)
+
+        alice = threading.Thread(target=memory.add, args=("alice", "skills python goal ds", "a"))
+        alice.start()
+        assert loading.wait(5)
+        assert memory.retrieve("bob", "skills go goal be") == ["bob 0"]
+        release.set()
+        alice.join()
+        assert memory.retrieve("alice", "skills python goal ds") == ["a"]
@@ -0,0 +1,172 @@
+import os
+import threading
+
+import pytest
+
+from memory_store import MANIFEST
+
+manual_snapshots = pytest.mark.parametrize("stored_memory", [{"snapshot_every": 0}], indirect=True)
+
+
+class TestMemoryPersistence:
+    """Test snapshots, log replay and crash consistency"""
+
+    def test_in_memory_without_store(self, memory, fill):
+        fill(memory, 3)
+        assert memory.retrieve("skills python sql goal role1", k=1) == ["roadmap 1"]
+        assert memory.snapshot() is False
+
+    @manual_snapshots
+    def test_log_is_replayed_after_crash(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 5)
+        # No close(): simulate the process dying
+        restarted = reopen()
+        assert list(restarted.meta.values()) == [f"roadmap {i}" for i in range(5)]
+        assert restarted.retrieve("skills python sql goal role3", k=1) == ["roadmap 3"]
+
+    @manual_snapshots
+    def test_snapshot_plus_log(self, stored_memory, tmp_path, fill, reopen):
+        memory = stored_memory
+        fill(memory, 4)
+        assert memory.snapshot()
+        fill(memory, 3, start=4)
+
+        restarted = reopen()
+        assert restarted.base_count == 4
+        assert restarted.index.ntotal == 3
+        assert len(restarted.meta) == 7
+        for i in (1, 5):
+            assert restarted.retrieve(f"skills python sql goal role{i}", k=1) == [f"roadmap {i}"]
+        # Old logs are folded into the snapshot and removed
+        assert sorted(f for f in os.listdir(tmp_path) if f.startswith("wal.")) == ["wal.1.log"]
+
+    @pytest.mark.parametrize("stored_memory", [{"snapshot_every": 3}], indirect=True)
+    def test_periodic_snapshot(self, stored_memory, fill):
+        memory = stored_memory
+        fill(memory, 3)
+        memory.wait_for_snapshot()
+        assert memory.base_count == 3
+        fill(memory, 3, start=3)
+        memory.wait_for_snapshot()
+        fill(memory, 1, start=6)
+        assert memory.base_count == 6
+        assert memory.index.ntotal == 1
+        assert memory.retrieve("skills python sql goal role6", k=1) == ["roadmap 6"]
+
+    @pytest.mark.parametrize("stored_memory", [{"snapshot_every": 2}], indirect=True)
+    def test_periodic_snapshot_does_not_block_adds(self, stored_memory, fill):
+        memory = stored_memory
+        started, release = threading.Event(), threading.Event()
+        write_snapshot = memory.store.write_snapshot
+
+        def slow_write(*args):
+            started.set()
+            release.wait(5)
+            return write_snapshot(*args)
+
+        memory.store.write_snapshot = slow_write
+        fill(memory, 2)
+        assert started.wait(5)
+        fill(memory, 3, start=2)  # while the snapshot is still being written
+        assert len(memory) == 5
+        release.set()
+        memory.wait_for_snapshot()
+        assert memory.base_count == 2
+        memory.close()  # waits for nothing more, then folds the rest
+        assert memory.base_count == 5
+
+    @manual_snapshots
+    def test_close_writes_final_snapshot(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 3)
+        memory.close()
+        restarted = reopen()
+        assert restarted.base_count == 3
+        assert restarted.index.ntotal == 0
+
+    @manual_snapshots
+    def test_torn_log_tail_is_discarded(self, stored_memory, tmp_path, fill, reopen):
+        memory = stored_memory
+        fill(memory, 3)
+        memory.store.close()
+        log_path = tmp_path / "wal.0.log"
+        data = log_path.read_bytes()
+        log_path.write_bytes(data[:-7])  # torn last record
+
+        restarted = reopen()
+        assert list(restarted.meta.values()) == ["roadmap 0", "roadmap 1"]
+        # New records append cleanly after the truncated tail
+        fill(restarted, 1, start=9)
+        assert list(reopen().meta.values()) == ["roadmap 0", "roadmap 1", "roadmap 9"]
+
+    @manual_snapshots
+    def test_corrupted_record_stops_replay(self, stored_memory, tmp_path, fill, reopen):
+        memory = stored_memory
+        fill(memory, 3)
+        memory.store.close()
+        log_path = tmp_path / "wal.0.log"
+        data = bytearray(log_path.read_bytes())
+        data[-3] ^= 0xFF
+        log_path.write_bytes(bytes(data))
+        assert list(reopen().meta.values()) == ["roadmap 0", "roadmap 1"]
+
+    @manual_snapshots
+    def test_uncommitted_snapshot_is_ignored(self, stored_memory, tmp_path, fill, reopen):
+        memory = stored_memory
+        fill(memory, 2)
+        memory.snapshot()
+        fill(memory, 2, start=2)
+        memory.store.close()
+        # A snapshot that crashed before its manifest was replaced
+        (tmp_path / "index.2.faiss.tmp").write_bytes(b"partial")
+        (tmp_path / "meta.2.json").write_text("[]")
+
+        restarted = reopen()
+        assert list(restarted.meta.values()) == [f"roadmap {i}" for i in range(4)]
+        assert not (tmp_path / "meta.2.json").exists()
+        assert not (tmp_path / "index.2.faiss.tmp").exists()
+
+    @manual_snapshots
+    def test_failed_snapshot_loses_nothing(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 2)
+        original = memory.store.write_snapshot
+
+        def crash(*args):
+            raise OSError("disk full")
+        memory.store.write_snapshot = crash
+        with pytest.raises(OSError):
+            memory.snapshot()
+        fill(memory, 1, start=2)
+        memory.store.write_snapshot = original
+        assert len(reopen()) == 3
+
+    @manual_snapshots
+    def test_adds_during_snapshot_are_kept(self, stored_memory, fill, reopen):
+        memory = stored_memory
+        fill(memory, 3)
+        original = memory.store.write_snapshot
+
+        def slow_write(*args):
+            # Another request adds an entry while the snapshot file is written
+            worker = threading.Thread(target=fill, args=(memory, 1, 3))
+            worker.start()
+            worker.join()
+            return original(*args)
+        memory.store.write_snapshot = slow_write
+        memory.snapshot()
+
+        assert memory.base_count == 3
+        assert memory.index.ntotal == 1
+        assert list(reopen().meta.values()) == [f"roadmap {i}" for i in range(4)]
+
+    @manual_snapshots
+    def test_dimension_mismatch_is_rejected(self, stored_memory, tmp_path, fill, reopen, fake_encoder):
+        memory = stored_memory
+        fill(memory, 1)
+        memory.close()
+        assert (tmp_path / MANIFEST).exists()
+        fake_encoder.dim = 16
+        with pytest.raises(ValueError):
+            reopen()
@@ -0,0 +1,109 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from course_recommender import CourseRecommender
+from embedding_cache import EmbeddingCache
+from embeddings import DEFAULT_MODEL, Encoder, load_model
+from onnx_encoder import ONNX_FILE, mean_pool, quantize
+
+QUERIES = [
+    "skills needed for data scientist career development learning roadmap",
+    "skills needed for frontend developer career development learning roadmap excluding html, css",
+    "skills needed for devops engineer career development learning roadmap excluding linux",
+    "skills needed for machine learning engineer career development learning roadmap",
+    "skills needed for backend developer career development learning roadmap excluding python",
+    "skills python sql goal data analyst",
+]
+
+
+class TestMeanPool:
+    """Pooling matches sentence-transformers' mean + normalize"""
+
+    def test_padding_is_ignored(self):
+        hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype="float32")
+        mask = np.array([[1, 1, 0]])
+        np.testing.assert_allclose(mean_pool(hidden, mask, normalize=False), [[2.0, 0.0]])
+        np.testing.assert_allclose(mean_pool(hidden, mask), [[1.0, 0.0]])
+
+
+class TestBackendSelection:
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            load_model(DEFAULT_MODEL, "tensorflow")
+
+    def test_backends_are_cached_apart(self, fake_encoder):
+        cache = EmbeddingCache()
+        torch_encoder = Encoder("m", fake_encoder, cache=cache)
+        onnx_encoder = Encoder("m", fake_encoder, cache=cache, backend="onnx-int8")
+        torch_encoder.encode(["python sql"])
+        onnx_encoder.encode(["python sql"])
+        assert torch_encoder.stats()["texts_encoded"] == onnx_encoder.stats()["texts_encoded"] == 1
+        assert onnx_encoder.stats()["backend"] == "onnx-int8"
+
+
+class TestQuantize:
+    """The int8 graph is written once, next to nothing it doesn't own"""
+
+    def test_writes_to_artifact_dir_once(self, tmp_path, monkeypatch):
+        calls = []
+
+        def quantize_dynamic(source, tmp, weight_type):
+            calls.append(tmp)
+            with open(tmp, "wb") as f:
+                f.write(b"int8")
+        module = types.SimpleNamespace(QuantType=types.SimpleNamespace(QInt8="int8"),
+                                       quantize_dynamic=quantize_dynamic)
+        monkeypatch.setitem(sys.modules, "onnxruntime.quantization", module)
+        snapshot = tmp_path / "hub.onnx" / "snapshot"
+        (snapshot / "onnx").mkdir(parents=True)
+        (snapshot / ONNX_FILE).write_bytes(b"fp32")
+        out = tmp_path / "artifacts"
+
+        target = quantize(str(snapshot), str(out), "sentence-transformers/all-MiniLM-L6-v2")
+        assert quantize(str(snapshot), str(out), "sentence-transformers/all-MiniLM-L6-v2") == target
+        assert len(calls) == 1 and os.path.dirname(calls[0]) == str(out)
+        assert os.listdir(out) == ["sentence-transformers_all-MiniLM-L6-v2.int8.onnx"]
+        assert os.listdir(snapshot / "onnx") == ["model.onnx"]
+
+
+@pytest.fixture(scope="module")
+def torch_encoder():
+    pytest.importorskip("onnxruntime")
+    try:
+        model = load_model(DEFAULT_MODEL, "torch")
+    except OSError as e:
+        pytest.skip(f"model weights unavailable: {e}")
+    if not hasattr(model, "modules"):
+        pytest.skip("needs the real sentence-transformers model")
+    return Encoder(DEFAULT_MODEL, model)
+
+
+@pytest.mark.parametrize("backend, min_cosine", [("onnx", 0.999), ("onnx-int8", 0.98)])
+class TestParity:
+    """ONNX backends agree with the torch model they replace"""
+
+    def _onnx(self, backend):
+        try:
+            return Encoder(DEFAULT_MODEL, backend=backend)
+        except OSError as e:
+            pytest.skip(f"ONNX export unavailable: {e}")
+
+    def test_cosine_agreement(self, torch_encoder, backend, min_cosine):
+        expected = torch_encoder.encode(QUERIES)
+        actual = self._onnx(backend).encode(QUERIES)
+        cosine = (expected * actual).sum(axis=1) / (
+            np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+        assert cosine.min() >= min_cosine
+
+    def test_same_course_recommendations(self, torch_encoder, backend, min_cosine):
+        expected = CourseRecommender(model=torch_encoder)
+        actual = CourseRecommender(model=self._onnx(backend))
+        for query in QUERIES:
+            want = [c["title"] for c in expected.recommend(query, k=5)]
+            got = [c["title"] for c in actual.recommend(query, k=5)]
+            # int8 noise may swap near-ties inside the top-k, but not change it
+            assert got == want if backend == "onnx" else set(got) == set(want)
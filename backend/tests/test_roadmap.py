@@ -1,9 +1,17 @@
 import pytest
 import json
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from main import app
 
+@pytest.fixture(autouse=True)
+def fresh_roadmap_cache():
+    """Give every test an empty roadmap cache"""
+    import roadmap_generator
+    from roadmap_cache import RoadmapCache
+    with patch.object(roadmap_generator, 'cache', RoadmapCache()):
+        yield
+
 @pytest.fixture(name="client")
 def client_fixture():
     return TestClient(app)
@@ -29,7 +37,7 @@ def auth_headers_fixture(client):
 class TestRoadmapGeneration:
     """Test roadmap generation endpoints"""
     
-    @patch('main.generate_roadmap')
+    @patch('main.agenerate_roadmap', new_callable=AsyncMock)
     def test_generate_roadmap_success(self, mock_generate, client, auth_headers):
         """Test successful roadmap generation"""
         # Mock the roadmap generation response
@@ -59,7 +67,8 @@ class TestRoadmapGeneration:
         # Verify the mock was called with correct parameters
         mock_generate.assert_called_once_with(
             ["Python", "JavaScript"], 
-            "Become a full-stack developer"
+            "Become a full-stack developer",
+            user_id="testuser"
         )
     
     def test_generate_roadmap_invalid_skills(self, client, auth_headers):
@@ -121,7 +130,7 @@ class TestRoadmapGeneration:
         )
         assert response.status_code == 401
     
-    @patch('main.generate_roadmap')
+    @patch('main.agenerate_roadmap', new_callable=AsyncMock)
     def test_generate_roadmap_server_error(self, mock_generate, client, auth_headers):
         """Test roadmap generation with server error"""
         # Mock an exception
@@ -143,8 +152,8 @@ class TestResumeUpload:
     """Test resume upload endpoints"""
     
     @patch('main.extract_text_from_pdf')
-    @patch('main.extract_skills')
-    @patch('main.generate_roadmap')
+    @patch('main.aextract_skills', new_callable=AsyncMock)
+    @patch('main.agenerate_roadmap', new_callable=AsyncMock)
     def test_upload_resume_success(self, mock_generate, mock_extract_skills, 
                                  mock_extract_text, client, auth_headers):
         """Test successful resume upload"""
@@ -249,3 +258,193 @@ class TestResumeUpload:
         )
         
         assert response.status_code == 401
+
+class TestAsyncPipeline:
+    """Test the async roadmap/skills pipeline used by the endpoints"""
+
+    def test_agenerate_roadmap_uses_async_backend(self):
+        """The async generator awaits the async LLM backend, not the sync one"""
+        import asyncio
+        import roadmap_generator
+        from llm_scheduler import scheduler
+
+        completion = MagicMock()
+        completion.choices[0].message.content = "1. CV Overview & Assessment\nSolid Python foundation for the role."
+
+        backend = MagicMock(acreate=AsyncMock(return_value=completion))
+        with patch.object(scheduler, 'backend', backend), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.return_value = [{"title": "FastAPI Basics"}]
+
+            result = asyncio.run(roadmap_generator.agenerate_roadmap(["Python"], "Backend Developer"))
+
+        backend.acreate.assert_awaited_once()
+        backend.create.assert_not_called()
+        assert result["cv_assessment"] == "Solid Python foundation for the role."
+        assert result["recommended_courses"] == [{"title": "FastAPI Basics"}]
+
+    def test_aextract_skills_falls_back_on_error(self):
+        """Async skill extraction falls back to keyword matching on API errors"""
+        import asyncio
+        import resume_parser
+        from llm_scheduler import scheduler, FakeLLM
+
+        with patch.object(scheduler, 'backend', FakeLLM(error=Exception("API down"))):
+            skills = asyncio.run(resume_parser.aextract_skills("Worked with Python and Docker"))
+
+        assert sorted(skills) == ["Docker", "Python"]
+
+SAMPLE_ROADMAP = """1. **CV Overview & Assessment**
+Your Python background is a strong base for backend work. Add more deployment experience.
+
+2. **Skills Gap Analysis**
+- Learn Docker for containerized deployments
+- Master SQL for database management
+
+3. **Learning Roadmap**
+Start with SQL fundamentals (1 month). Next, learn Docker and container basics (1 month).
+
+4. **CV Enhancement Tips**
+- Quantify the impact of your projects
+- Add a dedicated skills section
+"""
+
+class TestRoadmapStreaming:
+    """Test incremental section parsing and the SSE endpoint"""
+
+    def test_incremental_parser_matches_full_parse(self):
+        """Feeding tokens one by one yields the same sections as a full parse"""
+        from roadmap_parser import RoadmapSectionParser, parse_roadmap_sections
+
+        parser = RoadmapSectionParser()
+        completed = []
+        for i in range(0, len(SAMPLE_ROADMAP), 7):
+            completed.extend(parser.feed(SAMPLE_ROADMAP[i:i + 7]))
+        completed.extend(parser.close())
+
+        assert completed == ["cv_assessment", "skill_gaps", "learning_path", "cv_tips"]
+        assert parser.finish(SAMPLE_ROADMAP) == parse_roadmap_sections(SAMPLE_ROADMAP)
+
+    def test_astream_roadmap_emits_sections(self):
+        """Streaming emits each section event before the final done event"""
+        import asyncio
+        import roadmap_generator
+        from llm_scheduler import scheduler, FakeLLM
+
+        async def collect():
+            return [event async for event in roadmap_generator.astream_roadmap(["Python"], "Backend Developer")]
+
+        with patch.object(scheduler, 'backend', FakeLLM(SAMPLE_ROADMAP, chunk_size=15)), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.return_value = [{"title": "FastAPI Basics"}]
+            events = asyncio.run(collect())
+
+        names = [name for name, _ in events if name != "token"]
+        assert set(names) == {"cv_assessment", "skill_gaps", "learning_path",
+                              "cv_tips", "recommended_courses", "done"}
+        assert names[-1] == "done"
+        assert names.index("cv_assessment") < names.index("skill_gaps") < names.index("cv_tips")
+        assert "".join(data for name, data in events if name == "token") == SAMPLE_ROADMAP
+        done = events[-1][1]
+        assert done["skill_gaps"] == ["Learn Docker for containerized deployments",
+                                      "Master SQL for database management"]
+        mock_memory.add.assert_called_once()
+
+    def test_stream_endpoint_sse_format(self, client, auth_headers):
+        """The stream endpoint returns text/event-stream messages"""
+        async def fake_events(skills, goal, user_id=None):
+            yield "cv_assessment", "Strong base."
+            yield "done", {"roadmap": "text"}
+
+        with patch('main.astream_roadmap', fake_events):
+            response = client.post(
+                "/generate_roadmap/stream",
+                headers=auth_headers,
+                json={"skills": ["Python"], "goal": "Become a developer"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == (
+            'event: cv_assessment\ndata: "Strong base."\n\n'
+            'event: done\ndata: {"roadmap": "text"}\n\n'
+        )
+
+    def test_stream_endpoint_reports_errors_as_events(self, client, auth_headers):
+        """Failures after the stream started are sent as an error event"""
+        async def failing_events(skills, goal):
+            yield "token", "1."
+            raise Exception("OpenAI API error")
+
+        with patch('main.astream_roadmap', failing_events):
+            response = client.post(
+                "/generate_roadmap/stream",
+                headers=auth_headers,
+                json={"skills": ["Python"], "goal": "Become a developer"}
+            )
+
+        assert response.status_code == 200
+        assert "event: error" in response.text
+        assert "Failed to generate roadmap" in response.text
+
+class TestStageOverlap:
+    """Independent stages overlap with the LLM round trip"""
+
+    def test_course_search_overlaps_llm_call(self):
+        import asyncio
+        import threading
+        import roadmap_generator
+        from llm_scheduler import scheduler
+
+        llm_started = threading.Event()
+        llm_finished = threading.Event()
+        overlapped = []
+        completion = MagicMock()
+        completion.choices[0].message.content = "1. CV Overview & Assessment\nSolid Python foundation for the role."
+
+        async def slow_create(**kwargs):
+            llm_started.set()
+            await asyncio.sleep(0.05)
+            llm_finished.set()
+            return completion
+
+        def recommend(query, k):
+            assert llm_started.wait(timeout=2)
+            overlapped.append(not llm_finished.is_set())
+            return [{"title": "FastAPI Basics"}]
+
+        with patch.object(scheduler, 'backend', MagicMock(acreate=slow_create)), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.side_effect = recommend
+            result = asyncio.run(roadmap_generator.agenerate_roadmap(["Python"], "Backend Developer"))
+
+        timings = result["stage_timings"]
+        for stage in ("prompt_build", "memory_retrieve", "llm", "course_search", "memory_add", "parse", "total"):
+            assert stage in timings
+        assert overlapped == [True]
+        assert result["recommended_courses"] == [{"title": "FastAPI Basics"}]
+
+    @patch('main.agenerate_roadmap', new_callable=AsyncMock)
+    def test_server_timing_header(self, mock_generate, client, auth_headers):
+        """Stage timings are exposed in the response and Server-Timing header"""
+        mock_generate.return_value = {
+            "roadmap": "Test roadmap content",
+            "recommended_courses": [],
+            "stage_timings": {"llm": 1200.5, "total": 1250.0}
+        }
+
+        response = client.post(
+            "/generate_roadmap",
+            headers=auth_headers,
+            json={"skills": ["Python"], "goal": "Become a developer"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["server-timing"] == "llm;dur=1200.5, total;dur=1250.0"
+        assert response.json()["stage_timings"] == {"llm": 1200.5, "total": 1250.0}
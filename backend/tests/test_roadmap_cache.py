@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+from roadmap_cache import RoadmapCache, roadmap_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRoadmapCacheKey:
+    """Test canonical cache keys"""
+
+    def test_key_ignores_order_case_and_whitespace(self):
+        key = roadmap_cache_key(["Python", " sql ", "python"], "Data  Scientist ")
+        assert key == roadmap_cache_key(["SQL", "python"], "data scientist")
+
+    def test_key_differs_by_goal_and_skills(self):
+        base = roadmap_cache_key(["Python"], "Data Scientist")
+        assert base != roadmap_cache_key(["Python"], "Data Engineer")
+        assert base != roadmap_cache_key(["Python", "SQL"], "Data Scientist")
+
+    def test_key_differs_by_user(self):
+        alice = roadmap_cache_key(["Python"], "Data Scientist", "alice")
+        assert alice != roadmap_cache_key(["Python"], "Data Scientist", "bob")
+        assert alice != roadmap_cache_key(["Python"], "Data Scientist")
+
+
+class TestRoadmapCache:
+    """Test LRU/TTL eviction, the SQLite tier and counters"""
+
+    def test_hit_and_miss_counters(self):
+        cache = RoadmapCache()
+        assert cache.get("k") is None
+        cache.set("k", {"roadmap": "text"})
+        assert cache.get("k") == {"roadmap": "text"}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_returns_copies(self):
+        cache = RoadmapCache()
+        cache.set("k", {"skill_gaps": ["Docker"]})
+        cache.get("k")["skill_gaps"].append("mutated")
+        assert cache.get("k") == {"skill_gaps": ["Docker"]}
+
+    def test_lru_eviction(self):
+        cache = RoadmapCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = RoadmapCache(ttl_seconds=60, clock=clock)
+        cache.set("k", 1)
+        clock.now += 59
+        assert cache.get("k") == 1
+        clock.now += 2
+        assert cache.get("k") is None
+
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        db_path = str(tmp_path / "cache.db")
+        RoadmapCache(db_path=db_path).set("k", {"roadmap": "text"})
+
+        restarted = RoadmapCache(db_path=db_path)
+        assert restarted.get("k") == {"roadmap": "text"}
+        assert restarted.stats()["persistent_hits"] == 1
+
+    def test_persistent_tier_respects_ttl(self, tmp_path):
+        clock = FakeClock()
+        db_path = str(tmp_path / "cache.db")
+        RoadmapCache(ttl_seconds=60, db_path=db_path, clock=clock).set("k", 1)
+
+        clock.now += 61
+        assert RoadmapCache(ttl_seconds=60, db_path=db_path, clock=clock).get("k") is None
+
+    def test_async_paths_run_sqlite_off_the_event_loop(self, tmp_path):
+        db_path = str(tmp_path / "cache.db")
+        threads = []
+
+        class RecordingDB:
+            def __init__(self, db):
+                self.db = db
+
+            def execute(self, *args):
+                threads.append(threading.get_ident())
+                return self.db.execute(*args)
+
+            def commit(self):
+                self.db.commit()
+
+        async def roundtrip():
+            writer, reader = RoadmapCache(db_path=db_path), RoadmapCache(db_path=db_path)
+            writer._db, reader._db = RecordingDB(writer._db), RecordingDB(reader._db)
+            await writer.aset("k", {"roadmap": "text"})
+            assert await reader.aget("k") == {"roadmap": "text"}  # from SQLite
+            assert await reader.aget("k") == {"roadmap": "text"}  # from memory
+            return reader.stats(), threading.get_ident()
+
+        stats, loop_thread = asyncio.run(roundtrip())
+        assert len(threads) == 2
+        assert loop_thread not in threads
+        assert (stats["hits"], stats["persistent_hits"]) == (2, 1)
+        assert RoadmapCache(db_path=db_path).get("k") == {"roadmap": "text"}
+
+
+class TestGenerateRoadmapCaching:
+    """A cache hit skips the LLM call, the memory write and the course search"""
+
+    def test_second_call_is_served_from_cache(self):
+        import roadmap_generator
+        from llm_scheduler import scheduler, FakeLLM
+
+        fake_llm = FakeLLM("1. CV Overview & Assessment\nSolid Python foundation for the role.")
+        with patch.object(roadmap_generator, 'cache', RoadmapCache()), \
+             patch.object(scheduler, 'backend', fake_llm), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.return_value = []
+
+            first = asyncio.run(roadmap_generator.agenerate_roadmap(["Python", "SQL"], "Data Scientist"))
+            second = asyncio.run(roadmap_generator.agenerate_roadmap(["sql", "python"], "data scientist"))
+
+        assert "stage_timings" not in second
+        assert "prompt_tokens" not in second
+        first.pop("stage_timings")
+        first.pop("prompt_tokens")
+        assert first == second
+        assert len(fake_llm.calls) == 1
+        assert mock_memory.add.call_count == 1
+        assert mock_recommender.recommend.call_count == 1
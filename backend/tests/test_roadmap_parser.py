@@ -0,0 +1,64 @@
+import json
+import os
+import glob
+import pytest
+
+from roadmap_parser import (
+    RoadmapSectionParser, parse_roadmap_sections, split_learning_path_into_steps, SECTION_NAMES
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "corpus")
+CORPUS = sorted(glob.glob(os.path.join(CORPUS_DIR, "*.txt")))
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestRoadmapParser:
+    """Test the shared roadmap section parser against recorded GPT outputs"""
+
+    def test_corpus_is_present(self):
+        assert len(CORPUS) >= 5
+
+    @pytest.mark.parametrize("path", CORPUS, ids=os.path.basename)
+    def test_matches_recorded_expectations(self, path):
+        with open(path[:-4] + ".expected.json", encoding="utf-8") as f:
+            expected = json.load(f)
+        assert parse_roadmap_sections(_load(path)) == expected
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17, 64])
+    @pytest.mark.parametrize("path", CORPUS, ids=os.path.basename)
+    def test_incremental_feed_matches_full_parse(self, path, chunk_size):
+        text = _load(path)
+        parser = RoadmapSectionParser()
+        for i in range(0, len(text), chunk_size):
+            parser.feed(text[i:i + chunk_size])
+        parser.close()
+        assert parser.finish(text) == parse_roadmap_sections(text)
+
+    def test_sections_complete_in_order(self):
+        parser = RoadmapSectionParser()
+        completed = parser.feed(_load(os.path.join(CORPUS_DIR, "frontend_developer.txt")))
+        completed += parser.close()
+        assert completed == list(SECTION_NAMES)
+
+    def test_step_splitting(self):
+        text = ("Learn SQL fundamentals for two months. Next, build a small analytics project "
+                "with it. Finally, deploy the project and write about it")
+        assert split_learning_path_into_steps(text) == [
+            "Learn SQL fundamentals for two months",
+            "build a small analytics project with it",
+            "deploy the project and write about it",
+        ]
+
+    def test_migration_script_uses_shared_parser(self):
+        from migrate_existing_goals import parse_roadmap_text
+
+        text = _load(os.path.join(CORPUS_DIR, "devops_engineer_plain.txt"))
+        expected = parse_roadmap_sections(text)
+        migrated = parse_roadmap_text(text.split("\n"))
+        assert migrated["cv_assessment"] == expected["cv_assessment"]
+        assert migrated["skill_gaps"] == expected["skill_gaps"][:7]
+        assert migrated["cv_tips"] == expected["cv_tips"][:6]
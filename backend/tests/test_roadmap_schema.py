@@ -0,0 +1,164 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+
+from pydantic import Field
+
+from llm_scheduler import FakeLLM, scheduler
+from progress import ProgressBase
+from roadmap_cache import RoadmapCache
+from roadmap_schema import (
+    ROADMAP_TOOL, RoadmapSections, StructuredOutputError, IncrementalJSONObject,
+    render_markdown, validate_sections
+)
+
+SECTIONS = {
+    "cv_assessment": "Strong Python background with little production exposure.",
+    "skill_gaps": ["Docker", "Kubernetes", "System design"],
+    "learning_path": ["Weeks 1-2: learn Docker basics", "Weeks 3-6: deploy a service on Kubernetes"],
+    "cv_tips": ["Quantify project impact", "Link to GitHub"],
+}
+VALID = json.dumps(SECTIONS)
+
+
+class TestRoadmapSchema:
+    """Test validation of submit_roadmap arguments"""
+
+    def test_fields_match_progress_model(self):
+        assert set(RoadmapSections.model_fields) <= set(ProgressBase.model_fields)
+        assert ROADMAP_TOOL["function"]["parameters"]["required"] == list(RoadmapSections.model_fields)
+
+    def test_valid_arguments(self):
+        assert validate_sections(VALID) == SECTIONS
+
+    @pytest.mark.parametrize("arguments", [
+        '{"cv_assessment": "ok"',                              # truncated
+        json.dumps({**SECTIONS, "skill_gaps": "Docker"}),      # wrong type
+        json.dumps({k: v for k, v in SECTIONS.items() if k != "cv_tips"}),
+        json.dumps({**SECTIONS, "extra": 1}),
+    ])
+    def test_invalid_arguments(self, arguments):
+        with pytest.raises(StructuredOutputError):
+            validate_sections(arguments)
+
+    def test_progress_model_rejection_is_a_structured_output_error(self):
+        class StrictProgress(ProgressBase):
+            cv_assessment: str = Field(max_length=5)
+
+        with patch("roadmap_schema.ProgressBase", StrictProgress):
+            with pytest.raises(StructuredOutputError, match="cv_assessment"):
+                validate_sections(VALID)
+
+    def test_render_markdown_round_trips_through_parser(self):
+        from roadmap_parser import parse_roadmap_sections
+        parsed = parse_roadmap_sections(render_markdown(SECTIONS))
+        assert parsed["skill_gaps"] == SECTIONS["skill_gaps"]
+        assert parsed["cv_tips"] == SECTIONS["cv_tips"]
+
+
+class TestIncrementalJSONObject:
+    """Test streaming extraction of top-level fields"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 64, 10000])
+    def test_chunked_feed_yields_every_field_once(self, chunk_size):
+        text = json.dumps(SECTIONS, indent=2)
+        parser = IncrementalJSONObject()
+        fields = []
+        for i in range(0, len(text), chunk_size):
+            fields.extend(parser.feed(text[i:i + chunk_size]))
+        assert dict(fields) == SECTIONS
+        assert [key for key, _ in fields] == list(SECTIONS)
+        assert parser.done
+
+    def test_field_is_emitted_when_its_value_closes(self):
+        parser = IncrementalJSONObject()
+        assert parser.feed('{"cv_assessment": "Good CV", "skill_gaps": ["Dock') == [("cv_assessment", "Good CV")]
+        assert parser.feed('er"]') == [("skill_gaps", ["Docker"])]
+
+    def test_numbers_wait_for_a_delimiter(self):
+        parser = IncrementalJSONObject()
+        assert parser.feed('{"n": 12') == []
+        assert parser.feed('3}') == [("n", 123)]
+
+
+@pytest.fixture
+def json_mode():
+    import roadmap_generator
+    with patch.object(roadmap_generator, 'OUTPUT_MODE', "json"), \
+         patch.object(roadmap_generator, 'cache', RoadmapCache()), \
+         patch.object(roadmap_generator, 'memory') as mock_memory, \
+         patch.object(roadmap_generator, 'recommender') as mock_recommender:
+        mock_memory.retrieve_with_scores.return_value = []
+        mock_recommender.recommend.return_value = []
+        yield roadmap_generator
+
+
+class TestJSONOutputMode:
+    """Test roadmap generation with ROADMAP_OUTPUT_MODE=json"""
+
+    def test_agenerate_uses_function_call(self, json_mode):
+        fake_llm = FakeLLM(VALID)
+        with patch.object(scheduler, 'backend', fake_llm):
+            result = asyncio.run(json_mode.agenerate_roadmap(["Python"], "DevOps Engineer"))
+
+        assert fake_llm.calls[0]["tool_choice"]["function"]["name"] == "submit_roadmap"
+        for name, value in SECTIONS.items():
+            assert result[name] == value
+        assert result["roadmap"] == render_markdown(SECTIONS)
+        assert "parse" not in result["stage_timings"]
+
+    def test_invalid_output_is_repaired_once(self, json_mode):
+        outputs = iter(['{"cv_assessment": 1}', VALID])
+        fake_llm = FakeLLM(lambda kwargs: next(outputs))
+        with patch.object(scheduler, 'backend', fake_llm):
+            result = json_mode.generate_roadmap(["Python"], "DevOps Engineer")
+
+        assert len(fake_llm.calls) == 2
+        repair = fake_llm.calls[1]["messages"]
+        assert repair[-2] == {"role": "assistant", "content": '{"cv_assessment": 1}'}
+        assert "invalid" in repair[-1]["content"]
+        assert result["skill_gaps"] == SECTIONS["skill_gaps"]
+
+    def test_repeated_invalid_output_raises(self, json_mode):
+        with patch.object(scheduler, 'backend', FakeLLM("not json")):
+            with pytest.raises(StructuredOutputError):
+                asyncio.run(json_mode.agenerate_roadmap(["Python"], "DevOps Engineer"))
+
+    def test_stream_emits_sections_from_json_fields(self, json_mode):
+        async def collect():
+            return [event async for event in json_mode.astream_roadmap(["Python"], "DevOps Engineer")]
+
+        with patch.object(scheduler, 'backend', FakeLLM(VALID, chunk_size=7)):
+            events = asyncio.run(collect())
+
+        names = [name for name, _ in events]
+        assert "token" not in names
+        assert names[-1] == "done"
+        for name, value in SECTIONS.items():
+            assert (name, value) in events
+            assert names.count(name) == 1
+        assert events[-1][1]["roadmap"] == render_markdown(SECTIONS)
+
+    def test_stream_holds_back_invalid_fields_and_emits_repairs(self, json_mode):
+        async def collect():
+            return [event async for event in json_mode.astream_roadmap(["Python"], "DevOps Engineer")]
+
+        invalid = json.dumps({**SECTIONS, "cv_assessment": 42, "skill_gaps": "Docker",
+                              "cv_tips": ["Link to GitHub"]})
+        outputs = iter([invalid, VALID])
+        fake_llm = FakeLLM(lambda kwargs: next(outputs), chunk_size=7)
+        with patch.object(scheduler, 'backend', fake_llm):
+            events = asyncio.run(collect())
+
+        assert len(fake_llm.calls) == 2
+        sections = [(name, value) for name, value in events if name in SECTIONS]
+        assert ("cv_assessment", 42) not in sections
+        assert ("skill_gaps", "Docker") not in sections
+        # Valid but replaced by the repair: streamed first, then emitted again
+        assert sections.index(("cv_tips", ["Link to GitHub"])) < sections.index(("cv_tips", SECTIONS["cv_tips"]))
+        names = [name for name, _ in events]
+        for name, value in SECTIONS.items():
+            assert (name, value) in sections
+            assert names.index(name) < names.index("done")
+        assert names.count("learning_path") == 1
@@ -0,0 +1,200 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+from singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test coalescing of concurrent identical calls"""
+
+    def test_concurrent_async_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {"value": value}
+
+        async def run():
+            return await asyncio.gather(*[flight.do("k", work, 1) for _ in range(5)])
+
+        results = asyncio.run(run())
+        assert calls == [1]
+        assert all(r == {"value": 1} for r in results)
+        assert flight.stats() == {"calls": 5, "coalesced": 4, "failures": 0, "in_flight": 0}
+
+    def test_different_keys_are_not_coalesced(self):
+        flight = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        async def run():
+            return await asyncio.gather(flight.do("a", work, 1), flight.do("b", work, 2))
+
+        assert asyncio.run(run()) == [1, 2]
+        assert flight.stats()["coalesced"] == 0
+
+    def test_failure_is_shared_by_all_waiters(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("OpenAI API error")
+
+        async def run():
+            return await asyncio.gather(*[flight.do("k", work) for _ in range(3)],
+                                        return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert flight.stats()["failures"] == 1
+
+    def test_cancelled_caller_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flight.do("k", work))
+            second = asyncio.ensure_future(flight.do("k", work))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "done"
+
+    def test_sync_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def work():
+            calls.append(1)
+            started.set()
+            time.sleep(0.05)
+            return "result"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do_sync("k", work)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(flight.do_sync("k", work)))
+                     for _ in range(4)]
+        for t in followers:
+            t.start()
+        for t in [leader] + followers:
+            t.join()
+
+        assert calls == [1]
+        assert results == ["result"] * 5
+        assert flight.stats()["coalesced"] == 4
+
+    def test_sync_failure_is_shared(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def work():
+            started.set()
+            release.wait()
+            raise ValueError("bad input")
+
+        def call():
+            try:
+                flight.do_sync("k", work)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        time.sleep(0.02)
+        release.set()
+        leader.join()
+        follower.join()
+
+        assert len(errors) == 2
+        assert flight.stats()["failures"] == 1
+
+
+class TestRoadmapCoalescing:
+    """Identical concurrent generate requests make one OpenAI call"""
+
+    def test_concurrent_agenerate_roadmap_calls_coalesce(self):
+        import roadmap_generator
+        from roadmap_cache import RoadmapCache
+        from llm_scheduler import scheduler
+
+        completion = MagicMock()
+        completion.choices[0].message.content = "1. CV Overview & Assessment\nSolid Python foundation for the role."
+        api_calls = []
+
+        async def slow_create(**kwargs):
+            api_calls.append(kwargs)
+            await asyncio.sleep(0.02)
+            return completion
+
+        async def run():
+            return await asyncio.gather(*[
+                roadmap_generator.agenerate_roadmap(["Python"], "Data Scientist") for _ in range(3)
+            ])
+
+        with patch.object(roadmap_generator, 'cache', RoadmapCache()), \
+             patch.object(roadmap_generator, 'inflight', SingleFlight()) as flight, \
+             patch.object(scheduler, 'backend', MagicMock(acreate=slow_create)), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.return_value = []
+            results = asyncio.run(run())
+
+        assert len(api_calls) == 1
+        assert results[0] == results[1] == results[2]
+        assert flight.stats()["coalesced"] == 2
+
+    def test_different_users_neither_coalesce_nor_share_the_cache(self):
+        import roadmap_generator
+        from roadmap_cache import RoadmapCache
+        from llm_scheduler import scheduler
+
+        completion = MagicMock()
+        completion.choices[0].message.content = "1. CV Overview & Assessment\nSolid Python foundation for the role."
+        api_calls = []
+
+        async def slow_create(**kwargs):
+            api_calls.append(kwargs)
+            await asyncio.sleep(0.02)
+            return completion
+
+        async def run():
+            await asyncio.gather(*[
+                roadmap_generator.agenerate_roadmap(["Python"], "Data Scientist", user_id=user)
+                for user in ("alice", "bob")
+            ])
+            return await roadmap_generator.agenerate_roadmap(["Python"], "Data Scientist", user_id="alice")
+
+        with patch.object(roadmap_generator, 'cache', RoadmapCache()) as cache, \
+             patch.object(roadmap_generator, 'inflight', SingleFlight()) as flight, \
+             patch.object(scheduler, 'backend', MagicMock(acreate=slow_create)), \
+             patch.object(roadmap_generator, 'memory') as mock_memory, \
+             patch.object(roadmap_generator, 'recommender') as mock_recommender:
+            mock_memory.retrieve_with_scores.return_value = []
+            mock_recommender.recommend.return_value = []
+            asyncio.run(run())
+
+        assert len(api_calls) == 2
+        assert flight.stats()["coalesced"] == 0
+        assert cache.stats()["hits"] == 1  # alice's repeat
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from vector_index import AdaptiveIndex, IndexSpec, new_flat_index
+
+
+def _flat(n, dim=16, start=0, seed=0):
+    vectors = np.random.default_rng(seed).random((n, dim), dtype="float32")
+    flat = new_flat_index(dim)
+    flat.add_with_ids(vectors, np.arange(start, start + n, dtype="int64"))
+    return flat, vectors
+
+
+class TestAdaptiveIndex:
+    """Test the switch from exact to approximate search"""
+
+    def test_stays_flat_below_threshold(self):
+        flat, _ = _flat(50)
+        index = AdaptiveIndex(IndexSpec(threshold=100), flat)
+        assert not index.needs_upgrade()
+        assert index.kind == "flat"
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError):
+            IndexSpec(kind="lsh")
+
+    @pytest.mark.parametrize("kind", ["hnsw", "ivfpq"])
+    def test_upgrade_keeps_exact_top_hit(self, kind):
+        flat, vectors = _flat(2000)
+        index = AdaptiveIndex(IndexSpec(kind=kind, threshold=1000, nprobe=64), flat)
+        exact = index.search(vectors[:1], 5)
+        assert index.needs_upgrade()
+        index.upgrade_async()
+        index.wait()
+
+        assert index.kind == kind
+        assert index.covered == 2000
+        approx = index.search(vectors[:1], 5)
+        assert approx[0] == pytest.approx(exact[0])
+        assert not index.needs_upgrade()
+
+    def test_newer_ids_are_searched_exactly(self):
+        flat, vectors = _flat(500)
+        index = AdaptiveIndex(IndexSpec(threshold=100), flat)
+        index.upgrade()
+
+        grown, extra = _flat(50, start=500, seed=1)
+        grown.add_with_ids(vectors, np.arange(500, dtype="int64"))
+        index.replace(grown)
+        assert index.uncovered() == 50
+        assert index.search(extra[3:4], 1)[0][1] == 503
+
+    def test_rebuild_when_much_changed(self):
+        flat, _ = _flat(500)
+        index = AdaptiveIndex(IndexSpec(threshold=100, rebuild_fraction=0.2), flat)
+        index.upgrade()
+        assert not index.needs_upgrade(stale=50)
+        assert index.needs_upgrade(stale=150)
+
+
+class TestMemoryIndexSwitch:
+    """MemoryManager searches its snapshot through the approximate index once large enough"""
+
+    @pytest.mark.parametrize("stored_memory", [dict(
+        snapshot_every=0, capacity=30, eviction="fifo", evict_batch=1,
+        index_spec=IndexSpec(kind="hnsw", threshold=20, rebuild_fraction=10),  # no rebuild
+    )], indirect=True)
+    def test_switches_after_snapshot(self, stored_memory, fill):
+        memory = stored_memory
+        fill(memory, 25)
+        memory.snapshot()
+        memory.base_index.wait()
+        assert memory.stats()["index"] == "hnsw"
+        assert memory.retrieve("skills python sql goal role7", k=1) == ["roadmap 7"]
+
+        # Entries evicted after the build are never returned, before or after compaction
+        fill(memory, 10, start=25)
+        for _ in range(2):
+            results = memory.retrieve("skills python sql goal role3", k=5)
+            assert len(results) == 5
+            assert not {f"roadmap {i}" for i in range(5)} & set(results)
+            memory.snapshot()
+        assert memory.base_index.covered == 25
+        assert memory.retrieve("skills python sql goal role31", k=1) == ["roadmap 31"]
+
+    @pytest.mark.parametrize("stored_memory", [
+        dict(snapshot_every=0, index_spec=IndexSpec(kind="flat", threshold=1))], indirect=True)
+    def test_flat_kind_never_switches(self, stored_memory, fill):
+        memory = stored_memory
+        fill(memory, 5)
+        memory.snapshot()
+        assert memory.stats()["index"] == "flat"
+
+    @pytest.mark.parametrize("memory", [dict(
+        capacity=250, eviction="fifo", evict_batch=10, index_spec=IndexSpec(kind="hnsw", threshold=50),
+    )], indirect=True)
+    def test_switches_without_a_store(self, memory, fill):
+        fill(memory, 60)
+        memory.base_index.wait()
+        assert memory.stats()["index"] == "hnsw"
+        assert memory.retrieve("skills python sql goal role7", k=1) == ["roadmap 7"]
+
+        # Later adds are folded in and indexed again; evicted entries never come back
+        fill(memory, 240, start=60)
+        memory.base_index.wait()
+        fill(memory, 1, start=300)  # folds what was added during the last build
+        memory.base_index.wait()
+        stats = memory.stats()
+        assert stats["index_entries"] > 60
+        assert stats["log_entries"] < 60
+        assert memory.retrieve_with_scores("skills python sql goal role290", k=1)[0][0] == pytest.approx(0)
+        results = memory.retrieve("skills python sql goal role3", k=5)
+        assert not {f"roadmap {i}" for i in range(50)} & set(results)
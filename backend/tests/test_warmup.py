@@ -0,0 +1,121 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import roadmap_generator
+from lazy import Lazy
+from main import app
+
+
+class TestLazy:
+    """Construction happens once, on first use"""
+
+    def test_builds_on_first_attribute(self):
+        factory = MagicMock(return_value=MagicMock(stats=lambda: {"entries": 0}))
+        lazy = Lazy("thing", factory)
+        assert not lazy.ready
+        factory.assert_not_called()
+        assert lazy.stats() == {"entries": 0}
+        assert lazy.ready and lazy.build_seconds is not None
+        lazy.stats()
+        factory.assert_called_once()
+
+    def test_concurrent_first_use_builds_once(self):
+        calls = []
+        gate = threading.Event()
+
+        def factory():
+            calls.append(1)
+            gate.wait(1)
+            return object()
+        lazy = Lazy("thing", factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        gate.set()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert len({id(r) for r in results}) == 1
+
+    def test_failed_build_is_retried(self):
+        factory = MagicMock(side_effect=[RuntimeError("no model"), "built"])
+        lazy = Lazy("thing", factory)
+        with pytest.raises(RuntimeError):
+            lazy.get()
+        assert not lazy.ready
+        assert lazy.get() == "built"
+
+
+@pytest.fixture
+def cold(monkeypatch):
+    """Fresh warmup state with mocked models"""
+    monkeypatch.setattr(roadmap_generator, "_warm", threading.Event())
+    monkeypatch.setattr(roadmap_generator, "warmup_state",
+                        {"status": "cold", "error": None, "timings": {}})
+    monkeypatch.setenv("MODEL_WARMUP", "1")
+    memory, recommender = MagicMock(), MagicMock()
+    with patch.object(roadmap_generator, "memory", memory), \
+         patch.object(roadmap_generator, "recommender", recommender), \
+         patch("main.warmup_state", roadmap_generator.warmup_state):
+        yield memory, recommender
+
+
+class TestWarmup:
+    """warmup() builds and exercises both models; /ready tracks it"""
+
+    def test_warmup_runs_dummy_encode_and_search(self, cold):
+        memory, recommender = cold
+        timings = roadmap_generator.warmup()
+        memory.get.assert_called_once()
+        recommender.get.assert_called_once()
+        memory.model.encode.assert_called_once()
+        recommender.recommend.assert_called_once()
+        assert set(timings) == {"memory_init", "recommender_init", "encode", "course_search"}
+        assert roadmap_generator.is_ready()
+
+    def test_ready_is_503_until_warm(self, cold):
+        client = TestClient(app)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "cold"
+        roadmap_generator.warmup()
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert "encode" in response.json()["warmup_ms"]
+
+    def test_failed_warmup_stays_unready(self, cold):
+        memory, _ = cold
+        memory.get.side_effect = OSError("weights missing")
+        with pytest.raises(OSError):
+            roadmap_generator.warmup()
+        response = TestClient(app).get("/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "failed", "error": "OSError: weights missing",
+                                   "warmup_ms": {}}
+
+    def test_ready_without_warmup(self, cold, monkeypatch):
+        monkeypatch.setenv("MODEL_WARMUP", "0")
+        assert TestClient(app).get("/ready").status_code == 200
+
+    def test_health_is_always_ok(self, cold):
+        response = TestClient(app).get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    def test_startup_warms_in_background(self, cold):
+        with TestClient(app) as client:
+            roadmap_generator._warm.wait(5)
+            assert client.get("/ready").status_code == 200
+
+    def test_shutdown_closes_loaded_models(self, cold, monkeypatch):
+        monkeypatch.setenv("MODEL_WARMUP", "0")
+        memory, recommender = MagicMock(ready=True), MagicMock(ready=False)
+        with patch("main.roadmap_memory", memory), patch("main.course_recommender", recommender):
+            with TestClient(app):
+                memory.close.assert_not_called()
+        memory.close.assert_called_once()
+        recommender.close.assert_not_called()
@@ -0,0 +1,243 @@
+# backend/vector_index.py
+"""Index selection for the FAISS searches (roadmap memory, course catalog).
+
+Everything starts as an exact IndexIDMap2 over IndexFlatL2, which is the
+right choice for small collections and stays the source of truth (it can be
+a read-only memory-mapped snapshot). Once a collection crosses
+IndexSpec.threshold vectors, AdaptiveIndex builds an approximate index
+(HNSW or IVF-PQ) over the same IDs in a background thread and swaps it in
+atomically; searches keep going to the flat index until the swap.
+"""
+import logging
+import os
+import threading
+import time
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("flat", "hnsw", "ivfpq")
+
+
+def new_flat_index(dim):
+    return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+
+
+def index_contents(index):
+    """(ids, vectors) of an IndexIDMap2 over a flat index"""
+    ids = faiss.vector_to_array(index.id_map)
+    inner = faiss.downcast_index(index.index)
+    return ids, inner.reconstruct_n(0, index.ntotal) if index.ntotal else None
+
+
+class IndexSpec:
+    """Which approximate index to build, from what size, with which parameters.
+
+    kind "flat" never switches. Otherwise collections with at least
+    `threshold` vectors get an HNSW graph (hnsw_m links per node) or an
+    IVF-PQ index (about 4*sqrt(n) lists, pq_m sub-quantizers, 0 = dim/8).
+    IVF-PQ candidates are re-ranked with exact distances from the flat index,
+    so callers that threshold on distance see the same numbers either way.
+    """
+
+    def __init__(self, kind="hnsw", threshold=20000, hnsw_m=32, ef_construction=80,
+                 ef_search=64, nprobe=16, pq_m=0, rerank=4, rebuild_fraction=0.2):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown index kind {kind!r}, expected one of {list(KINDS)}")
+        self.kind = kind
+        self.threshold = threshold
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.rerank = rerank
+        self.rebuild_fraction = rebuild_fraction
+
+    @classmethod
+    def from_env(cls, prefix):
+        """Read {prefix}_INDEX, {prefix}_INDEX_THRESHOLD, {prefix}_HNSW_M,
+        {prefix}_EF_SEARCH and {prefix}_NPROBE"""
+        return cls(
+            kind=os.getenv(f"{prefix}_INDEX", "hnsw").lower(),
+            threshold=int(os.getenv(f"{prefix}_INDEX_THRESHOLD", "20000")),
+            hnsw_m=int(os.getenv(f"{prefix}_HNSW_M", "32")),
+            ef_search=int(os.getenv(f"{prefix}_EF_SEARCH", "64")),
+            nprobe=int(os.getenv(f"{prefix}_NPROBE", "16")),
+        )
+
+    def wants_approximate(self, n):
+        return self.kind != "flat" and n >= max(self.threshold, 1)
+
+    def build(self, vectors, ids):
+        """Approximate IndexIDMap2 over (vectors, ids)"""
+        n, dim = vectors.shape
+        if self.kind == "hnsw":
+            inner = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            inner.hnsw.efConstruction = self.ef_construction
+        elif self.kind == "ivfpq":
+            nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+            pq_m = self.pq_m or max(1, dim // 8)
+            while dim % pq_m:
+                pq_m -= 1
+            nbits = 8 if n >= 256 * 39 else 4  # keep enough training points per centroid
+            inner = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, nlist, pq_m, nbits)
+            inner.train(vectors)
+        else:
+            raise ValueError("flat indexes are built with new_flat_index")
+        index = faiss.IndexIDMap2(inner)
+        index.add_with_ids(vectors, ids)
+        return index
+
+    def params(self, k):
+        if self.kind == "hnsw":
+            return faiss.SearchParametersHNSW(efSearch=max(self.ef_search, k))
+        return faiss.SearchParametersIVF(nprobe=self.nprobe)
+
+
+class AdaptiveIndex:
+    """Search over a read-only flat IndexIDMap2 that upgrades itself.
+
+    upgrade() builds spec's approximate index over the flat index's current
+    contents and swaps it in; upgrade_async() does that in a background
+    thread. The flat index can be replaced (a new snapshot) at any time: the
+    approximate index keeps serving the IDs it was built from, and IDs newer
+    than those are searched exactly in the flat index until the next build.
+
+    Results may include IDs the caller removed after the approximate index
+    was built; callers filter those and count them as `stale`.
+    """
+
+    def __init__(self, spec: IndexSpec, flat=None):
+        self.spec = spec
+        self._flat = (None, -1)  # (flat index, largest ID in it)
+        self._ann = None         # (approximate index, largest ID it covers)
+        self._building = threading.Lock()
+        self._thread = None
+        self.build_seconds = 0.0
+        self.replace(flat)
+
+    def replace(self, flat):
+        """Serve from a new flat index, e.g. a fresh snapshot"""
+        max_id = int(faiss.vector_to_array(flat.id_map).max()) if flat is not None and flat.ntotal else -1
+        self._flat = (flat, max_id)
+
+    def with_flat(self, flat):
+        """A new AdaptiveIndex over `flat` that keeps serving this one's
+        approximate index; IDs no longer in `flat` must be filtered by the
+        caller, as after replace(). Lets a caller swap index and data together."""
+        index = AdaptiveIndex(self.spec, flat)
+        index._ann = self._ann
+        index.build_seconds = self.build_seconds
+        return index
+
+    @property
+    def flat(self):
+        return self._flat[0]
+
+    @property
+    def ntotal(self):
+        return self.flat.ntotal if self.flat is not None else 0
+
+    @property
+    def kind(self):
+        return self.spec.kind if self._ann is not None else "flat"
+
+    @property
+    def building(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def covered(self):
+        """Vectors served by the approximate index"""
+        return self._ann[0].ntotal if self._ann is not None else 0
+
+    @property
+    def covered_max_id(self):
+        return self._ann[1] if self._ann is not None else -1
+
+    def uncovered(self):
+        """Vectors of the flat index that are newer than the approximate index"""
+        if self._ann is None or self.flat is None:
+            return self.ntotal
+        ids = faiss.vector_to_array(self.flat.id_map)
+        return int(np.count_nonzero(ids > self._ann[1]))
+
+    def needs_upgrade(self, stale=0):
+        """Whether an (re)build is due: big enough and none yet, or too much changed since"""
+        if not self.spec.wants_approximate(self.ntotal):
+            return False
+        if self._ann is None:
+            return True
+        return self.uncovered() + stale > self.spec.rebuild_fraction * max(self.covered, 1)
+
+    def search(self, x, k, extra=0):
+        """k + extra nearest (distance, id) pairs for the single query x, closest first"""
+        (flat, flat_max_id), ann = self._flat, self._ann  # read once: swaps may happen concurrently
+        fetch = min(flat.ntotal if flat is not None else 0, k + extra)
+        if fetch <= 0:
+            return []
+        if ann is None:
+            D, I = flat.search(x, fetch)
+            return [(float(d), int(i)) for d, i in zip(D[0], I[0]) if i >= 0]
+
+        index, max_id = ann
+        hits = []
+        if self.spec.kind == "ivfpq":
+            D, I = index.search(x, fetch * self.spec.rerank, params=self.spec.params(fetch))
+            # Re-rank with exact distances; IDs gone from the flat index are dropped
+            for i in I[0]:
+                if i < 0:
+                    continue
+                try:
+                    vector = flat.reconstruct(int(i))
+                except RuntimeError:
+                    continue
+                hits.append((float(((vector - x[0]) ** 2).sum()), int(i)))
+        else:
+            D, I = index.search(x, fetch, params=self.spec.params(fetch))
+            hits.extend((float(d), int(i)) for d, i in zip(D[0], I[0]) if i >= 0)
+        if flat_max_id > max_id:
+            # IDs added after the build are only in the flat index
+            newer = faiss.SearchParameters(sel=faiss.IDSelectorRange(max_id + 1, flat_max_id + 1))
+            D, I = flat.search(x, fetch, params=newer)
+            hits.extend((float(d), int(i)) for d, i in zip(D[0], I[0]) if i >= 0)
+        hits.sort()
+        return hits[:fetch]
+
+    def upgrade(self, exclude=()):
+        """Build the approximate index now (IDs in `exclude` are left out)"""
+        with self._building:
+            flat = self.flat
+            if flat is None or not flat.ntotal:
+                return
+            ids, vectors = index_contents(flat)
+            if vectors is None:
+                return
+            max_id = int(ids.max())
+            if exclude:
+                keep = ~np.isin(ids, list(exclude))
+                ids, vectors = ids[keep], vectors[keep]
+            if not ids.size:
+                return
+            start = time.perf_counter()
+            index = self.spec.build(np.ascontiguousarray(vectors), ids)
+            self.build_seconds = time.perf_counter() - start
+            self._ann = (index, max_id)
+            logger.info("Built %s index over %d vectors in %.1fs", self.spec.kind, ids.size, self.build_seconds)
+
+    def upgrade_async(self, exclude=()):
+        """Start upgrade() in a background thread unless one is already running"""
+        if self.building:
+            return False
+        self._thread = threading.Thread(target=self.upgrade, args=(set(exclude),),
+                                        name="index-upgrade", daemon=True)
+        self._thread.start()
+        return True
+
+    def wait(self, timeout=None):
+        """Wait for a background upgrade to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)